@@ -4,6 +4,109 @@ from json import dumps
 import inspect
 from ai_browser_agent.app.ports.browser import BrowserPort
 from ai_browser_agent.app.ports.llm import LLMPort
+from ai_browser_agent.domain.entities.action import Action
+from ai_browser_agent.domain.services.tool_schema import FINISH_STEP, WAIT_FOR_THE_HUMAN, get_tool_set
+from ai_browser_agent.shared.constants import (
+    LLM_CALL_DEFAULT,
+    LLM_CALL_PLAN,
+    LLM_CALL_STEP_ACTIONS,
+    LLM_CALL_TIERS,
+    LLM_TIER_LARGE,
+    LLM_TIERS,
+    READY_AFTER_ACTION_TIMEOUT,
+)
+from ai_browser_agent.shared.json_stream import ActionStreamParser
+from ai_browser_agent.shared.prompt import Prompt
+
+# Неизменные инструкции промптов. Данные вызова (задача, контекст) дописываются
+# после них, чтобы префикс запроса совпадал между вызовами и кэшировался провайдером
+PLAN_INSTRUCTIONS = """
+    Ты — AI-агент, управляющий браузером. Ты стартуешь с about:blank.
+
+    Правила составления плана:
+    1. План должен быть ПОЛНЫМ — от начала (about:blank) до финального результата.
+    2. Если не знаешь точный URL — используй поисковик (Google/Yandex), чтобы найти нужный сайт.
+    3. Если нужны личные данные (адрес, карта, телефон) — добавь шаг "Передать управление человеку".
+    4. Каждый шаг — ОДНО конкретное действие в браузере (клик, ввод текста, ожидание).
+    5. План должен состоять из 5-10 шагов.
+
+    ФОРМАТ ОТВЕТА: ТОЛЬКО JSON-массив. Никаких пояснений, никаких примеров.
+
+    Пример структуры (НО НЕ КОПИРУЙ СОДЕРЖАНИЕ):
+    ["Открыть сайт", "Найти нужный товар", "Добавить в корзину", "Оформить заказ", "Передать управление человеку"]
+
+    Возвращай только чистый json без каких-либо обратных кавычек, маркеров кода или пояснений.
+    """
+
+STEP_TOOLS_INSTRUCTIONS = f"""
+    Ты - автономный AI-агент, который управляет веб-браузером для выполнения задач пользователя.
+
+    Учитывая контекст, проверь выполнен ли текущий шаг. Если нет - вызови инструменты браузера для его выполнения.
+    Если ты не знаешь нужный селектор для действия, сначала найди его с помощью доступных инструментов.
+
+    ПРАВИЛА:
+    - Перед вызовами кратко напиши, что видишь и почему выбираешь действия
+    - Вызывай инструменты в том порядке, в котором их нужно выполнить
+    - Если шаг выполнен, вызови {FINISH_STEP}
+    - Для авторизации, оплаты и ввода личных данных вызови {WAIT_FOR_THE_HUMAN}
+    - page_changes в контексте - какие интерактивные элементы страницы появились, исчезли или изменились после прошлых действий
+    - last_actions в контексте - результат каждого прошлого действия: error - ошибка, url_changed и dom_changed - отреагировала ли страница. Исправляй именно упавшее действие, а не весь план
+    """
+
+STEP_JSON_INSTRUCTIONS = """
+    Ты - автономный AI-агент, который управляет веб-браузером для выполнения задач пользователя.
+
+    Учитывая контекст, проверь выполнена ли задача, если нет то сгенерируй последовательность действий для выполнения текущего шага.
+    Если ты не знаешь нужный селектор для действия сначала найди его с помощью доступных методов
+
+    Если это действие подразумевает загрузку как например переход на новую страницу или поиск с ожиданием элемента, в список действий добавь действие ожидания
+
+    КОМАНДА: Возвращай ТОЛЬКО данные в виде Json. НИКАКИХ обратных кавычек, НИКАКИХ комментариев или пояснений.
+
+    СТРУКТУРА ОТВЕТА:
+    {
+        "thought": "объяснение что видишь и почему выбираешь действие",
+        "actions": list({действие},{действие}) или строка,
+        "context": {'измененные поля контекста'}
+    }
+
+    ПРАВИЛА:
+    - Используй только доступные действия
+    - Для авторизации/оплаты используй "wait_for_the_human"
+    - Указывай в контексте только измененные поля
+    - page_changes в контексте - какие интерактивные элементы страницы появились, исчезли или изменились после прошлых действий
+    - last_actions в контексте - результат каждого прошлого действия: error - ошибка, url_changed и dom_changed - отреагировала ли страница. Исправляй именно упавшее действие, а не весь план
+
+    возвращай в таком виде:
+
+    - "thought": строка, в которой ты объясняешь, что ты видишь на странице и почему ты выбираешь следующее действие.
+    - "actions": объект, описывающий действия. Если ты решил выполнить функцию, то укажи имя функции и аргументы. Если текущая подзадача завершена, то в "actions" вместо массива укажи строку success.
+    - "context": объект, описывающий контекст. Если ты в действии перешел на другой сайт соответствующе поменяй контекст. Указывай только те поля которые поменялись.
+
+    Если подзадача это авторизация или оплата, то в "actions" вместо массива укажи строку wait_for_the_human
+
+    Пример ответа:
+    "thought": "я понимаю что нахожусь не на том сайте где пользователь просил решить задачу, надо перейти на нужный",
+       "actions":[
+                   {
+                       "name": "open_url",
+                       "parameters": {
+                               "url": "https://samokat.ru",
+                       }
+                   },
+                   {
+                       "name": "type",
+                       "parameters": {
+                               "selector": "input[.search]",
+                               "text": "мед",
+                       }
+                   }
+                ],
+       "context":{
+           "current_url": "https://samokat.ru",
+       }
+    """
+
 
 
 class AIAgent:
@@ -11,21 +114,94 @@ class AIAgent:
     Класс ИИ агента выполняющего задания в браузере
     """
 
-    def __init__(self, browser_adapter: BrowserPort, llm_adapter: LLMPort, cli):
+    def __init__(
+            self,
+            browser_adapter: BrowserPort,
+            llm_adapter: LLMPort,
+            cli,
+            native_tools: bool = True,
+            llm_tiers: dict = None,
+            call_tiers: dict = None,
+    ):
+        """
+        Args:
+            llm_adapter: Большая модель - для плана и действий
+            native_tools: Получать действия шага через вызовы инструментов провайдера.
+                          False - через JSON в тексте ответа, для моделей без поддержки инструментов
+            llm_tiers: Уровень -> адаптер для остальных уровней, например {'small': ...}
+            call_tiers: Тип запроса -> уровень модели, поверх LLM_CALL_TIERS
+        """
         self.browser = browser_adapter
         self.llm = llm_adapter
+        self.llm_tiers = {**(llm_tiers or {}), LLM_TIER_LARGE: llm_adapter}
+        self.call_tiers = {**LLM_CALL_TIERS, **(call_tiers or {})}
         self.cli = cli
+        self.native_tools = native_tools
+        self.tools = get_tool_set(type(browser_adapter))
 
+    def models_for(self, call_type: str, tier: str = None) -> list:
+        """
+        Args:
+            call_type: Тип запроса
+            tier: Уровень модели для этого вызова вместо политики call_tiers
+
+        Returns:
+            list: Адаптеры от назначенного уровня и выше, без отсутствующих уровней и повторов
+        """
+        tier = tier or self.call_tiers.get(call_type, LLM_TIER_LARGE)
+        models = []
+        for name in LLM_TIERS[LLM_TIERS.index(tier):]:
+            model = self.llm_tiers.get(name)
+            if model is not None and model not in models:
+                models.append(model)
+        return models
+
+    def llm_for(self, call_type: str, tier: str = None) -> LLMPort:
+        return self.models_for(call_type, tier)[0]
+
+    async def ask(self, message, call_type: str, parse, tier: str = None):
+        """
+        Запрос с разбором ответа и переходом на модель уровнем выше, если ответ не разобран.
 
+        Args:
+            message: Промпт
+            call_type: Тип запроса, по нему выбирается уровень модели
+            parse: Функция ответ -> значение, ValueError если ответ не по формату
+            tier: Уровень модели для этого вызова вместо политики call_tiers
 
+        Returns:
+            Результат parse для первого разобранного ответа
 
-    async def send(self, message) -> str:
+        Raises:
+            ValueError: Ответ не разобран и на самой большой модели
+            Exception: Ошибка запроса к самой большой модели
+        """
+        models = self.models_for(call_type, tier)
+        for model in models:
+            try:
+                response = await model.send(message, call_type=call_type)
+            except Exception as e:
+                # сбой маленькой модели (429 после повторов, обрыв соединения, нет модели в Ollama)
+                # не должен ронять весь шаг: вопрос переходит к модели уровнем выше
+                if model is models[-1]:
+                    raise
+                print(f'{model.model_name} недоступна ({type(e).__name__}: {e}), спрашиваю модель больше')
+                continue
+            try:
+                return parse(response)
+            except ValueError as e:
+                model.invalidate(message, call_type=call_type)
+                if model is models[-1]:
+                    raise
+                print(f'{model.model_name} ответила не по формату ({e}), спрашиваю модель больше')
+
+    async def send(self, message, call_type: str = LLM_CALL_DEFAULT) -> str:
         """
         Обрабатывает сообщение от пользователя
         """
         self.cli.show_message('Думаю...')
-        await self.browser.wait(2000)
-        response = await self.llm.send(message)
+        await self.browser.wait_for_ready(timeout=READY_AFTER_ACTION_TIMEOUT)
+        response = await self.llm_for(call_type).send(message, call_type=call_type)
         return response
 
     def update_context(self, context):
@@ -41,198 +217,131 @@ class AIAgent:
         Returns:
 
         """
-        plan_making_prompt = f"""
-            Ты - автономный AI-агент, который управляет веб-браузером для выполнения задач пользователя.
-            
-            Ты получишь задачу от пользователя и класс для взаимодействия с браузером
-            
-            Начинаешь ты с about:blank страницы
-            Ты должен анализировать HTML, чтобы понять, какие элементы присутствуют на странице,
-            и решить, какое действие выполнить next.
-            Ты должен быть осторожен и не выполнять действия, которые могут навредить.
-            Ты можешь выполнять поиск в поисковых системах. 
-            Если действие подразумевает данные или подтверждения которые знает только человек,
-            например выбор адреса или внесение данных оплаты,
-            тебе нужно передать управление человеку.
-            
-            
-            Пользователь хочет: {task}.
-            
-            Разбей эту задачу на высокоуровневые односложные, но информативные шаги. Например:
-            
-            ["Открыть сайт нужный для задачи(уже должен быть указан сайт)", "Действие на сайте", "Действие на сайте" и так далее]
-            Далее переведи его в json
-            ВАЖНО: Возвращай только чистый json без каких-либо обратных кавычек, маркеров кода или пояснений.
-            """
-
-        # plan_making_prompt = f"""
-        # Ты — AI-агент, который управляет браузером.
-        # Твоя задача — создать ПОЛНЫЙ пошаговый план выполнения задачи пользователя.
-        #
-        # ПРАВИЛА:
-        # 1. Ты стартуешь с about:blank.
-        # 2. План должен покрывать ВСЮ задачу от начала (открытие браузера) до конца (получение результата).
-        # 3. Если пользователь не указал конкретный сайт, ты должен САМ догадаться, какой сайт нужен.
-        # 4. Ты НЕ должен останавливаться на поиске сайта — ты должен спланировать ВСЕ действия до финального шага.
-        # 5. Если для выполнения задачи нужны данные, которых нет на сайте (адрес, телефон, данные карты) — добавь шаг "Передать управление человеку".
-        #
-        # ПРИМЕРЫ ПЛАНОВ:
-        #
-        # Задача: "Заказать пиццу в Додо Пицце"
-        # План: ["Открыть сайт dodopizza.ru", "Найти пиццу 'Маргарита'", "Добавить в корзину", "Перейти в корзину", "Оформить заказ", "Передать управление человеку для ввода адреса"]
-        #
-        # Задача: "Узнать погоду в Москве"
-        # План: ["Открыть сайт yandex.ru/weather", "Ввести 'Москва' в строку поиска", "Нажать кнопку поиска", "Прочитать температуру на сегодня"]
-        #
-        # Задача: "Купить билеты в кино"
-        # План: ["Открыть сайт afisha.ru", "Выбрать фильм 'Дюна'", "Выбрать дату и время", "Выбрать место в зале", "Перейти к оплате", "Передать управление человеку для оплаты"]
-        #
-        # ТЕКУЩАЯ ЗАДАЧА ПОЛЬЗОВАТЕЛЯ: {task}
-        #
-        # СОЗДАЙ ПОЛНЫЙ ПЛАН из 5-10 шагов в формате JSON-массива.
-        # Никаких пояснений — только JSON.
-        # ВАЖНО: Если задача требует ввода личных данных — добавь шаг "Передать управление человеку".
-        # ВАЖНО: Возвращай только чистый json без каких-либо обратных кавычек, маркеров кода или пояснений.
-        # """
-
-        plan_making_prompt = f"""
-        Ты — AI-агент, управляющий браузером. Ты стартуешь с about:blank.
-
-        ТВОЯ ЗАДАЧА (ВНИМАНИЕ! ТОЛЬКО ЭТО ВАЖНО): {task}
-
-        Правила составления плана:
-        1. План должен быть ПОЛНЫМ — от начала (about:blank) до финального результата.
-        2. Если не знаешь точный URL — используй поисковик (Google/Yandex), чтобы найти нужный сайт.
-        3. Если нужны личные данные (адрес, карта, телефон) — добавь шаг "Передать управление человеку".
-        4. Каждый шаг — ОДНО конкретное действие в браузере (клик, ввод текста, ожидание).
-        5. План должен состоять из 5-10 шагов.
-
-        ФОРМАТ ОТВЕТА: ТОЛЬКО JSON-массив. Никаких пояснений, никаких примеров.
-
-        Пример структуры (НО НЕ КОПИРУЙ СОДЕРЖАНИЕ):
-        ["Открыть сайт", "Найти нужный товар", "Добавить в корзину", "Оформить заказ", "Передать управление человеку"]
-
-        Теперь создай план ДЛЯ КОНКРЕТНОЙ ЗАДАЧИ: {task}
-
-        ВАЖНО: Твой план должен ОТНОСИТЬСЯ К ЗАДАЧЕ "{task}", а не к примерам.
-        ЕЩЕ РАЗ: Твоя задача — "{task}". План должен быть для НЕЕ.
-        Возвращай только чистый json без каких-либо обратных кавычек, маркеров кода или пояснений.
-        """
-
-
-        json_plan = await self.send(plan_making_prompt)
-        return json.loads(json_plan)
+        plan_making_prompt = Prompt.from_template(
+            PLAN_INSTRUCTIONS,
+            f"""
+            ТВОЯ ЗАДАЧА: {task}
+            Составь план именно для этой задачи, а не для примера.
+            """,
+        )
+        json_plan = await self.send(plan_making_prompt, call_type=LLM_CALL_PLAN)
+        try:
+            return json.loads(json_plan)
+        except ValueError:
+            # неразобранный план не должен возвращаться из кэша при следующей попытке
+            self.llm_for(LLM_CALL_PLAN).invalidate(plan_making_prompt, call_type=LLM_CALL_PLAN)
+            raise
 
     @staticmethod
     def get_class_func_description(cls: BrowserPort) -> str:
         """
         Получает описание всех методов класса.
 
+        Описание вычисляется один раз на класс адаптера вместе со схемой инструментов.
+
         Args:
             cls: Класс для анализа
 
         Returns:
             str: JSON-строка с информацией о всех методах класса
         """
-        functions_info = []
-
-        # Получаем все методы класса
-        for func_name, func in inspect.getmembers(cls, predicate=inspect.iscoroutinefunction):
-            # Пропускаем приватные и защищенные методы
-            if func_name.startswith('_'):
-                continue
-
-            # Получаем сигнатуру
-            signature = inspect.signature(func)
-            parameters = []
+        browser_class = cls if inspect.isclass(cls) else type(cls)
+        return get_tool_set(browser_class).description
 
-            for param_name, param in signature.parameters.items():
-                if param_name in ('self', 'cls'):
-                    continue
-
-                param_info = {"name": param_name}
-
-                if param.annotation != inspect.Parameter.empty:
-                    param_info["type"] = str(param.annotation)
+    @staticmethod
+    def describe_page_changes(changes: dict):
+        """
+        Сжимает изменения DOM с прошлого шага до того, что стоит отправить LLM.
 
-                if param.default != inspect.Parameter.empty:
-                    param_info["default"] = str(param.default)
+        Args:
+            changes: Результат BrowserPort.get_dom_changes
 
-                parameters.append(param_info)
+        Returns:
+            dict | str | None: Добавленные, удаленные и измененные элементы,
+            строка если страница сменилась целиком, None если ничего не изменилось
+        """
+        if changes.get('navigated') or changes.get('overflow'):
+            return 'страница полностью обновилась'
+
+        delta = {}
+        for kind in ('added', 'removed', 'changed'):
+            if changes.get(kind):
+                delta[kind] = [
+                    {key: value for key, value in node.items() if value}
+                    for node in changes[kind]
+                ]
+        return delta or None
 
-            func_info = {
-                "name": func_name,
-                "parameters": parameters,
-                "return_type": str(signature.return_annotation),
-            }
+    async def get_step_actions_info(self, context):
+        prompt = await self.build_step_actions_prompt(context)
+        response = json.loads(await self.send(prompt, call_type=LLM_CALL_STEP_ACTIONS))
+        return response
 
-            functions_info.append(func_info)
+    async def stream_step_actions(self, context, reply: dict):
+        """
+        Потоковый вариант get_step_actions_info: отдает действия по мере того,
+        как модель их генерирует, не дожидаясь конца ответа.
 
-        return dumps(functions_info, ensure_ascii=False, indent=2)
+        Args:
+            context: Контекст задачи
+            reply: Сюда после окончания потока записываются thought и actions:
+                   список действий, 'success' или 'wait_for_the_human'.
+                   Если поток прерван, actions в reply нет
 
-    async def get_step_actions_info(self, context):
+        Yields:
+            Action: Очередное действие браузера
+        """
+        if self.native_tools:
+            prompt = await self.build_step_tools_prompt(context)
+        else:
+            prompt = await self.build_step_actions_prompt(context)
+        self.cli.show_message('Думаю...')
+        await self.browser.wait_for_ready(timeout=READY_AFTER_ACTION_TIMEOUT)
+        llm = self.llm_for(LLM_CALL_STEP_ACTIONS)
+
+        if not self.native_tools:
+            parser = ActionStreamParser()
+            async for chunk in llm.stream(prompt, call_type=LLM_CALL_STEP_ACTIONS):
+                for action in parser.feed(chunk):
+                    if isinstance(action, dict) and 'name' in action:
+                        yield Action(action['name'], action.get('parameters', {}))
+            try:
+                reply.update(parser.result())
+            except ValueError as e:
+                print(f"Не удалось разобрать ответ модели: {e}")
+            return
+
+        thought = []
+        actions = []
+        decision = None
+        async for event in llm.stream_with_tools(prompt, self.tools, call_type=LLM_CALL_STEP_ACTIONS):
+            if event['type'] == 'text':
+                thought.append(event['text'])
+            elif event['name'] == FINISH_STEP:
+                decision = 'success'
+            elif event['name'] == WAIT_FOR_THE_HUMAN:
+                decision = 'wait_for_the_human'
+                arguments = event['arguments'] if isinstance(event['arguments'], dict) else {}
+                thought = [arguments.get('request') or ''.join(thought)]
+            else:
+                actions.append({'name': event['name'], 'parameters': event['arguments']})
+                yield Action(event['name'], event['arguments'])
+
+        reply['thought'] = ''.join(thought).strip()
+        reply['actions'] = decision or actions
+
+    async def update_page_context(self, context):
+        """Добавляет в контекст текущий URL и изменения страницы с прошлого шага"""
         context['current_url'] = self.browser.page.url
-        available_actions = self.get_class_func_description(self.browser)
-        prompt = f"""
-                Ты - автономный AI-агент, который управляет веб-браузером для выполнения задач пользователя.
-
-                Учитывая контекст, проверь выполнена ли задача, если нет то сгенерируй последовательность действий для выполнения текущего шага.
-                Если ты не знаешь нужный селектор для действия сначала найди его с помощью доступных методов
-              
-                Если это действие подразумевает загрузку как например переход на новую страницу или поиск с ожиданием элемента, в список действий добавь действие ожидания 
-                
-                КОМАНДА: Возвращай ТОЛЬКО данные в виде Json. НИКАКИХ обратных кавычек, НИКАКИХ комментариев или пояснений.
-                
-                СТРУКТУРА ОТВЕТА:
-                {{
-                    "thought": "объяснение что видишь и почему выбираешь действие",
-                    "actions": list({{действие}},{{действие}}) или строка,
-                    "context": {{'измененные поля контекста'}}
-                }}
-                
-                ПРАВИЛА:
-                - Используй только доступные действия
-                - Для авторизации/оплаты используй "wait_for_the_human"
-                - Указывай в контексте только измененные поля
-                
-        
-               
-                возвращай в таком виде:
-               
-                - "thought": строка, в которой ты объясняешь, что ты видишь на странице и почему ты выбираешь следующее действие.
-                - "actions": объект, описывающий действия. Если ты решил выполнить функцию, то укажи имя функции и аргументы. Если текущая подзадача завершена, то в "actions" вместо массива укажи строку success. 
-                - "context": объект, описывающий контекст. Если ты в действии перешел на другой сайт соответствующе поменяй контекст. Указывай только те поля которые поменялись.
-                
-                Если подзадача это авторизация или оплата, то в "actions" вместо массива укажи строку wait_for_the_human
-                            
-               Пример ответа:
-                "thought": "я понимаю что нахожусь не на том сайте где пользователь просил решить задачу, надо перейти на нужный",
-                   "actions":[
-                               {{
-                                   "name": "open_url",
-                                   "parameters": {{
-                                           "url": "https://samokat.ru",
-                                   }}
-                               }},
-                               {{
-                                   "name": "type",
-                                   "parameters": {{
-                                           "selector": "input[.search]",
-                                           "text": "мед",
-                                   }}
-                               }}
-                            ],
-                   "context":{{
-                       "current_url": "https://samokat.ru",
-                   }}
-
-               контекст:    
-               {dumps(context, ensure_ascii=False)} 
-               
-                Доступные
-                действия:
-                {available_actions}
-
-               """
-        response = json.loads(await self.send(prompt))
-        return response
+        context['page_changes'] = self.describe_page_changes(await self.browser.get_dom_changes())
+
+    async def build_step_tools_prompt(self, context) -> Prompt:
+        """Промпт шага для моделей с вызовом инструментов: действия описаны схемой инструментов, а не текстом"""
+        await self.update_page_context(context)
+        return Prompt.from_template(STEP_TOOLS_INSTRUCTIONS, f"контекст:\n{dumps(context, ensure_ascii=False)}")
+
+    async def build_step_actions_prompt(self, context) -> Prompt:
+        await self.update_page_context(context)
+        # описание действий не меняется между шагами, поэтому входит в неизменную часть промпта
+        instructions = inspect.cleandoc(STEP_JSON_INSTRUCTIONS) + '\n\nДоступные действия:\n' + self.tools.description
+        return Prompt(instructions, f"контекст:\n{dumps(context, ensure_ascii=False)}")
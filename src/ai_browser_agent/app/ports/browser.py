@@ -27,6 +27,10 @@ class BrowserPort(Protocol):
         """Готов ли браузер к работе. Метод не для использования ИИ."""
         pass
 
+    def set_human_control(self, active: bool):
+        """Браузер передан человеку (True) или возвращен агенту (False). Метод не для использования ИИ."""
+        pass
+
     async def click(self, selector: str) -> Page:
         """Кликнуть по элементу и получить новую страницу"""
         pass
@@ -51,12 +55,24 @@ class BrowserPort(Protocol):
         """Кликнуть по элементу и получить новую страницу"""
         pass
 
+    async def wait_for_ready(self, selector: str = None, timeout: float = None) -> bool:
+        """Дождаться готовности страницы и, опционально, появления элемента"""
+        pass
+
     async def press(self, selector: str) -> Page:
         """Кликнуть по элементу и получить новую страницу"""
         pass
 
-    async def _glimpse_scan(self, selector: str) -> Page:
-        """Кликнуть по элементу и получить новую страницу"""
+    async def mark_dom_snapshot(self) -> int:
+        """Запомнить текущее состояние DOM. Метод не для использования ИИ."""
+        pass
+
+    async def get_dom_changes(self, since: int = None) -> dict:
+        """Изменения интерактивных элементов с момента снимка. Метод не для использования ИИ."""
+        pass
+
+    async def probe_selectors(self, selectors: list) -> dict:
+        """Проверить несколько селекторов за один запрос: количество совпадений, видимость, текст"""
         pass
 
     async def _analyze_dom_structure(self, selector: str) -> Page:
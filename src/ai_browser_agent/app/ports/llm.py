@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Protocol
+from typing import AsyncIterator, Protocol
 
 
 class LLMPort(Protocol):
@@ -7,8 +7,30 @@ class LLMPort(Protocol):
     model_name:str
     api_key:str
 
-    async def send(self, message: str) -> str:
-        """Отправляет запрос llm и получает ответ"""
+    async def send(self, message: str, call_type: str = 'default') -> str:
+        """Отправляет запрос llm и получает ответ.
+
+        message - строка или shared.prompt.Prompt: его неизменный префикс адаптеры
+        отправляют так, чтобы провайдер мог его кэшировать.
+        call_type - назначение запроса (LLM_CALL_* из shared.constants),
+        по нему обертки выбирают политику кэширования и модель
+        """
+        pass
+
+    def stream(self, message: str, call_type: str = 'default') -> AsyncIterator[str]:
+        """Отправляет запрос llm и отдает ответ кусками по мере генерации"""
+        pass
+
+    def stream_with_tools(self, message: str, tools, call_type: str = 'default') -> AsyncIterator[dict]:
+        """Отправляет запрос с инструментами (ToolSet) в формате провайдера и отдает события по мере генерации:
+        {'type': 'text', 'text': ...} и {'type': 'tool_call', 'name': ..., 'arguments': {...}}
+        """
+        pass
+
+    def invalidate(self, message: str, call_type: str = 'default'):
+        """Забывает сохраненный ответ на запрос, если он оказался непригодным (не разобран вызывающим кодом).
+        Адаптеры без кэша ничего не делают
+        """
         pass
 
     async def close(self):
@@ -1,8 +1,20 @@
 from ai_browser_agent.domain.services.task_service import TaskService
 from ai_browser_agent.infrastructure.browser.adapters.playwright_adapter import PlaywrightBrowserAdapter
+from ai_browser_agent.infrastructure.browser.har_cache import HarCache
+from ai_browser_agent.infrastructure.browser.launch_profile import LaunchProfile
+from ai_browser_agent.infrastructure.browser.request_filter import RequestFilter
+from ai_browser_agent.infrastructure.browser.selector_cache import SelectorCache
+from ai_browser_agent.infrastructure.llm.adapters.cached_adapter import CachedLLMAdapter
+from ai_browser_agent.infrastructure.llm.adapters.claude_adapter import ClaudeLLMAdapter
+from ai_browser_agent.infrastructure.llm.adapters.gemini_adapter import GeminiLLMAdapter
+from ai_browser_agent.infrastructure.llm.adapters.governed_adapter import GovernedLLMAdapter
 from ai_browser_agent.infrastructure.llm.adapters.grok_adapter import GroqLLMAdapter
 from ai_browser_agent.infrastructure.llm.adapters.ollama_adapter import OllamaLLMAdapter
+from ai_browser_agent.infrastructure.llm.adapters.openai_adapter import OpenAILLMAdapter
+from ai_browser_agent.infrastructure.llm.adapters.router_adapter import RouterLLMAdapter
+from ai_browser_agent.infrastructure.llm.http_transport import close_shared_transport
 from ai_browser_agent.presentation.cli import CLI
+from ai_browser_agent.shared.constants import GROQ_SMALL_MODEL, LLM_TIER_SMALL
 
 from ai_browser_agent.agent import AIAgent
 
@@ -13,22 +25,80 @@ from dotenv import load_dotenv
 async def main():
     load_dotenv()
 
-    api_key = getenv('GROK_AI_KEY')
-    if not api_key:
+    # infrastructure
+
+    # провайдеры подключаются по наличию ключей, порядок - предпочтение до набора статистики
+    # лимиты частоты и повторы после 429 - в GovernedLLMAdapter, поэтому собственные повторы SDK отключены
+    llm_adapters = []
+    if getenv('GROK_AI_KEY'):
+        llm_adapters.append(GovernedLLMAdapter(
+            GroqLLMAdapter(api_key=getenv('GROK_AI_KEY'), max_retries=0), provider='groq',
+        ))
+    if getenv('OPENAI_API_KEY'):
+        llm_adapters.append(GovernedLLMAdapter(
+            OpenAILLMAdapter(api_key=getenv('OPENAI_API_KEY'), max_retries=0), provider='openai',
+        ))
+    if getenv('ANTHROPIC_API_KEY'):
+        llm_adapters.append(GovernedLLMAdapter(
+            ClaudeLLMAdapter(api_key=getenv('ANTHROPIC_API_KEY'), max_retries=0), provider='anthropic',
+        ))
+    if getenv('GEMINI_API_KEY'):
+        llm_adapters.append(GovernedLLMAdapter(
+            GeminiLLMAdapter(api_key=getenv('GEMINI_API_KEY')), provider='gemini',
+        ))
+    if getenv('OLLAMA_HOST'):
+        llm_adapters.append(GovernedLLMAdapter(
+            OllamaLLMAdapter(model_name=getenv('OLLAMA_MODEL', 'qwen2.5:14b'), host=getenv('OLLAMA_HOST')),
+            provider='ollama',
+        ))
+    if not llm_adapters:
         raise ValueError("API_KEY не найден в переменных окружения")
 
+    # несколько провайдеров - запросы уходят самому быстрому здоровому, LLM_HEDGE=0 отключает дублирование
+    if len(llm_adapters) > 1:
+        llm_adapter = RouterLLMAdapter(llm_adapters, hedge=getenv('LLM_HEDGE', '1') != '0')
+    else:
+        llm_adapter = llm_adapters[0]
 
-    # infrastructure
-
-    llm_adapter = GroqLLMAdapter(api_key=api_key)
-    # llm_adapter = OllamaLLMAdapter(
-    #     model_name="qwen2.5",  # или "qwen2.5:7b", "qwen2.5:14b"
-    #     host="http://localhost:11434"
-    # )
+    # LLM_CACHE=0 - отправлять все запросы мимо кэша ответов
+    llm_adapter = CachedLLMAdapter(llm_adapter, bypass=getenv('LLM_CACHE', '1') == '0')
 
     await llm_adapter.test()
 
-    browser_adapter = PlaywrightBrowserAdapter(llm_adapter=llm_adapter)
+    # маленькая модель для классификации сообщений и подтверждений, LLM_TIERING=0 - все запросы большой
+    llm_tiers = {}
+    if getenv('LLM_TIERING', '1') != '0':
+        if getenv('GROK_AI_KEY'):
+            llm_tiers[LLM_TIER_SMALL] = GovernedLLMAdapter(
+                GroqLLMAdapter(
+                    model_name=getenv('GROQ_SMALL_MODEL', GROQ_SMALL_MODEL),
+                    api_key=getenv('GROK_AI_KEY'),
+                    max_retries=0,
+                ),
+                provider='groq_small',
+            )
+        elif getenv('OLLAMA_HOST') and getenv('OLLAMA_SMALL_MODEL'):
+            llm_tiers[LLM_TIER_SMALL] = GovernedLLMAdapter(
+                OllamaLLMAdapter(model_name=getenv('OLLAMA_SMALL_MODEL'), host=getenv('OLLAMA_HOST')),
+                provider='ollama',
+            )
+    llm_tiers = {
+        tier: CachedLLMAdapter(adapter, bypass=getenv('LLM_CACHE', '1') == '0') for tier, adapter in llm_tiers.items()
+    }
+
+    # HAR_MODE=record|replay - запись ответов сети в HAR_PATH или офлайн-воспроизведение из него
+    har_mode = getenv('HAR_MODE')
+    har_cache = HarCache(getenv('HAR_PATH', 'recordings/session.har'), mode=har_mode) if har_mode else None
+
+    browser_adapter = PlaywrightBrowserAdapter(
+        llm_adapter=llm_adapter,
+        selector_cache=SelectorCache(),
+        # REQUEST_FILTER=0 - загружать картинки, шрифты, медиа и трекеры; при передаче браузера человеку
+        # фильтр и так приостанавливается
+        request_filter=RequestFilter() if getenv('REQUEST_FILTER', '1') != '0' else None,
+        launch_profile=LaunchProfile.from_env(),
+        har_cache=har_cache,
+    )
 
     # run browser
     await browser_adapter.launch()
@@ -36,11 +106,27 @@ async def main():
     # presentation
     cli = CLI()
 
-    agent = AIAgent(browser_adapter=browser_adapter, llm_adapter=llm_adapter, cli=cli)
+    # LLM_NATIVE_TOOLS=0 - действия в JSON текста ответа, для моделей без вызова инструментов
+    agent = AIAgent(
+        browser_adapter=browser_adapter,
+        llm_adapter=llm_adapter,
+        cli=cli,
+        native_tools=getenv('LLM_NATIVE_TOOLS', '1') != '0',
+        llm_tiers=llm_tiers,
+    )
 
+    # LOCAL_INTENTS=0 - каждое подтверждение и сообщение с задачей разбирает LLM
     task_service = TaskService(
         agent=agent,
         cli=cli,
+        local_intents=getenv('LOCAL_INTENTS', '1') != '0',
     )
 
-    await task_service.run()
+    try:
+        await task_service.run()
+    finally:
+        await browser_adapter.stop()
+        await llm_adapter.close()
+        for adapter in llm_tiers.values():
+            await adapter.close()
+        await close_shared_transport()
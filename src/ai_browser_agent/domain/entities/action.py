@@ -5,3 +5,37 @@ class Action:
     def __init__(self, name, parameters):
         self.name = name
         self.parameters = parameters
+
+
+class ActionResult:
+    """
+    Observation after executing an action
+    """
+    def __init__(self, action: Action, result=None, error: Exception = None, duration_ms: float = 0,
+                 url_changed: bool = False, dom_changed: bool = False):
+        self.action = action
+        self.result = result
+        self.error = error
+        self.duration_ms = duration_ms
+        self.url_changed = url_changed
+        self.dom_changed = dom_changed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self, result_limit: int = 500) -> dict:
+        observation = {
+            "name": self.action.name,
+            "parameters": self.action.parameters,
+            "ok": self.ok,
+            "duration_ms": round(self.duration_ms),
+            "url_changed": self.url_changed,
+            "dom_changed": self.dom_changed,
+        }
+        if self.result is not None:
+            observation["result"] = str(self.result)[:result_limit]
+        if self.error is not None:
+            observation["error"] = type(self.error).__name__
+            observation["error_message"] = str(self.error)[:result_limit]
+        return observation
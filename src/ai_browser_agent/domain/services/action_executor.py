@@ -0,0 +1,196 @@
+import asyncio
+import inspect
+import time
+from collections.abc import AsyncIterator
+from functools import lru_cache
+
+from ai_browser_agent.app.ports.browser import BrowserPort
+from ai_browser_agent.domain.entities.action import Action, ActionResult
+from ai_browser_agent.shared.constants import (
+    ACTION_EXECUTION_TIMEOUT,
+    ACTION_EXECUTION_TIMEOUTS,
+    NOT_FOR_AI_MARKER,
+)
+
+
+class ActionValidationError(Exception):
+    """Действие отсутствует в реестре или вызвано с неверными параметрами"""
+
+
+class ActionStreamError(Exception):
+    """
+    Поток действий оборвался (ошибка LLM или разбора ответа). Причина - в __cause__,
+    results - наблюдения по действиям, которые успели выполниться до обрыва.
+    """
+
+    def __init__(self, results: list):
+        self.results = results
+        super().__init__(f"Поток действий прерван после {len(results)} выполненных действий")
+
+
+@lru_cache(maxsize=None)
+def get_action_registry(browser_class: type) -> dict:
+    """
+    Реестр действий, доступных LLM, вычисляется один раз на класс адаптера.
+
+    Args:
+        browser_class: Класс браузерного адаптера
+
+    Returns:
+        dict: Имя метода -> inspect.Signature для публичных асинхронных методов
+              без пометки "не для использования ИИ"
+    """
+    registry = {}
+    for name, func in inspect.getmembers(browser_class, predicate=inspect.iscoroutinefunction):
+        if name.startswith('_') or NOT_FOR_AI_MARKER in (func.__doc__ or ''):
+            continue
+        registry[name] = inspect.signature(func)
+    return registry
+
+
+class ActionExecutor:
+    """
+    Выполнение списка действий LLM с проверкой по реестру методов браузера.
+
+    По каждому действию возвращается наблюдение: результат, класс ошибки,
+    длительность, изменились ли URL и DOM. Наблюдения уходят в следующий
+    запрос к LLM, чтобы она исправила конкретный сбой, а не строила план заново.
+    """
+
+    def __init__(self, browser: BrowserPort):
+        self.browser = browser
+        self.registry = get_action_registry(type(browser))
+
+    def validate(self, action: Action):
+        """
+        Raises:
+            ActionValidationError: Неизвестное действие или неподходящие параметры
+        """
+        signature = self.registry.get(action.name)
+        if signature is None:
+            raise ActionValidationError(
+                f"Неизвестное действие {action.name}. Доступные: {', '.join(sorted(self.registry))}"
+            )
+        if not isinstance(action.parameters, dict):
+            raise ActionValidationError(f"Параметры {action.name} должны быть объектом")
+        try:
+            signature.bind(self.browser, **action.parameters)
+        except TypeError as e:
+            raise ActionValidationError(f"Неверные параметры {action.name}: {e}") from e
+
+    async def execute(self, actions: list, stop_on_error: bool = True) -> list:
+        """
+        Args:
+            actions: Список Action
+            stop_on_error: Не выполнять оставшиеся действия после первой ошибки,
+                           они обычно зависят от предыдущих
+
+        Returns:
+            list: ActionResult по каждому выполненному действию
+        """
+        results = []
+        for action in actions:
+            result = await self.execute_one(action)
+            results.append(result)
+            if stop_on_error and not result.ok:
+                break
+        return results
+
+    async def execute_stream(self, actions: AsyncIterator, stop_on_error: bool = True) -> list:
+        """
+        Выполняет действия по мере их поступления, например пока LLM еще дописывает ответ.
+
+        Поток читается в фоне, поэтому разбор следующих действий не ждет
+        выполнения текущего. После ошибки чтение потока прекращается.
+
+        Args:
+            actions: Асинхронный итератор Action
+            stop_on_error: Остановиться на первой ошибке
+
+        Returns:
+            list: ActionResult по каждому выполненному действию
+
+        Raises:
+            ActionStreamError: Поток оборвался; уже выполненные действия в results ошибки
+        """
+        queue = asyncio.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for action in actions:
+                    queue.put_nowait(action)
+            finally:
+                queue.put_nowait(finished)
+
+        reader = asyncio.create_task(pump())
+        results = []
+        error = None
+        try:
+            while (action := await queue.get()) is not finished:
+                result = await self.execute_one(action)
+                results.append(result)
+                if stop_on_error and not result.ok:
+                    break
+        except Exception as e:
+            error = e
+        finally:
+            reader.cancel()
+            # ошибка чтения потока пробрасывается вместе с наблюдениями, собственная отмена - нет
+            try:
+                await reader
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise ActionStreamError(results) from error
+        return results
+
+    async def execute_one(self, action: Action) -> ActionResult:
+        started = time.monotonic()
+        try:
+            self.validate(action)
+        except ActionValidationError as e:
+            return ActionResult(action, error=e)
+
+        url_before = self.browser.page.url
+        snapshot = await self._mark_dom()
+
+        returned = None
+        error = None
+        timeout = ACTION_EXECUTION_TIMEOUTS.get(action.name, ACTION_EXECUTION_TIMEOUT)
+        try:
+            method = getattr(self.browser, action.name)
+            returned = await asyncio.wait_for(method(**action.parameters), timeout=timeout)
+        except asyncio.TimeoutError:
+            error = TimeoutError(f"{action.name} не завершилось за {timeout} с")
+        except Exception as e:
+            error = e
+
+        return ActionResult(
+            action,
+            result=returned,
+            error=error,
+            duration_ms=(time.monotonic() - started) * 1000,
+            url_changed=self.browser.page.url != url_before,
+            dom_changed=await self._dom_changed(snapshot),
+        )
+
+    async def _mark_dom(self):
+        try:
+            return await self.browser.mark_dom_snapshot()
+        except Exception:
+            return None
+
+    async def _dom_changed(self, snapshot) -> bool:
+        if snapshot is None:
+            return False
+        try:
+            changes = await self.browser.get_dom_changes(since=snapshot)
+        except Exception:
+            return False
+        return bool(
+            changes.get('navigated') or changes.get('overflow')
+            or changes.get('added') or changes.get('removed') or changes.get('changed')
+        )
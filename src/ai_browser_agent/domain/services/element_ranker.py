@@ -0,0 +1,122 @@
+import math
+from collections import Counter
+
+from ai_browser_agent.shared.constants import (
+    ELEMENT_RANKER_MARGIN,
+    ELEMENT_RANKER_MIN_COVERAGE,
+    ELEMENT_RANKER_SHORTLIST,
+)
+from ai_browser_agent.shared.utils import tokenize
+
+# Вес поля элемента: совпадение в доступном имени важнее совпадения в классе
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'text': 2.0,
+    'aria-label': 3.0,
+    'placeholder': 3.0,
+    'title': 2.0,
+    'data-testid': 1.5,
+    'id': 1.5,
+    'attr_name': 1.5,
+    'class': 0.5,
+    'role': 1.0,
+}
+
+
+class ElementRanker:
+    """
+    Локальное ранжирование элементов страницы по описанию на естественном языке.
+
+    BM25 по полям элемента (текст, доступное имя, aria-label, placeholder,
+    name, id, классы, роль) с русско-английской нормализацией слов. Если
+    лучший кандидат однозначен, LLM можно не спрашивать, иначе в промпт
+    идет только короткий список.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    @staticmethod
+    def _element_terms(element: dict) -> Counter:
+        """Взвешенные частоты слов элемента по всем его полям"""
+        attributes = element.get('attributes', {})
+        fields = {
+            'name': element.get('name'),
+            'text': element.get('text'),
+            'role': element.get('role'),
+            'aria-label': attributes.get('aria-label'),
+            'placeholder': attributes.get('placeholder'),
+            'title': attributes.get('title'),
+            'data-testid': attributes.get('data-testid'),
+            'id': attributes.get('id'),
+            'attr_name': attributes.get('name'),
+            'class': attributes.get('class'),
+        }
+        terms = Counter()
+        for field, value in fields.items():
+            for word in tokenize(value):
+                terms[word] += FIELD_WEIGHTS[field]
+        return terms
+
+    def rank(self, description: str, elements: list, top_n: int = ELEMENT_RANKER_SHORTLIST) -> list:
+        """
+        Args:
+            description: Описание искомого элемента
+            elements: Элементы индекса интерактивных элементов
+            top_n: Сколько лучших кандидатов вернуть
+
+        Returns:
+            list: Пары (оценка, элемент) с положительной оценкой, от лучшей к худшей
+        """
+        query = set(tokenize(description))
+        if not query or not elements:
+            return []
+
+        documents = [self._element_terms(element) for element in elements]
+        average_length = sum(sum(terms.values()) for terms in documents) / len(documents) or 1
+        document_frequency = Counter(word for terms in documents for word in terms.keys() & query)
+
+        scored = []
+        for element, terms in zip(elements, documents):
+            length = sum(terms.values())
+            score = 0.0
+            for word in query & terms.keys():
+                idf = math.log(1 + (len(documents) - document_frequency[word] + 0.5) / (document_frequency[word] + 0.5))
+                frequency = terms[word]
+                score += idf * frequency * (self.k1 + 1) / (
+                    frequency + self.k1 * (1 - self.b + self.b * length / average_length)
+                )
+            if element.get('disabled'):
+                score *= 0.5
+            if score > 0:
+                scored.append((score, element))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:top_n]
+
+    def pick(self, description: str, ranked: list):
+        """
+        Возвращает лучший элемент, если он однозначен, иначе None.
+
+        Однозначен - значит покрывает большую часть слов описания и заметно
+        опережает второго кандидата.
+
+        Args:
+            description: Описание искомого элемента
+            ranked: Результат rank
+
+        Returns:
+            dict | None: Элемент индекса
+        """
+        if not ranked:
+            return None
+        best_score, best = ranked[0]
+        if len(ranked) > 1 and best_score < ranked[1][0] * ELEMENT_RANKER_MARGIN:
+            return None
+
+        query = set(tokenize(description))
+        coverage = len(query & self._element_terms(best).keys()) / len(query)
+        if coverage < ELEMENT_RANKER_MIN_COVERAGE:
+            return None
+        return best
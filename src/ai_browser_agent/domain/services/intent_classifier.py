@@ -0,0 +1,171 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+
+from ai_browser_agent.domain.services.intent_examples import CONFIRMATION_EXAMPLES, TASK_EXAMPLES
+from ai_browser_agent.shared.constants import (
+    INTENT_CONFIDENCE,
+    INTENT_L2,
+    INTENT_LEARNING_RATE,
+    INTENT_TRAIN_EPOCHS,
+)
+from ai_browser_agent.shared.utils import tokenize
+
+# Короткие однозначные ответы целиком; длинные сообщения идут в модель
+CONFIRM_YES_PATTERN = re.compile(
+    r'^(да|ага|ок|окей|готово|вс[её]( готово)?|сделал[а]?|продолжай|продолжаем|дальше|давай дальше'
+    r'|yes|yep|ok|okay|done|all done|ready|continue|go on|go ahead|proceed|next)[\s.,!)]*$',
+    re.IGNORECASE,
+)
+CONFIRM_NO_PATTERN = re.compile(
+    r'^(нет|не-а|ещ[её] нет|не готово|подожди|погоди|секунду|стоп|отмена'
+    r'|no|nope|not yet|wait|hold on|stop|cancel)[\s.,!)]*$',
+    re.IGNORECASE,
+)
+NOT_TASK_PATTERN = re.compile(
+    r'^(привет|здравствуй(те)?|добрый (день|вечер)|доброе утро|спасибо( большое)?|пока|до свидания|как дела'
+    r'|hi|hello|hey|thanks|thank you|bye|how are you)[\s.,!?)]*$',
+    re.IGNORECASE,
+)
+# повелительный глагол в начале, хотя бы два слова после него и объект, который бывает только в вебе:
+# без него "открой дверь" или "купи хлеба" - физическое действие, решение за LLM
+TASK_PATTERN = re.compile(
+    r'^(?=.*\b(?:сайт|интернет|онлайн|браузер|почт|youtube|ютуб|google|гугл|яндекс|yandex|озон|ozon|wildberries'
+    r'|авито|avito|amazon|корзин|билет|отел|рецепт|отзыв|ваканси|погод|курс валют|курс доллар'
+    r'|website|site|online|internet|email|inbox|cart|ticket|flight|hotel|recipe|review|jobs|weather'
+    r'|https?://|www\.))'
+    r'(найди|найти|закажи|заказать|купи|купить|сравни|открой|зайди|забронируй|оформи|посмотри|узнай|проверь'
+    r'|подбери|поищи|запиши|оплати|скачай|добавь'
+    r'|find|order|buy|compare|open|book|search|check|look up|download|pay|add)\s+\S+\s+\S+',
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class IntentPrediction:
+    """
+    label - решение (True/False), confidence - вероятность этого решения,
+    source - 'rule' или 'model'. Если confident ложно, решение за LLM.
+    """
+    label: bool
+    confidence: float
+    confident: bool
+    source: str
+
+
+def features(text: str) -> set:
+    """Основы слов и пары соседних основ, чтобы "не готово" отличалось от "готово" """
+    words = tokenize(text)
+    return set(words) | {f'{first} {second}' for first, second in zip(words, words[1:])}
+
+
+class BagOfWordsModel:
+    """Логистическая регрессия над наличием слов и пар слов"""
+
+    def __init__(self, weights: dict, bias: float):
+        self.weights = weights
+        self.bias = bias
+
+    @classmethod
+    def train(
+            cls,
+            examples: dict,
+            epochs: int = INTENT_TRAIN_EPOCHS,
+            learning_rate: float = INTENT_LEARNING_RATE,
+            l2: float = INTENT_L2,
+    ) -> 'BagOfWordsModel':
+        """
+        Обучение полным градиентным спуском: без случайности, одинаковый результат при каждом запуске.
+
+        Args:
+            examples: {True: [тексты], False: [тексты]}
+        """
+        samples = [(features(text), 1.0 if label else 0.0) for label, texts in examples.items() for text in texts]
+        weights = Counter()
+        bias = 0.0
+        for _ in range(epochs):
+            gradient = Counter()
+            bias_gradient = 0.0
+            for words, target in samples:
+                error = _sigmoid(bias + sum(weights[word] for word in words)) - target
+                bias_gradient += error
+                for word in words:
+                    gradient[word] += error
+            for word in gradient:
+                weights[word] -= learning_rate * (gradient[word] / len(samples) + l2 * weights[word])
+            bias -= learning_rate * bias_gradient / len(samples)
+        return cls(dict(weights), bias)
+
+    def probability(self, text: str) -> float:
+        return _sigmoid(self.bias + sum(self.weights.get(word, 0.0) for word in features(text)))
+
+    def known(self, text: str) -> bool:
+        """Хотя бы одно слово встречалось в обучающих примерах"""
+        return any(word in self.weights for word in features(text))
+
+
+def _sigmoid(value: float) -> float:
+    return 1 / (1 + math.exp(-max(-30.0, min(30.0, value))))
+
+
+class IntentClassifier:
+    """
+    Локальная классификация сообщения пользователя без запроса к LLM.
+
+    Сначала правила на частые однозначные формулировки, затем линейная
+    модель по словам (русский и английский приводятся к общим основам).
+    Решение с вероятностью ниже threshold помечается неуверенным -
+    такой случай отдается LLM. Вопрос ("готово?", "можно продолжать?")
+    всегда неуверенный: это не подтверждение и не задача.
+    """
+
+    def __init__(self, model: BagOfWordsModel, positive=None, negative=None, threshold: float = INTENT_CONFIDENCE):
+        """
+        Args:
+            model: Обученная модель
+            positive: Регулярное выражение, при совпадении - True без модели
+            negative: Регулярное выражение, при совпадении - False без модели
+            threshold: Минимальная вероятность уверенного решения
+        """
+        self.model = model
+        self.positive = positive
+        self.negative = negative
+        self.threshold = threshold
+
+    def predict(self, message: str) -> IntentPrediction:
+        text = message.strip()
+        if text.endswith('?'):
+            return IntentPrediction(False, 0.5, False, 'rule')
+        if self.negative is not None and self.negative.search(text):
+            return IntentPrediction(False, 1.0, True, 'rule')
+        if self.positive is not None and self.positive.search(text):
+            return IntentPrediction(True, 1.0, True, 'rule')
+
+        if not self.model.known(text):
+            return IntentPrediction(False, 0.5, False, 'model')
+        probability = self.model.probability(text)
+        label = probability >= 0.5
+        confidence = probability if label else 1 - probability
+        return IntentPrediction(label, confidence, confidence >= self.threshold, 'model')
+
+
+@lru_cache(maxsize=None)
+def get_confirmation_classifier() -> IntentClassifier:
+    """Готов ли пользователь вернуть управление агенту; обучается один раз на процесс"""
+    return IntentClassifier(
+        BagOfWordsModel.train(CONFIRMATION_EXAMPLES),
+        positive=CONFIRM_YES_PATTERN,
+        negative=CONFIRM_NO_PATTERN,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_task_classifier() -> IntentClassifier:
+    """Является ли сообщение задачей для браузера; обучается один раз на процесс"""
+    return IntentClassifier(
+        BagOfWordsModel.train(TASK_EXAMPLES),
+        positive=TASK_PATTERN,
+        negative=NOT_TASK_PATTERN,
+    )
@@ -0,0 +1,248 @@
+# Размеченные примеры для локальных классификаторов намерений (intent_classifier.py).
+# Модель обучается на них при первом обращении; новые примеры добавляются сюда же.
+
+# Ответ пользователя после передачи управления: True - можно продолжать, False - еще нет
+CONFIRMATION_EXAMPLES = {
+    True: [
+        'готово',
+        'все готово',
+        'всё, готово',
+        'сделал',
+        'сделала',
+        'я сделал',
+        'я все сделал',
+        'я закончил',
+        'закончила',
+        'выполнил',
+        'да, сделал, продолжай',
+        'продолжай',
+        'можешь продолжать',
+        'можно продолжать',
+        'давай дальше',
+        'поехали дальше',
+        'иди дальше',
+        'ок, продолжай',
+        'ок',
+        'окей',
+        'хорошо, дальше',
+        'да',
+        'ага, готово',
+        'вошел в аккаунт',
+        'авторизовался, продолжай',
+        'залогинился',
+        'оплатил',
+        'ввел данные карты',
+        'заполнил адрес',
+        'капчу прошел',
+        'ввел код из смс',
+        'все ввел, жми дальше',
+        'теперь можно',
+        'продолжаем',
+        'done',
+        "i'm done",
+        'all done',
+        'finished',
+        'ready',
+        'ok',
+        'okay',
+        'ok, go on',
+        'yes',
+        'yes, continue',
+        'continue',
+        'go ahead',
+        'proceed',
+        'you can continue',
+        'logged in',
+        'i logged in, continue',
+        'paid',
+        'payment done',
+        'entered the card details',
+        'captcha solved',
+        'filled in the address',
+        'next',
+        'go',
+    ],
+    False: [
+        'нет',
+        'еще нет',
+        'ещё не готово',
+        'не готово',
+        'подожди',
+        'подожди минутку',
+        'секунду',
+        'погоди',
+        'не сделал еще',
+        'я еще не закончил',
+        'не получается войти',
+        'не могу найти кнопку',
+        'код не пришел',
+        'не приходит смс',
+        'какой пароль вводить?',
+        'что мне нужно сделать?',
+        'где это?',
+        'я не понял',
+        'не понимаю что делать',
+        'стоп',
+        'остановись',
+        'не продолжай',
+        'отмена',
+        'отмени заказ',
+        'не надо',
+        'карта не проходит',
+        'ошибка при оплате',
+        'сайт завис',
+        'страница не грузится',
+        'сейчас сделаю',
+        'делаю',
+        'в процессе',
+        'зачем это?',
+        'готово?',
+        'можешь продолжать?',
+        'мне продолжать?',
+        'все сделал?',
+        'а дальше что?',
+        'а можно без регистрации?',
+        'no',
+        'not yet',
+        'not ready',
+        'wait',
+        'wait a second',
+        'hold on',
+        'one moment',
+        'stop',
+        "don't continue",
+        'cancel',
+        "i can't log in",
+        "the code didn't arrive",
+        'what should i do?',
+        "i don't understand",
+        'where is it?',
+        'payment failed',
+        'the page is not loading',
+        'working on it',
+        'in progress',
+        'why do you need this?',
+        'done?',
+        'are you done?',
+        'should i continue?',
+        'can you continue?',
+    ],
+}
+
+# Сообщение пользователя в начале работы: True - задача для браузера, False - не задача
+TASK_EXAMPLES = {
+    True: [
+        'найди рецепт пасты карбонара',
+        'найди билеты в москву на завтра',
+        'закажи пиццу на дом',
+        'купи наушники на озоне',
+        'сравни цены на iphone 15',
+        'открой youtube и включи музыку',
+        'зайди на почту и проверь письма',
+        'пометь спорные письма как спам на mail',
+        'забронируй столик в ресторане на вечер',
+        'оформи заказ в корзине',
+        'найди дешевый отель в сочи',
+        'посмотри прогноз погоды на выходные',
+        'узнай курс доллара',
+        'переведи текст на английский через гугл переводчик',
+        'добавь в корзину молоко и хлеб',
+        'найди вакансии python разработчика',
+        'подбери ноутбук до 80000 рублей',
+        'закажи такси до аэропорта',
+        'проверь статус моего заказа',
+        'запиши меня к врачу',
+        'скачай расписание электричек',
+        'найди отзывы о пылесосе dyson',
+        'оплати интернет',
+        'найди ближайшую аптеку',
+        'посмотри сколько стоит доставка',
+        'мне нужно купить подарок маме',
+        'хочу заказать суши',
+        'помоги найти квартиру в аренду',
+        'нужно записаться на стрижку',
+        'поищи курсы английского онлайн',
+        'find a recipe for lasagna',
+        'book a table for two tonight',
+        'order a pizza',
+        'buy headphones on amazon',
+        'compare prices for iphone 15',
+        'open youtube and play some music',
+        'check my email',
+        'find cheap flights to london',
+        'search for python developer jobs',
+        'add milk to the cart',
+        'check the weather for the weekend',
+        'find a hotel in paris',
+        'track my order',
+        'i need to buy a gift',
+        'i want to order sushi',
+        'look up the exchange rate',
+        'subscribe to the newsletter on the site',
+        'download the train schedule',
+        'pay my phone bill',
+        'find reviews of the dyson vacuum',
+    ],
+    False: [
+        'привет',
+        'здравствуй',
+        'добрый день',
+        'как дела?',
+        'кто ты?',
+        'что ты умеешь?',
+        'спасибо',
+        'спасибо большое',
+        'пока',
+        'до свидания',
+        'ты кто такой',
+        'расскажи анекдот',
+        'как тебя зовут?',
+        'помой посуду',
+        'вынеси мусор',
+        'погуляй с собакой',
+        'приготовь ужин',
+        'сходи в магазин',
+        'почини кран',
+        'убери в квартире',
+        'открой дверь на кухне',
+        'открой окно',
+        'закрой дверь',
+        'включи свет',
+        'купи хлеба по дороге домой',
+        'найди мои ключи',
+        'хм',
+        'ну',
+        'ладно',
+        'что?',
+        'ничего',
+        'просто так',
+        'я устал',
+        'мне скучно',
+        'какой сегодня день',
+        'ты умный?',
+        'hello',
+        'hi',
+        'hey there',
+        'good morning',
+        'how are you?',
+        'who are you?',
+        'what can you do?',
+        'thanks',
+        'thank you',
+        'bye',
+        'tell me a joke',
+        "what's your name?",
+        'wash the dishes',
+        'take out the trash',
+        'walk the dog',
+        'cook dinner',
+        'fix the tap',
+        'clean my room',
+        'open the door please',
+        'open the window',
+        'turn on the lights',
+        'find my keys',
+        'hmm',
+        "i'm bored",
+    ],
+}
@@ -1,10 +1,81 @@
-import inspect
+import asyncio
 from os import name
 
 from ai_browser_agent.domain.entities.task import Task
-from ai_browser_agent.domain.entities.action import Action
 from ai_browser_agent.agent import AIAgent
+from ai_browser_agent.domain.services.action_executor import ActionExecutor, ActionStreamError
+from ai_browser_agent.domain.services.intent_classifier import get_confirmation_classifier, get_task_classifier
 from ai_browser_agent.presentation.cli import CLI
+from ai_browser_agent.shared.constants import (
+    LLM_CALL_CONFIRMATION,
+    LLM_CALL_EXTRACT_TASK,
+    STEP_RETRY_BASE_DELAY,
+    STEP_RETRY_MAX_DELAY,
+)
+from ai_browser_agent.shared.prompt import Prompt
+from ai_browser_agent.shared.utils import backoff_delay
+
+# Неизменные инструкции промптов идут первыми, сообщение пользователя - в конце
+EXTRACT_TASK_INSTRUCTIONS = """
+    Ты - анализатор задач. Определи, является ли сообщение пользователя задачей для ИИ-ассистента.
+
+    КРИТЕРИИ ЗАДАЧИ ДЛЯ ИИ:
+    - Конкретное цифровое действие (найти, проанализировать, сравнить, заказать, оформить)
+    - Может быть выполнено через браузер, приложения или с передачей контроля пользователю
+    - Имеет четкую цель
+    - старайся сразу перейти на сайт, используй поиск только если не понимаешь какой конкретно сайт нужен
+    - поисковые инпуты не всегда именно input теги, могли стилизовать div, p или textarea
+
+    ФОРМАТ ОТВЕТА ТОЧНО В ОДНОЙ СТРОКЕ:
+    [ЗАДАЧА|НЕТ]| | описание
+
+    Примеры:
+    ЗАДАЧА| Найти рецепт пасты карбонара
+    ЗАДАЧА| Пометь спорные письма как спам на mail
+    НЕТ| Это физическое действие, требующее человека
+    НЕТ| Это приветствие, а не задача
+    ЗАДАЧА| Сравнить цены на iPhone в разных магазинах
+    """
+
+CONFIRMATION_INSTRUCTIONS = """
+    Если в сообщении пользователь подтвердил что выполнил то о чем его попросили,
+    или написал что ты можешь продолжать, то отправь True, если нет отправь False
+    """
+
+
+def parse_task_reply(response: str):
+    """
+    Разбирает ответ на EXTRACT_TASK_INSTRUCTIONS.
+
+    Returns:
+        str: Переформулированная задача
+        None: Сообщение не является задачей
+
+    Raises:
+        ValueError: Ответ не в формате "ЗАДАЧА|описание" или "НЕТ|пояснение"
+    """
+    status, separator, task_text = response.strip().partition('|')
+    status = status.strip().strip('[]*').upper()
+    task_text = task_text.strip().strip('|').strip()
+    if not separator or status not in ('ЗАДАЧА', 'НЕТ'):
+        raise ValueError(f'ответ не в формате ЗАДАЧА|НЕТ: {response[:100]!r}')
+    if status == 'ЗАДАЧА':
+        if not task_text:
+            raise ValueError('задача без описания')
+        return task_text
+    return None
+
+
+def parse_confirmation(response: str) -> bool:
+    """
+    Raises:
+        ValueError: Ответ не True и не False
+    """
+    answer = response.strip().strip('.!"\'`*').lower()
+    if answer in ('true', 'false'):
+        return answer == 'true'
+    raise ValueError(f'ответ не True/False: {response[:100]!r}')
+
 
 
 class TaskService:
@@ -12,9 +83,16 @@ class TaskService:
     Class for task lifecycle management
     """
 
-    def __init__(self, agent: AIAgent, cli: CLI):
+    def __init__(self, agent: AIAgent, cli: CLI, local_intents: bool = True):
+        """
+        Args:
+            local_intents: Распознавать однозначные подтверждения и задачи локально, без запроса к LLM
+        """
         self.agent = agent
         self.cli = cli
+        self.executor = ActionExecutor(agent.browser)
+        self.task_intent = get_task_classifier() if local_intents else None
+        self.confirmation_intent = get_confirmation_classifier() if local_intents else None
 
     async def run(self):
         try:
@@ -65,41 +143,20 @@ class TaskService:
             str: Переформулированная задача если найдена
             None: Если задача не найдена или произошла ошибка
         """
-        prompted_message = f"""
-                    Ты - анализатор задач. Определи, является ли сообщение пользователя задачей для ИИ-ассистента.
-
-                    КРИТЕРИИ ЗАДАЧИ ДЛЯ ИИ:
-                    - Конкретное цифровое действие (найти, проанализировать, сравнить, заказать, оформить)
-                    - Может быть выполнено через браузер, приложения или с передачей контроля пользователю
-                    - Имеет четкую цель
-                    - старайся сразу перейти на сайт, используй поиск только если не понимаешь какой конкретно сайт нужен
-                    - поисковые инпуты не всегда именно input теги, могли стилизовать div, p или textarea
-
-                    ФОРМАТ ОТВЕТА ТОЧНО В ОДНОЙ СТРОКЕ:
-                    [ЗАДАЧА|НЕТ]| | описание
-
-                    Примеры:
-                    ЗАДАЧА| Найти рецепт пасты карбонара
-                    ЗАДАЧА| Пометь спорные письма как спам на mail
-                    НЕТ| Это физическое действие, требующее человека
-                    НЕТ| Это приветствие, а не задача
-                    ЗАДАЧА| Сравнить цены на iPhone в разных магазинах
+        if self.task_intent is not None:
+            prediction = self.task_intent.predict(message)
+            if prediction.confident:
+                if prediction.label:
+                    return message.strip()
+                raise Exception('Запрос не является задачей')
 
-                    Сообщение: "{message}"
-            """
+        prompted_message = Prompt.from_template(EXTRACT_TASK_INSTRUCTIONS, f'Сообщение: "{message}"')
 
         try:
-            response = await self.agent.llm.send(prompted_message)
-            response = response.strip()
-
-            # Разбираем ответ по формату
-            if "|" in response:
-                parts = response.split("|", 1)
-                if len(parts) == 2:
-                    status, task_text = parts[0].strip(), parts[1].strip()
-
-                    if status == "ЗАДАЧА" and task_text:
-                        return task_text
+            # классификация идет маленькой модели, ответ не по формату - большой
+            task_text = await self.agent.ask(prompted_message, LLM_CALL_EXTRACT_TASK, parse_task_reply)
+            if task_text:
+                return task_text
 
             raise Exception('Запрос не является задачей')
         except Exception as e:
@@ -123,67 +180,109 @@ class TaskService:
 
     async def solve_step(self, step, context):
         attempt = 0
+        failures = 0
+        failed = False
         while attempt < 4:
             try:
                 attempt += 1
+                if failed:
+                    # повтор сразу после сбоя обычно упирается в ту же причину: лимит провайдера или загрузку страницы.
+                    # Обычный следующий раунд шага (проверка результата, finish_step) идет без задержки
+                    failures += 1
+                    failed = False
+                    await asyncio.sleep(backoff_delay(failures, STEP_RETRY_BASE_DELAY, STEP_RETRY_MAX_DELAY))
                 self.cli.show_message(f'Выполняю - {step}')
-                response = await self.agent.get_step_actions_info(context)
 
-                # тут надо переделать списки actions в объекты Actions
+                # действия выполняются по мере генерации ответа, не дожидаясь его конца
+                response = {}
+                try:
+                    results = await self.execute_actions(self.agent.stream_step_actions(context, response))
+                except ActionStreamError as e:
+                    # уже выполненные действия попадают в контекст, иначе следующая попытка повторит клик или ввод
+                    if e.results:
+                        context['last_actions'] = [result.to_dict() for result in e.results]
+                    raise
+                if results:
+                    context['last_actions'] = [result.to_dict() for result in results]
+
+                if 'actions' not in response:
+                    if not results:
+                        raise Exception('Модель не вернула ни действий, ни решения по шагу')
+                    # поток прерван после упавшего действия, план исправим на следующей попытке
+                    failed = True
+                    continue
 
                 if 'thought' in response:
                     self.cli.show_message(f'Мысли - {response['thought']}')
 
                 if response['actions'] == 'success':
-                    break
+                    return
                 if response['actions'] == 'wait_for_the_human':
                     await self.wait_human(favour=response['thought'])
-                    break
-                if type(response['actions']) == list:
-                    actions = [Action(action['name'],action['parameters']) for action in
-                               response['actions']]
-                    await self.execute_actions(actions=actions)
+                    return
 
             except Exception as e:
-                print(f"Ошибка при выполнении шага {step} сообщения: {e}")
+                if isinstance(e, ActionStreamError):
+                    e = e.__cause__
+                print(f"Ошибка при выполнении шага {step} сообщения: {type(e).__name__}: {e}")
+                failed = True
                 continue
         raise Exception("Не получилось выполнить задание за отведенные попытки")
 
-    async def execute_actions(self, actions: list):
-        for action in actions:
-            self.cli.show_message(f'выполняю {action.name}')
+    async def execute_actions(self, actions) -> list:
+        """
+        Выполняет действия одним конвейером и возвращает наблюдения по каждому.
 
-            method = getattr(self.agent.browser, action.name, None)
-            try:
-                with CLI.thought_screensaver(text=f'Execute {action.name}'):
-                    if inspect.iscoroutinefunction(method):
-                        returned = await method(**action.parameters)
-                    else:
-                        returned = method(**action.parameters)
+        Args:
+            actions: Список Action или асинхронный поток Action от LLM
 
-            except AttributeError:
-                error_msg = f"Method  not found in Browser"
-                print(error_msg)
+        Returns:
+            list: ActionResult по выполненным действиям
 
-            except TypeError as e:
-                error_msg = f"Invalid parameters for {action.name}: {e}"
-                print(error_msg)
+        Raises:
+            ActionStreamError: Поток оборвался, наблюдения по выполненным действиям в results ошибки
+        """
+        # без спиннера: thought_screensaver глушит исключения, а обрыв потока должен дойти до solve_step
+        try:
+            if isinstance(actions, list):
+                results = await self.executor.execute(actions)
+            else:
+                results = await self.executor.execute_stream(actions)
+        except ActionStreamError as e:
+            self._show_results(e.results)
+            raise
+        self._show_results(results)
+        return results
 
-            except Exception as e:
-                error_msg = f"Unexpected error in {action.name}: {e}"
-                print(error_msg)
+    def _show_results(self, results):
+        for result in results:
+            if result.ok:
+                self.cli.show_message(f'выполнено {result.action.name} за {result.duration_ms:.0f} мс')
+            else:
+                print(f"Ошибка в {result.action.name}: {type(result.error).__name__}: {result.error}")
 
     async def wait_human(self, favour):
         self.cli.show_message(favour)
+        self.agent.browser.set_human_control(True)
+        try:
+            await self._wait_human_confirmation()
+        finally:
+            self.agent.browser.set_human_control(False)
+
+    async def _wait_human_confirmation(self):
         favour_is_responding = False
 
         while not favour_is_responding:
             message = await self.cli.get_user_input()
-            prompt = f"""Если в сообщении пользователь подтвердил что выполнил то о чем его попросили,
-             или написал что ты можешь продолжать, то отправь True, если нет отправь False
-             сообщение пользователя:{message}
-            """
-
-            response = await self.agent.llm.send(prompt)
-            if response == "True":
-                favour_is_responding = True
+            if self.confirmation_intent is not None:
+                prediction = self.confirmation_intent.predict(message)
+                if prediction.confident:
+                    favour_is_responding = prediction.label
+                    continue
+
+            prompt = Prompt.from_template(CONFIRMATION_INSTRUCTIONS, f"сообщение пользователя:{message}")
+
+            try:
+                favour_is_responding = await self.agent.ask(prompt, LLM_CALL_CONFIRMATION, parse_confirmation)
+            except ValueError as e:
+                print(f"Не удалось понять ответ пользователя: {e}")
@@ -0,0 +1,161 @@
+import inspect
+import json
+import re
+from functools import lru_cache
+
+from ai_browser_agent.domain.services.action_executor import get_action_registry
+
+# Аннотация или тип из docstring -> тип JSON Schema
+JSON_TYPES = {
+    'str': 'string',
+    'int': 'integer',
+    'float': 'number',
+    'bool': 'boolean',
+    'list': 'array',
+    'dict': 'object',
+}
+# "selector (str): CSS-селектор элемента" в секции Args
+ARG_PATTERN = re.compile(r'^(\w+)\s*(?:\(([^)]*)\))?\s*:\s*(.*)$')
+DOCSTRING_SECTIONS = ('Args:', 'Returns:', 'Raises:', 'Note:', 'Yields:')
+
+# Управляющие инструменты шага: не методы браузера, а решение модели о шаге
+FINISH_STEP = 'finish_step'
+WAIT_FOR_THE_HUMAN = 'wait_for_the_human'
+CONTROL_TOOLS = [
+    {
+        'name': FINISH_STEP,
+        'description': 'Текущий шаг плана выполнен, переходить к следующему',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'summary': {'type': 'string', 'description': 'Что сделано на шаге'},
+            },
+        },
+    },
+    {
+        'name': WAIT_FOR_THE_HUMAN,
+        'description': 'Передать управление человеку: авторизация, оплата, личные данные',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'request': {'type': 'string', 'description': 'Что нужно сделать человеку'},
+            },
+            'required': ['request'],
+        },
+    },
+]
+
+
+def _parse_docstring(doc: str):
+    """
+    Returns:
+        tuple: Краткое описание метода и словарь параметр -> (тип, описание) из секции Args
+    """
+    lines = inspect.cleandoc(doc or '').splitlines()
+    summary = []
+    for line in lines:
+        if not line.strip() or line.strip() in DOCSTRING_SECTIONS:
+            break
+        summary.append(line.strip())
+
+    arguments = {}
+    current = None
+    in_args = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped in DOCSTRING_SECTIONS:
+            in_args = stripped == 'Args:'
+            current = None
+            continue
+        if not in_args or not stripped:
+            continue
+        match = ARG_PATTERN.match(stripped)
+        # продолжение описания идет с большим отступом, чем имя параметра
+        if match and len(line) - len(line.lstrip()) <= 4:
+            current = match.group(1)
+            arguments[current] = [match.group(2), match.group(3)]
+        elif current:
+            arguments[current][1] += ' ' + stripped
+    return ' '.join(summary), arguments
+
+
+def _json_type(annotation, doc_type: str):
+    if annotation is not inspect.Parameter.empty:
+        name = getattr(annotation, '__name__', str(annotation))
+    else:
+        name = (doc_type or '').split('|')[0].strip()
+    return JSON_TYPES.get(name, 'string')
+
+
+def _method_tool(name: str, func, signature: inspect.Signature) -> dict:
+    summary, documented = _parse_docstring(func.__doc__)
+    properties = {}
+    required = []
+    for param_name, param in signature.parameters.items():
+        if param_name in ('self', 'cls'):
+            continue
+        doc_type, description = documented.get(param_name, (None, ''))
+        schema = {'type': _json_type(param.annotation, doc_type)}
+        if schema['type'] == 'array':
+            schema['items'] = {'type': 'string'}
+        if description:
+            schema['description'] = description
+        if param.default is inspect.Parameter.empty:
+            required.append(param_name)
+        elif isinstance(param.default, (str, int, float, bool)):
+            schema['default'] = param.default
+        properties[param_name] = schema
+
+    parameters = {'type': 'object', 'properties': properties}
+    if required:
+        parameters['required'] = required
+    return {'name': name, 'description': summary or name, 'parameters': parameters}
+
+
+class ToolSet:
+    """
+    Описание действий браузера как инструментов LLM, вычисляется один раз на класс адаптера.
+
+    tools - нейтральное описание (имя, описание, JSON Schema параметров),
+    native отдает его в формате конкретного провайдера и тоже кэширует.
+    """
+
+    def __init__(self, tools: list, description: str):
+        self.tools = tools
+        self.names = {tool['name'] for tool in tools}
+        # компактное описание действий для промпта, если провайдер без вызова инструментов
+        self.description = description
+        self._native = {}
+
+    def native(self, provider: str, convert):
+        """
+        Args:
+            provider: Ключ формата, например 'openai' или 'anthropic'
+            convert: Функция, переводящая tools в формат провайдера
+
+        Returns:
+            Инструменты в формате провайдера, вычисленные при первом обращении
+        """
+        if provider not in self._native:
+            self._native[provider] = convert(self.tools)
+        return self._native[provider]
+
+
+@lru_cache(maxsize=None)
+def get_tool_set(browser_class: type) -> ToolSet:
+    """Инструменты для всех действий из get_action_registry плюс управляющие инструменты шага"""
+    actions = []
+    described = []
+    for name, signature in get_action_registry(browser_class).items():
+        tool = _method_tool(name, getattr(browser_class, name), signature)
+        actions.append(tool)
+        described.append({
+            'name': name,
+            'description': tool['description'],
+            'parameters': {
+                param: schema['type'] for param, schema in tool['parameters']['properties'].items()
+            },
+            'required': tool['parameters'].get('required', []),
+        })
+    description = json.dumps(described, ensure_ascii=False, separators=(',', ':'))
+    return ToolSet(actions + CONTROL_TOOLS, description)
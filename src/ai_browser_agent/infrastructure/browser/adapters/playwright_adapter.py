@@ -1,48 +1,199 @@
 from ai_browser_agent.app.ports.browser import BrowserPort
 from ai_browser_agent.app.ports.llm import LLMPort
-from playwright.async_api import Page, async_playwright
+from ai_browser_agent.domain.services.element_ranker import ElementRanker
+import asyncio
+import inspect
+import re
+
+from ai_browser_agent.infrastructure.browser.context_pool import BrowserContextPool
+from ai_browser_agent.infrastructure.browser.dom_scripts import (
+    DOM_CHANGES_JS,
+    DOM_STATE_JS,
+    INDEX_JS,
+    PROBE_JS,
+    SNAPSHOT_JS,
+    build_tracker_script,
+)
+from ai_browser_agent.infrastructure.browser.dom_serializer import DOMSerializer
+from ai_browser_agent.infrastructure.browser.har_cache import HarCache
+from ai_browser_agent.infrastructure.browser.launch_profile import HEADED, LaunchProfile
+from ai_browser_agent.infrastructure.browser.readiness import PageReadiness
+from ai_browser_agent.infrastructure.browser.request_filter import RequestFilter
+from ai_browser_agent.infrastructure.browser.selector_cache import SelectorCache
+from ai_browser_agent.shared.constants import (
+    ACTION_ROLES,
+    ACTION_TIMEOUT,
+    DOM_CHANGES_ATTRIBUTES,
+    DOM_CHANGES_LOG_LIMIT,
+    DOM_CHANGES_RESULT_LIMIT,
+    DOM_SNAPSHOTS_LIMIT,
+    DOM_SNAPSHOT_MAX_DEPTH,
+    DOM_SNAPSHOT_MAX_NODES,
+    DOM_SNAPSHOT_SKIP_TAGS,
+    DOM_SNAPSHOT_TEXT_LIMIT,
+    ELEMENT_INDEX_INTERACTIVE_SELECTORS,
+    ELEMENT_INDEX_MAX_ELEMENTS,
+    ELEMENT_INDEX_TEXT_LIMIT,
+    LLM_CALL_SELECTOR,
+    PROBE_TEXT_LIMIT,
+    READY_AFTER_ACTION_TIMEOUT,
+    READY_TIMEOUT,
+    SELECTOR_BEAM_MAX_WAVES,
+    SELECTOR_BEAM_WIDTH,
+    SELECTOR_FALLBACK_MIN_SCORE,
+)
+from ai_browser_agent.shared.error_handling import ElementNotFoundError
+from ai_browser_agent.shared.prompt import Prompt
+from playwright.async_api import Locator, Page
+
+# Неизменные инструкции промптов поиска элемента; описание элемента и DOM дописываются после них
+ELEMENT_INDEX_INSTRUCTIONS = """
+    Выбери элемент веб-страницы, который соответствует описанию
+
+    Конечный элемент должен соответствовать описанию, например если это кнопка то по ней можно будет кликнуть
+
+    Отвечай только предложенными шаблонами, без дополнительных описаний
+    ВОЗМОЖНЫЕ ОТВЕТЫ:
+    "ЭЛЕМЕНТ: [номер элемента]"
+    "ЭЛЕМЕНТ: НЕТ"
+    """
+DOM_TREE_INSTRUCTIONS = """
+    Анализ DOM структуры для поиска элемента
+
+    ПРОЦЕСС:
+    1. Сканируй структуру сверху вниз
+    2. Отмечай потенциальные совпадения
+    3. Если нужный элемент виден в структуре - верни его селектор
+    4. Если нет, перечисли до {beam_width} поддеревьев, где он вероятнее всего находится, от самого вероятного
+    5. Конечный селектор должен соответствовать описанию, например если это кнопка то по ней можно будет кликнуть
+
+    Каждая строка структуры - элемент: тег#id.классы, атрибуты, 'текст' и после @ путь к элементу.
+    Путь - это готовый уникальный селектор, используй его в ответе вместо того чтобы составлять селектор самостоятельно
+
+    КРИТЕРИИ ВЫБОРА:
+    - Семантические теги (button, input, a)
+    - Значимые классы/ID (submit, btn, button)
+    - Текстовое содержание
+    - Структурное положение
+
+    Отвечай только предложенными шаблонами, без дополнительных описаний
+    ВОЗМОЖНЫЕ ОТВЕТЫ:
+    "СЕЛЕКТОР: [селектор который точно соответствует описанию] | THAT'S IS"
+    "КАНДИДАТЫ: [селектор]; [селектор]; [селектор]"
+    "CAN'T FIND"
+    """
+# Номер элемента из индекса: 12 или [12]
+ELEMENT_ID_PATTERN = re.compile(r'^\[?(\d+)]?$')
+# Текст из селектора для запасных локаторов: :has-text("..."), text=..., [placeholder="..."], [aria-label*="..."]
+SELECTOR_HINT_PATTERN = re.compile(
+    r'(?:has-text\(|text=|(?:placeholder|aria-label|title|alt|value)[*^$~|]?=)\s*["\']?([^"\'\])\]]+)'
+)
 
 
 class PlaywrightBrowserAdapter(BrowserPort):
-    def __init__(self, llm_adapter: LLMPort):
-        self.browser_app = None
-        self.playwright = None
+    def __init__(
+            self,
+            llm_adapter: LLMPort,
+            selector_search: str = 'index',
+            selector_cache: SelectorCache = None,
+            pool: BrowserContextPool = None,
+            request_filter: RequestFilter = None,
+            launch_profile: LaunchProfile = HEADED,
+            har_cache: HarCache = None,
+            beam_width: int = SELECTOR_BEAM_WIDTH,
+    ):
+        """
+        Args:
+            llm_adapter: Адаптер LLM для поиска элементов
+            selector_search: Режим поиска селектора по описанию.
+                'index' - один запрос к LLM по пронумерованному списку интерактивных элементов,
+                'tree' - лучевой поиск по поддеревьям DOM
+            selector_cache: Постоянный кэш найденных селекторов. Если не передан, кэш не используется
+            pool: Общий пул контекстов браузера. Несколько адаптеров с одним пулом работают
+                параллельно в одном процессе браузера. Если не передан, адаптер запускает свой браузер
+            request_filter: Блокировка картинок, шрифтов, медиа и трекеров в контексте адаптера
+            launch_profile: Параметры запуска собственного браузера (headless, канал, аргументы, CDP).
+                Для общего пула профиль задается при создании пула
+            har_cache: Запись ответов сети в HAR или воспроизведение из него для офлайн-прогонов
+            beam_width: Сколько поддеревьев DOM исследуется параллельно в режиме 'tree'
+        """
+        self.pool = pool or BrowserContextPool(max_size=1, profile=launch_profile)
+        self._owns_pool = pool is None
+        self.lease = None
+        self.request_filter = request_filter
+        self.har_cache = har_cache
         self.page = None
+        self.readiness = None
         self.model = llm_adapter
         self.page_context = []
+        self.selector_search = selector_search
+        self.beam_width = beam_width
+        self.selector_cache = selector_cache
+        self.dom_serializer = DOMSerializer()
+        self.element_ranker = ElementRanker()
+        # номер элемента из последнего индекса -> селектор
+        self.element_index = {}
+        # точка отсчета get_dom_changes без since и именованные снимки: документ и номер изменения
+        self.dom_snapshot = None
+        self.dom_snapshots = {}
+        self._snapshot_counter = 0
+        self._tracker_script = build_tracker_script(
+            ELEMENT_INDEX_INTERACTIVE_SELECTORS,
+            DOM_CHANGES_LOG_LIMIT,
+            DOM_CHANGES_ATTRIBUTES,
+        )
 
     async def launch(self):
-        try:
-            self.playwright = await async_playwright().start()
-            self.browser_app = await self.playwright.chromium.launch(
-                headless=False,
-                channel="chrome",
-            )
-            self.page = await self.new_page()
-        except Exception as e:
-            print(f"Не удалось запустить системный Chrome: {e}. Пробуем Chromium...")
-            try:
-                # ✅ Добавляем запуск Chromium
-                self.browser_app = await self.playwright.chromium.launch(
-                    headless=False  # без channel
-                )
-                self.page = await self.new_page()
-            except Exception as e2:
-                print(f"Не удалось запустить Chromium: {e2}")
-                raise
+        """Арендует контекст браузера со страницей. Метод не для использования ИИ."""
+        if self._owns_pool:
+            await self.pool.start()
+        # пул настраивает контекст до создания страницы, так что первый же документ идет через маршруты и трекер.
+        # Обработчики маршрутов вызываются в обратном порядке: сначала фильтр, потом HAR
+        setup = []
+        if self.har_cache:
+            setup.append(self.har_cache.install)
+        if self.request_filter:
+            setup.append(self.request_filter.install)
+        setup.append(self._install_dom_tracker)
+        self.lease = await self.pool.acquire(setup)
+        self.page = self.lease.page
+        self.readiness = PageReadiness(self.page)
         return self.page
 
+    async def _install_dom_tracker(self, context):
+        """Трекер изменений DOM ставится в каждый новый документ страниц контекста"""
+        await context.add_init_script(self._tracker_script)
+
+    def set_human_control(self, active: bool):
+        """Браузер передан человеку или возвращен агенту. Метод не для использования ИИ.
+
+        Пока управляет человек, фильтр запросов выключен: капча, проверочные
+        картинки и медиа при входе и оплате должны загружаться.
+        """
+        if self.request_filter:
+            if active:
+                self.request_filter.pause()
+            else:
+                self.request_filter.resume()
+
     def test(self):
         if self.page:
             return True
         return False
 
-    async def _stop(self):
-        self.browser_app.close()
-        await self.playwright.stop()
+    async def stop(self):
+        """Возвращает контекст в пул и останавливает собственный браузер. Метод не для использования ИИ."""
+        if self.har_cache:
+            self.har_cache.save()
+        if self.lease:
+            await self.pool.release(self.lease)
+            self.lease = None
+            self.page = None
+        if self._owns_pool:
+            await self.pool.stop()
 
     async def new_page(self):
-        return await self.browser_app.new_page()
+        return await self.lease.context.new_page()
 
     def get_page_url(self):
         """Получает Url текущей страницы
@@ -65,9 +216,9 @@ class PlaywrightBrowserAdapter(BrowserPort):
         Returns:
             None
         """
-        await self.page.goto(url, wait_until='load')
+        await self.page.goto(url, wait_until='domcontentloaded')
         print('ожидаем загрузки страницы')
-        await self.wait(10000)
+        await self.wait_for_ready()
 
     async def click(self, selector: str) -> None:
         """Кликает на элемент по CSS-селектору
@@ -75,11 +226,14 @@ class PlaywrightBrowserAdapter(BrowserPort):
         Args:
             page (Page): Объект страницы Playwright
             selector (str): CSS-селектор элемента для клика (например, ".button", "#submit")
+                            или номер элемента из индекса интерактивных элементов
 
         Returns:
             None
         """
-        await self.page.click(selector)
+        locator = await self._locate(selector, 'click')
+        await locator.click(timeout=ACTION_TIMEOUT)
+        await self.wait_for_ready(timeout=READY_AFTER_ACTION_TIMEOUT)
 
     async def type_into(self, selector: str, text: str) -> None:
         """Вводит текст в поле ввода по CSS-селектору
@@ -87,12 +241,14 @@ class PlaywrightBrowserAdapter(BrowserPort):
         Args:
             page (Page): Объект страницы Playwright
             selector (str): CSS-селектор поля ввода (например, "input[name='search']")
+                            или номер элемента из индекса интерактивных элементов
             text (str): Текст для ввода
 
         Returns:
             None
         """
-        await self.page.fill(selector, text)
+        locator = await self._locate(selector, 'type_into')
+        await locator.fill(text, timeout=ACTION_TIMEOUT)
 
     async def wait(self, time):
         """Ожидает указанное количество миллисекунд
@@ -105,208 +261,437 @@ class PlaywrightBrowserAdapter(BrowserPort):
             None
 
         Note:
-            Используйте для искусственных задержек. Для ожидания элементов используйте wait_for_element
+            Используйте для искусственных задержек. Для ожидания загрузки и элементов используйте wait_for_ready
         """
         await self.page.wait_for_timeout(time)
 
+    async def wait_for_ready(self, selector: str = None, timeout: float = READY_TIMEOUT) -> bool:
+        """Ожидает готовности страницы: завершения сетевых запросов, изменений DOM и появления элемента
+
+        Args:
+            selector (str): CSS-селектор элемента, появления которого нужно дождаться. Необязательный
+            timeout (float): Максимальное время ожидания в миллисекундах
+
+        Returns:
+            bool: True если страница готова, False если вышло время ожидания
+        """
+        if selector:
+            selector = self._resolve_selector(selector)
+        return await self.readiness.wait_until_ready(selector=selector, timeout=timeout)
+
     async def press(self, selector, key):
         """Нажимает клавишу на элементе или странице
 
         Args:
             page: Объект страницы Playwright
-            selector (str): CSS-селектор элемента. Если None, нажимает на всей странице
+            selector (str): CSS-селектор элемента или номер элемента из индекса. Если None, нажимает на всей странице
             key (str): Название клавиши (например, "Enter", "Escape", "Tab", "ArrowDown")
 
         Returns:
             None
         """
-        await self.page.press(selector, key)
+        if selector is None:
+            await self.page.keyboard.press(key)
+        else:
+            locator = await self._locate(selector, 'press')
+            await locator.press(key, timeout=ACTION_TIMEOUT)
+        await self.wait_for_ready(timeout=READY_AFTER_ACTION_TIMEOUT)
 
-    def _glimpse_scan(self, selectors):
+    async def _locate(self, selector, action: str) -> Locator:
+        """Находит ровно один видимый элемент для действия до его выполнения
+
+        Селектор сначала проверяется коротким пакетным запросом. Если он ничего
+        не находит или находит несколько элементов, пробуются запасные локаторы:
+        по тексту, роли, placeholder и ближайший по смыслу элемент индекса.
+        Так действие не ждет полный таймаут Playwright на неверном селекторе.
+
+        Args:
+            selector: CSS-селектор или номер элемента из индекса
+            action: Имя действия (click, type_into, press) - определяет подходящие роли
+
+        Returns:
+            Locator: Локатор единственного видимого элемента
+
+        Raises:
+            ElementNotFoundError: Ни селектор, ни запасные варианты не дали единственного элемента
         """
-        Быстрое сканирование важных элементов на странице
+        resolved = self._resolve_selector(selector)
+        probe = (await self.probe_selectors([selector]))[selector]
+        locator = self.page.locator(resolved)
+        if probe.get('count') == 1 and probe.get('visible'):
+            return locator
+        if probe.get('visible_count') == 1:
+            return locator.filter(visible=True)
+
+        tried = []
+        for label, candidate in await self._fallback_locators(resolved, action):
+            tried.append(label)
+            try:
+                visible = candidate.filter(visible=True)
+                if await visible.count() == 1:
+                    print(f'селектор {resolved} заменен запасным вариантом {label}')
+                    return visible
+            except Exception:
+                continue
+
+        # несколько подходящих элементов: действие над случайным из них хуже явной ошибки
+        if probe.get('visible_count', 0) > 1:
+            tried.append(f"{probe['visible_count']} видимых совпадений у исходного селектора")
+        raise ElementNotFoundError(resolved, tried)
+
+    async def _fallback_locators(self, selector: str, action: str) -> list:
+        """Запасные локаторы в порядке приоритета: текст, роль, placeholder, ближайший элемент индекса"""
+        hints = [hint.strip() for hint in SELECTOR_HINT_PATTERN.findall(selector) if hint.strip()]
+        roles = ACTION_ROLES.get(action, ())
+        candidates = []
+        for hint in hints:
+            candidates.append((f'text="{hint}"', self.page.get_by_text(hint)))
+            for role in roles:
+                candidates.append((f'role={role} "{hint}"', self.page.get_by_role(role, name=hint)))
+            candidates.append((f'placeholder="{hint}"', self.page.get_by_placeholder(hint)))
+
+        # ближайший по смыслу элемент - только по тексту из селектора и только если он однозначен;
+        # сам селектор не годится как запрос: "button.xyz" похож на любую кнопку
+        if not hints:
+            return candidates
+        query = ' '.join(hints)
+        # индекс строится отдельно, чтобы не перенумеровать элементы, уже показанные LLM
+        elements = await self._build_element_index(remember=False)
+        suitable = [element for element in elements if element['role'] in roles] or elements
+        ranked = self.element_ranker.rank(query, suitable)
+        best = self.element_ranker.pick(query, ranked)
+        if best is not None and ranked[0][0] >= SELECTOR_FALLBACK_MIN_SCORE:
+            candidates.append((f"ближайший {best['selector']}", self.page.locator(best['selector'])))
+        return candidates
+
+    def _resolve_selector(self, selector):
+        """Превращает номер элемента из индекса в селектор, остальное возвращает как есть"""
+        match = ELEMENT_ID_PATTERN.match(str(selector).strip())
+        if match and int(match.group(1)) in self.element_index:
+            return self.element_index[int(match.group(1))]
+        return selector
+
+    async def _build_element_index(self, max_elements: int = ELEMENT_INDEX_MAX_ELEMENTS, remember: bool = True):
+        """Строит плоский пронумерованный индекс видимых интерактивных элементов за один вызов evaluate
+
+        Args:
+            max_elements (int): Максимальное количество элементов в индексе
+            remember (bool): Запомнить номера для _resolve_selector. False - индекс для внутреннего
+                             поиска, номера, которые уже видела LLM, не меняются
+
+        Returns:
+            list: Элементы с полями id, tag, role, name, text, type, disabled, selector
         """
-        glimpse_data = {}
-
-        for selector in selectors:
-            element = self.page.query_selector(selector)
-            if element:
-                # Получаем базовую информацию об элементе
-                glimpse_data[selector] = {
-                    'text': element.text_content()[:100] if element.text_content() else None,
-                    'visible': element.is_visible(),
-                    'attributes': element.evaluate("el => el.attributes.length"),
-                    'type': element.get_attribute('type') if element.get_attribute('type') else 'element'
-                }
-            else:
-                glimpse_data[selector] = None
+        elements = await self.page.evaluate(INDEX_JS, {
+            'selectors': list(ELEMENT_INDEX_INTERACTIVE_SELECTORS),
+            'maxElements': max_elements,
+            'textLimit': ELEMENT_INDEX_TEXT_LIMIT,
+        })
+        if remember:
+            self.element_index = {element['id']: element['selector'] for element in elements}
+        return elements
+
+    @staticmethod
+    def _format_element_index(elements) -> str:
+        """Компактное текстовое представление индекса для промпта"""
+        lines = []
+        for element in elements:
+            line = f"[{element['id']}] {element['role']} <{element['tag']}>"
+            if element['name']:
+                line += f" \"{element['name']}\""
+            if element['text'] and element['text'] != element['name']:
+                line += f" текст: \"{element['text']}\""
+            if element['type']:
+                line += f" type={element['type']}"
+            if element['disabled']:
+                line += ' disabled'
+            lines.append(line)
+        return '\n'.join(lines)
+
+    async def probe_selectors(self, selectors: list) -> dict:
+        """Проверяет сразу несколько селекторов за один запрос к странице
+
+        Args:
+            selectors (list): CSS-селекторы или номера элементов из индекса
+
+        Returns:
+            dict: Селектор -> count (сколько элементов найдено), visible_count, visible,
+                  enabled, box (положение и размер), tag, text, attributes.
+                  Для невалидного селектора - поле error
+        """
+        resolved = {selector: self._resolve_selector(selector) for selector in selectors}
+        results = await self.page.evaluate(PROBE_JS, {
+            'selectors': list(resolved.values()),
+            'textLimit': PROBE_TEXT_LIMIT,
+        })
+        probes = dict(zip(resolved.keys(), results))
+
+        # селекторы Playwright (text=, :has-text(), >>) не понимает querySelectorAll
+        for selector, probe in probes.items():
+            if probe.get('error') != 'unsupported':
+                continue
+            try:
+                locator = self.page.locator(resolved[selector])
+                count = await locator.count()
+                visible = count > 0 and await locator.first.is_visible()
+                probes[selector] = {'selector': resolved[selector], 'count': count, 'visible': visible}
+            except Exception as e:
+                probes[selector] = {'selector': resolved[selector], 'error': str(e)}
+        return probes
 
-        return glimpse_data
+    async def mark_dom_snapshot(self) -> int:
+        """Запоминает текущее состояние DOM как снимок. Метод не для использования ИИ.
 
-    async def _analyze_dom_structure(self, root_selector: str = 'body', current_depth: int = 0):
-        """Рекурсивный анализ DOM-структуры с глубиной до 5 уровней"""
+        Returns:
+            int: Номер снимка, от которого потом можно запросить изменения
+        """
+        state = await self.page.evaluate(DOM_STATE_JS)
+        if state is None:
+            # документ был открыт до установки трекера
+            await self.page.evaluate(self._tracker_script)
+            state = await self.page.evaluate(DOM_STATE_JS)
 
-        if current_depth >= 5:
-            return {"depth_exceeded": True}
+        self._snapshot_counter += 1
+        self.dom_snapshots[self._snapshot_counter] = state
+        if len(self.dom_snapshots) > DOM_SNAPSHOTS_LIMIT:
+            del self.dom_snapshots[min(self.dom_snapshots)]
+        return self._snapshot_counter
 
-        try:
-            structure = await self.page.locator(root_selector).first.evaluate('''(element, current_depth) => {
-                const result = {
-                    selector: element.tagName.toLowerCase(),
-                    attributes: {},
-                    text: element.textContent ? element.textContent.trim().slice(0, 100) : null,
-                    visible: element.offsetWidth > 0 && element.offsetHeight > 0,
-                    focus: document.activeElement === element,
-                    children: {},
-                    children_count: {}
-                };
-
-                // Собираем основные атрибуты
-                for (let attr of element.attributes) {
-                    result.attributes[attr.name] = attr.value;
-                }
-
-                // Анализируем непосредственных детей
-                const children = element.children;
-                const childrenByTag = {};
-
-                for (let child of children) {
-                    const tagName = child.tagName.toLowerCase();
-                     // Пропускаем нежелательные теги
-                    if (tagName === 'script' || tagName === 'iframe' || tagName === 'next-route-announcer') {
-                        continue;
-                    }
-
-                    if (!childrenByTag[tagName]) {
-                        childrenByTag[tagName] = [];
-                    }
-                    childrenByTag[tagName].push(child);
-                }
-
-                // Сохраняем количество детей по тегам
-                for (let tagName in childrenByTag) {
-                    result.children_count[tagName] = childrenByTag[tagName].length;
-                }
-
-                // Для каждого типа тега сохраняем всех детей
-                for (let tagName in childrenByTag) {
-                    if (childrenByTag[tagName].length > 0) {
-                        // Создаем массив для всех элементов этого тега
-                        result.children[tagName] = [];
-
-                        for (let child of childrenByTag[tagName]) {
-                            const childData = {
-                                selector: tagName,
-                                attributes: {},
-                                focus: document.activeElement === child,
-                                text: child.textContent ? child.textContent.trim().slice(0, 50) : null,
-                                visible: child.offsetWidth > 0 && child.offsetHeight > 0,
-                                children_count: child.children.length
-                            };
-
-                            // Собираем атрибуты для каждого ребенка
-                            for (let attr of child.attributes) {
-                                childData.attributes[attr.name] = attr.value;
-                            }
-
-                            result.children[tagName].push(childData);
-                        }
-                    }
-                }
-
-                return result;
-            }''', current_depth)
-
-            # Рекурсивно анализируем детей следующего уровня
-            for child_tag in list(structure['children'].keys()):
-                child_selector = f"{root_selector} > {child_tag}"
-                for index in range(0, len(structure['children'][child_tag])):
-                    if structure['children'][child_tag][index]['children_count'] > 0:
-                        try:
-                            child_structure = await self._analyze_dom_structure(child_selector, current_depth + 1)
-                            structure['children'][child_tag][index]['children'] = child_structure['children']
-                        except Exception as e:
-                            structure['children'][child_tag][index]['children'] = {'error': str(e)}
-
-            return structure
+    async def get_dom_changes(self, since: int = None) -> dict:
+        """Возвращает изменения интерактивных элементов с момента снимка. Метод не для использования ИИ.
+
+        Без since изменения считаются от предыдущего вызова без since, и текущее
+        состояние становится новой точкой отсчета, поэтому последовательные вызовы
+        возвращают только новые изменения. С since точка отсчета не сдвигается.
+
+        Args:
+            since (int): Номер снимка из mark_dom_snapshot
 
+        Returns:
+            dict: Поля added, removed, changed со списками элементов (path, tag, role, text).
+                  navigated=True - страница сменилась и изменения нужно заменить полным снимком,
+                  overflow=True - изменений слишком много, журнал трекера переполнен
+        """
+        snapshot = self.dom_snapshot if since is None else self.dom_snapshots.get(since)
+        changes = await self.page.evaluate(DOM_CHANGES_JS, {
+            'since': snapshot['seq'] if snapshot else 0,
+            'document': snapshot['document'] if snapshot else None,
+            'limit': DOM_CHANGES_RESULT_LIMIT,
+        })
+        if not changes.get('installed', True):
+            # документ был открыт до установки трекера
+            await self.page.evaluate(self._tracker_script)
+            changes = await self.page.evaluate(DOM_CHANGES_JS, {
+                'since': 0,
+                'document': None,
+                'limit': DOM_CHANGES_RESULT_LIMIT,
+            })
+            changes['navigated'] = True
+
+        if since is None:
+            self.dom_snapshot = {'document': changes['document'], 'seq': changes['seq']}
+        return changes
+
+    async def _analyze_dom_structure(
+            self,
+            root_selector: str = 'body',
+            max_depth: int = DOM_SNAPSHOT_MAX_DEPTH,
+            max_nodes: int = DOM_SNAPSHOT_MAX_NODES,
+    ):
+        """Снимок DOM-структуры поддерева за один вызов evaluate
+
+        Обход выполняется внутри страницы в ширину, поэтому при достижении
+        лимита узлов сохраняются верхние уровни, а не одна глубокая ветка.
+
+        Args:
+            root_selector (str): CSS-селектор корня поддерева
+            max_depth (int): Максимальная глубина обхода
+            max_nodes (int): Максимальное количество узлов в снимке
+
+        Returns:
+            dict: Дерево узлов. У каждого узла есть стабильный css-путь "path",
+                  по которому к нему можно обратиться как к селектору
+        """
+        try:
+            return await self.page.locator(root_selector).first.evaluate(SNAPSHOT_JS, {
+                'maxDepth': max_depth,
+                'maxNodes': max_nodes,
+                'textLimit': DOM_SNAPSHOT_TEXT_LIMIT,
+                'skipTags': list(DOM_SNAPSHOT_SKIP_TAGS),
+            })
         except Exception as e:
-            return {"error": str(e), "selector": root_selector, "depth": current_depth}
+            return {"error": str(e), "selector": root_selector}
 
     async def get_element_selector_by_description(self, description):
+        """Находит CSS-селектор элемента по его описанию на естественном языке
+
+        Args:
+            description (str): Описание элемента (например, "кнопка поиска в шапке сайта")
+
+        Returns:
+            str: CSS-селектор элемента или None, если элемент не найден
+        """
         print('начинаю поиск элемента по описанию')
-        depth = 0
+        url = self.page.url
+        if self.selector_cache:
+            cached = self.selector_cache.get(url, description)
+            if cached:
+                current = await self._element_fingerprint(cached['selector'])
+                if current and self.selector_cache.same_element(cached['fingerprint'], current):
+                    print(f"селектор взят из кэша {cached['selector']}")
+                    return cached['selector']
+                print(f"селектор из кэша устарел или указывает на другой элемент {cached['selector']}")
+                self.selector_cache.invalidate(url, description)
+
         selector = None
-        root_selector = 'body'
-        search_stack = ['body']
-        while not selector and depth < 60:
-            print(search_stack)
-            print(f'ищем в {root_selector}')
-            depth += 1
-
-            void_list = []
-            print('получаю упрощенную структуру DOM')
-            body_structure = await self._analyze_dom_structure(root_selector=root_selector)
-            prompt = f"""
-            Анализ DOM структуры для поиска элемента
-
-            ЦЕЛЕВОЙ ЭЛЕМЕНТ: {description}
-
-            ДОСТУПНАЯ СТРУКТУРА:
-            {body_structure}
-
-            Стек поиска:
-            {search_stack}
-
-            Список уже проверенных селекторов:
-            {void_list}
-
-            ПРОЦЕСС:
-            1. Сканируй структуру сверху вниз
-            2. Отмечай потенциальные совпадения
-            3. Если ты не нашел нужный селектор, но есть предположение где он находится запрашивай уточнение через INTERESTING
-            4. Выбирай лучший вариант или запрашивай уточнения
-            5. Конечный курсор должен соответствовать описанию, например если это кнопка то по ней можно будет кликнуть
-
-            КРИТЕРИИ ВЫБОРА:
-            - Семантические теги (button, input, a)
-            - Значимые классы/ID (submit, btn, button)
-            - Текстовое содержание
-            - Структурное положение
-
-            Отвечай только предложенными шаблонами, без дополнительных описаний
-            ВОЗМОЖНЫЕ ОТВЕТЫ:
-            "СЕЛЕКТОР: [селектор который точно соответствует описанию] | THAT'S IS"
-            "СЕЛЕКТОР: [селектор] | INTERESTING:вопрос"
-            "СЕЛЕКТОР: [селектор к которому хочешь вернуться]| CAN'T FIND: элемент не обнаружен в текущей структуре" 
-
-            Если ты отправил cant find это вернет тебя на уровень выше, и добавит селектор в void list
-
-            """
-            temp = len(prompt)
-            response = await self.model.send(prompt)
-            # send to model and ask for a selector we are looking for
-
-            # or selector for build another structure and resend
-            if "СЕЛЕКТОР:" in response and "|" in response:
-                parts = response.split("|")
-                selector_part = parts[0].replace("СЕЛЕКТОР:", "").strip()
-                info_part = parts[1].strip()
-
-                if "THAT'S IS" in info_part:
-                    print(f'найден нужный селектор {selector_part} ')
-                    selector = selector_part
-                    self.page_context.append(f'descr:{description} - select:{selector}')
-                elif "INTERESTING" in info_part:
-                    print(f'нужны уточнения {selector_part} ')
-                    root_selector = selector_part
-                    search_stack.append(selector_part)
-                    continue
-                elif "CAN'T FIND" in info_part:
-                    print(f'исключаю из поиска {root_selector} ')
-                    void_list.append(root_selector)
-                    search_stack.pop()
-                    root_selector = selector_part
-                    search_stack.append(root_selector)
+        if self.selector_search == 'index':
+            elements = await self._build_element_index()
+            if elements:
+                selector = await self._search_element_index(description, elements)
+            else:
+                print('интерактивные элементы не найдены, ищу по дереву DOM')
+                selector = await self._search_dom_tree(description)
+        else:
+            selector = await self._search_dom_tree(description)
+
+        if selector and self.selector_cache:
+            fingerprint = await self._element_fingerprint(selector)
+            if fingerprint:
+                self.selector_cache.put(url, description, selector, fingerprint)
+        return selector
 
+    async def _element_fingerprint(self, selector):
+        """Отпечаток единственного видимого элемента по селектору для кэша или None"""
+        try:
+            probe = (await self.probe_selectors([selector]))[selector]
+        except Exception:
+            return None
+        if probe.get('count') != 1 or not probe.get('visible', False):
+            return None
+        return self.selector_cache.fingerprint(probe)
+
+    async def _is_selector_alive(self, selector) -> bool:
+        """Проверяет, что селектор на текущей странице указывает ровно на один видимый элемент"""
+        try:
+            probe = (await self.probe_selectors([selector]))[selector]
+        except Exception:
+            return False
+        return probe.get('count') == 1 and probe.get('visible', False)
+
+    async def _search_element_index(self, description, elements):
+        """Выбор элемента из индекса: локальное ранжирование, при неоднозначности - один запрос к LLM"""
+        ranked = self.element_ranker.rank(description, elements)
+        best = self.element_ranker.pick(description, ranked)
+        if best is not None:
+            selector = best['selector']
+            print(f'найден нужный селектор без LLM {selector} ')
+            self.page_context.append(f'descr:{description} - select:{selector}')
+            return selector
+
+        if ranked:
+            # в промпт идет только короткий список, если он пуст - весь индекс в пределах бюджета
+            shortlist = [element for _, element in ranked]
+            selector = await self._ask_element_index(description, shortlist)
+            if selector:
+                return selector
+        return await self._ask_element_index(
+            description, self.dom_serializer.serialize_elements(elements, description)
+        )
+
+    async def _ask_element_index(self, description, elements):
+        """Один запрос к LLM с выбором номера элемента"""
+        prompt = Prompt(
+            inspect.cleandoc(ELEMENT_INDEX_INSTRUCTIONS),
+            f"ЦЕЛЕВОЙ ЭЛЕМЕНТ: {description}\n\n"
+            f"ИНТЕРАКТИВНЫЕ ЭЛЕМЕНТЫ СТРАНИЦЫ (номер, роль, тег, доступное имя, текст):\n"
+            f"{self._format_element_index(elements)}",
+        )
+        response = await self.model.send(prompt, call_type=LLM_CALL_SELECTOR)
+        match = re.search(r'ЭЛЕМЕНТ:\s*\[?(\d+)', response)
+        if not match or int(match.group(1)) not in {element['id'] for element in elements}:
+            print(f'элемент не найден в индексе: {response}')
+            # "ЭЛЕМЕНТ: НЕТ" или ответ не по формату не должны возвращаться из кэша
+            self.model.invalidate(prompt, call_type=LLM_CALL_SELECTOR)
+            return None
+
+        selector = self.element_index[int(match.group(1))]
+        print(f'найден нужный селектор {selector} ')
+        self.page_context.append(f'descr:{description} - select:{selector}')
         return selector
+
+    async def _search_dom_tree(self, description):
+        """Лучевой поиск по поддеревьям DOM
+
+        На каждой волне параллельно снимаются и отправляются LLM до beam_width
+        поддеревьев. Первая ветка с подтвержденным на странице селектором
+        завершает поиск, остальные ветки отменяются. Кандидаты всех веток
+        ранжируются вместе и образуют следующую волну.
+        """
+        frontier = ['body']
+        visited = set()
+        for wave in range(SELECTOR_BEAM_MAX_WAVES):
+            roots = []
+            while frontier and len(roots) < self.beam_width:
+                root = frontier.pop(0)
+                if root not in visited:
+                    roots.append(root)
+            if not roots:
+                break
+            visited.update(roots)
+            print(f'волна {wave + 1}: ищем в {roots}')
+
+            branches = [
+                asyncio.create_task(self._explore_subtree(description, root, sorted(visited)))
+                for root in roots
+            ]
+            ranked_candidates = []
+            try:
+                for branch in asyncio.as_completed(branches):
+                    try:
+                        found, candidates = await branch
+                    except Exception as e:
+                        print(f'ошибка при исследовании поддерева: {e}')
+                        continue
+                    if found and await self._is_selector_alive(found):
+                        print(f'найден нужный селектор {found} ')
+                        self.page_context.append(f'descr:{description} - select:{found}')
+                        return found
+                    ranked_candidates.append(candidates)
+            finally:
+                for branch in branches:
+                    branch.cancel()
+
+            # чередуем кандидатов веток по их рангу: лучшие из каждой ветки идут первыми
+            merged = []
+            for rank in range(max((len(candidates) for candidates in ranked_candidates), default=0)):
+                for candidates in ranked_candidates:
+                    if rank < len(candidates) and candidates[rank] not in visited and candidates[rank] not in merged:
+                        merged.append(candidates[rank])
+            frontier = merged + frontier
+        return None
+
+    async def _explore_subtree(self, description, root_selector, visited):
+        """Один запрос к LLM по снимку поддерева
+
+        Returns:
+            tuple: (селектор, который LLM считает искомым, или None; кандидаты для следующей волны)
+        """
+        structure = await self._analyze_dom_structure(root_selector=root_selector)
+        prompt = Prompt(
+            inspect.cleandoc(DOM_TREE_INSTRUCTIONS).format(beam_width=self.beam_width),
+            f"ЦЕЛЕВОЙ ЭЛЕМЕНТ: {description}\n\n"
+            f"ТЕКУЩЕЕ ПОДДЕРЕВО: {root_selector}\n\n"
+            f"ДОСТУПНАЯ СТРУКТУРА:\n{self.dom_serializer.serialize(structure, description)}\n\n"
+            f"Список уже проверенных селекторов:\n{visited}",
+        )
+        response = await self.model.send(prompt, call_type=LLM_CALL_SELECTOR)
+
+        if "СЕЛЕКТОР:" in response and "THAT'S IS" in response:
+            selector = response.split("СЕЛЕКТОР:", 1)[1].split("|", 1)[0].strip().strip('"\'')
+            return selector, []
+        if "КАНДИДАТЫ:" in response:
+            candidates_part = response.split("КАНДИДАТЫ:", 1)[1].strip().split('\n', 1)[0]
+            candidates = [candidate.strip().strip('"\'') for candidate in candidates_part.split(';')]
+            return None, [candidate for candidate in candidates if candidate][:self.beam_width]
+        self.model.invalidate(prompt, call_type=LLM_CALL_SELECTOR)
+        return None, []
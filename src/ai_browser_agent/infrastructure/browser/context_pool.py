@@ -0,0 +1,138 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from ai_browser_agent.infrastructure.browser.launch_profile import HEADED, LaunchProfile
+from ai_browser_agent.shared.constants import BROWSER_POOL_MAX_SIZE
+from playwright.async_api import BrowserContext, Page, async_playwright
+
+
+class BrowserLease:
+    """
+    Арендованный изолированный контекст браузера со своей страницей
+    """
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+
+
+class BrowserContextPool:
+    """
+    Пул изолированных контекстов в одном процессе браузера.
+
+    Каждый агент арендует свой контекст (cookies, storage, страницы), а
+    процесс Chromium общий. Количество одновременно выданных контекстов
+    ограничено max_size, остальные ждут освобождения. Маршруты и init-скрипты
+    (фильтр запросов, HAR, трекер DOM) ставятся пулом до создания первой страницы:
+    общие для всех контекстов - через context_setup, свои для аренды - через setup в acquire.
+    """
+
+    def __init__(
+            self,
+            max_size: int = BROWSER_POOL_MAX_SIZE,
+            context_options: dict = None,
+            profile: LaunchProfile = HEADED,
+            context_setup: list = None,
+    ):
+        """
+        Args:
+            max_size: Сколько контекстов выдается одновременно
+            context_options: Параметры new_context поверх параметров профиля
+            profile: Параметры запуска браузера
+            context_setup: Корутины (context) -> None, которые настраивают каждый новый контекст пула
+        """
+        self.max_size = max_size
+        self.profile = profile
+        self.context_options = {**profile.context_options(), **(context_options or {})}
+        self.playwright = None
+        self.browser = None
+        self.leases = set()
+        self.context_setup = list(context_setup or [])
+        self._semaphore = asyncio.Semaphore(max_size)
+
+    async def start(self):
+        """Запускает процесс браузера, общий для всех контекстов пула, или подключается к уже запущенному"""
+        self.playwright = await async_playwright().start()
+
+        if self.profile.cdp_url:
+            try:
+                self.browser = await self.playwright.chromium.connect_over_cdp(self.profile.cdp_url)
+                return
+            except Exception as e:
+                print(f"Не удалось подключиться к браузеру {self.profile.cdp_url}: {e}. Запускаем новый...")
+
+        options = self.profile.launch_options()
+        try:
+            self.browser = await self.playwright.chromium.launch(**options)
+        except Exception as e:
+            if 'channel' not in options:
+                print(f"Не удалось запустить Chromium: {e}")
+                raise
+            print(f"Не удалось запустить {options['channel']}: {e}. Пробуем Chromium...")
+            del options['channel']
+            self.browser = await self.playwright.chromium.launch(**options)
+
+    async def acquire(self, setup: list = ()) -> BrowserLease:
+        """
+        Ждет свободного места в пуле и выдает новый контекст со страницей.
+
+        Args:
+            setup: Корутины (context) -> None только для этой аренды, выполняются после context_setup
+                   в переданном порядке. Обработчики маршрутов Playwright вызываются в обратном порядке установки
+        """
+        await self._semaphore.acquire()
+        context = None
+        try:
+            context = await self.browser.new_context(**self.context_options)
+            for install in [*self.context_setup, *setup]:
+                await install(context)
+            page = await context.new_page()
+        except Exception:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    print(f"Ошибка при закрытии контекста браузера: {e}")
+            self._semaphore.release()
+            raise
+        lease = BrowserLease(context=context, page=page)
+        self.leases.add(lease)
+        return lease
+
+    async def release(self, lease: BrowserLease):
+        """Закрывает контекст вместе с его страницами, cookies и storage и освобождает место в пуле"""
+        if lease not in self.leases:
+            return
+        self.leases.discard(lease)
+        try:
+            await lease.context.close()
+        except Exception as e:
+            print(f"Ошибка при закрытии контекста браузера: {e}")
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def lease(self, setup: list = ()):
+        """
+        Пример:
+            async with pool.lease() as lease:
+                await lease.page.goto('https://example.com')
+        """
+        lease = await self.acquire(setup)
+        try:
+            yield lease
+        finally:
+            await self.release(lease)
+
+    @property
+    def in_use(self) -> int:
+        return len(self.leases)
+
+    async def stop(self):
+        """Закрывает контексты пула и браузер. Браузер, подключенный по CDP, продолжает работать"""
+        for lease in list(self.leases):
+            await self.release(lease)
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
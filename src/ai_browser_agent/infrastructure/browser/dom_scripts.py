@@ -0,0 +1,376 @@
+"""
+JavaScript, выполняемый внутри страницы через page.evaluate.
+
+Каждый скрипт отрабатывает за один вызов evaluate, чтобы не гонять
+десятки IPC-запросов между Python и браузером.
+"""
+import json
+
+# Общие функции: стабильный css-путь и проверка видимости
+HELPERS_JS = '''
+    const cssPath = (el) => {
+        const parts = [];
+        while (el && el.nodeType === Node.ELEMENT_NODE) {
+            const tag = el.tagName.toLowerCase();
+            if (tag === 'body' || tag === 'html') {
+                parts.unshift(tag);
+                break;
+            }
+            if (el.id && document.querySelectorAll('#' + CSS.escape(el.id)).length === 1) {
+                parts.unshift('#' + CSS.escape(el.id));
+                break;
+            }
+            let part = tag;
+            const parent = el.parentElement;
+            if (parent) {
+                const sameTag = Array.from(parent.children).filter(c => c.tagName === el.tagName);
+                if (sameTag.length > 1) {
+                    part += `:nth-of-type(${sameTag.indexOf(el) + 1})`;
+                }
+            }
+            parts.unshift(part);
+            el = parent;
+        }
+        return parts.join(' > ');
+    };
+
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        if (rect.width === 0 || rect.height === 0) return false;
+        const style = getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.display !== 'none';
+    };
+
+    const ownText = (el, limit) => {
+        const text = el.textContent ? el.textContent.replace(/\\s+/g, ' ').trim() : '';
+        return text ? text.slice(0, limit) : null;
+    };
+'''
+
+# Снимок поддерева за один обход: обход в ширину с лимитами глубины и количества узлов
+SNAPSHOT_JS = '''(root, options) => {
+''' + HELPERS_JS + '''
+    const {maxDepth, maxNodes, textLimit, skipTags} = options;
+    const skip = new Set(skipTags);
+
+    const describe = (el, depth) => {
+        const node = {
+            selector: el.tagName.toLowerCase(),
+            path: cssPath(el),
+            attributes: {},
+            text: ownText(el, depth === 0 ? textLimit : Math.floor(textLimit / 2)),
+            visible: isVisible(el),
+            focus: document.activeElement === el,
+            children: {},
+            children_count: {},
+        };
+        for (const attr of el.attributes) {
+            node.attributes[attr.name] = attr.value;
+        }
+        return node;
+    };
+
+    const result = describe(root, 0);
+    let nodeCount = 1;
+    let truncated = false;
+    const queue = [[root, result, 0]];
+
+    for (let i = 0; i < queue.length; i++) {
+        const [el, node, depth] = queue[i];
+        const children = Array.from(el.children).filter(c => !skip.has(c.tagName.toLowerCase()));
+
+        for (const child of children) {
+            const tag = child.tagName.toLowerCase();
+            node.children_count[tag] = (node.children_count[tag] || 0) + 1;
+        }
+        if (!children.length) continue;
+
+        if (depth + 1 >= maxDepth) {
+            node.depth_exceeded = true;
+            continue;
+        }
+
+        for (const child of children) {
+            if (nodeCount >= maxNodes) {
+                truncated = true;
+                break;
+            }
+            const tag = child.tagName.toLowerCase();
+            const childNode = describe(child, depth + 1);
+            (node.children[tag] = node.children[tag] || []).push(childNode);
+            nodeCount++;
+            queue.push([child, childNode, depth + 1]);
+        }
+    }
+
+    result.node_count = nodeCount;
+    result.truncated = truncated;
+    return result;
+}'''
+
+# Плоский пронумерованный индекс видимых интерактивных элементов
+INDEX_JS = '''(options) => {
+''' + HELPERS_JS + '''
+    const {selectors, maxElements, textLimit} = options;
+
+    const implicitRole = (el) => {
+        const tag = el.tagName.toLowerCase();
+        const type = (el.getAttribute('type') || '').toLowerCase();
+        if (tag === 'a') return 'link';
+        if (tag === 'button' || tag === 'summary') return 'button';
+        if (tag === 'select') return 'combobox';
+        if (tag === 'textarea') return 'textbox';
+        if (tag === 'input') {
+            if (['button', 'submit', 'reset', 'image'].includes(type)) return 'button';
+            if (type === 'checkbox' || type === 'radio') return type;
+            if (type === 'search') return 'searchbox';
+            return 'textbox';
+        }
+        if (el.isContentEditable) return 'textbox';
+        return 'generic';
+    };
+
+    const accessibleName = (el) => {
+        const aria = el.getAttribute('aria-label');
+        if (aria) return aria;
+        const labelledBy = el.getAttribute('aria-labelledby');
+        if (labelledBy) {
+            const text = labelledBy.split(/\\s+/)
+                .map(id => document.getElementById(id))
+                .filter(Boolean)
+                .map(node => node.textContent)
+                .join(' ');
+            if (text.trim()) return text;
+        }
+        if (el.labels && el.labels.length) return el.labels[0].textContent;
+        return el.getAttribute('placeholder')
+            || el.getAttribute('alt')
+            || el.getAttribute('title')
+            || (el.tagName === 'INPUT' ? el.value : '')
+            || el.innerText
+            || '';
+    };
+
+    const uniqueSelector = (el) => {
+        const tag = el.tagName.toLowerCase();
+        for (const attr of ['data-testid', 'data-test', 'name', 'aria-label', 'placeholder']) {
+            const value = el.getAttribute(attr);
+            if (!value || value.length > 80) continue;
+            const selector = `${tag}[${attr}="${CSS.escape(value)}"]`;
+            if (document.querySelectorAll(selector).length === 1) return selector;
+        }
+        return cssPath(el);
+    };
+
+    // атрибуты, по которым локальный ранжировщик сопоставляет элемент с описанием
+    const hintAttributes = (el) => {
+        const hints = {};
+        for (const attr of ['id', 'name', 'placeholder', 'aria-label', 'title', 'class', 'data-testid']) {
+            const value = el.getAttribute(attr);
+            if (value) hints[attr] = value.slice(0, 100);
+        }
+        return hints;
+    };
+
+    const clean = (text, limit) => (text || '').replace(/\\s+/g, ' ').trim().slice(0, limit);
+
+    const elements = [];
+    const seen = new Set();
+    for (const el of document.querySelectorAll(selectors.join(','))) {
+        if (elements.length >= maxElements) break;
+        if (seen.has(el) || !isVisible(el)) continue;
+        seen.add(el);
+        elements.push({
+            id: elements.length,
+            tag: el.tagName.toLowerCase(),
+            role: el.getAttribute('role') || implicitRole(el),
+            name: clean(accessibleName(el), textLimit),
+            text: clean(el.innerText || el.value, textLimit),
+            type: el.getAttribute('type'),
+            disabled: !!el.disabled || el.getAttribute('aria-disabled') === 'true',
+            selector: uniqueSelector(el),
+            attributes: hintAttributes(el),
+        });
+    }
+    return elements;
+}'''
+
+# Трекер изменений DOM на основе MutationObserver.
+# Устанавливается как init script, поэтому это выражение, а не функция с аргументами:
+# параметры подставляются через build_tracker_script
+TRACKER_JS = '''(() => {
+    if (window.__agentTracker) return;
+''' + HELPERS_JS + '''
+    const {selectors, logLimit, attributes} = __OPTIONS__;
+    const interactive = selectors.join(',');
+    const described = new WeakMap();
+
+    const tracker = {
+        document: Math.random().toString(36).slice(2),
+        seq: 0,
+        log: [],
+        lastMutationAt: performance.now(),
+    };
+
+    const describe = (el) => {
+        // у отсоединенного узла путь уже не вычислить, поэтому запоминаем описание заранее
+        if (!el.isConnected && described.has(el)) return described.get(el);
+        const info = {
+            path: cssPath(el),
+            tag: el.tagName.toLowerCase(),
+            role: el.getAttribute('role'),
+            text: ownText(el, 60),
+        };
+        if (el.isConnected) described.set(el, info);
+        return info;
+    };
+
+    const record = (kind, el, detail) => {
+        tracker.log.push({seq: ++tracker.seq, kind, node: describe(el), detail});
+        if (tracker.log.length > logLimit) tracker.log.splice(0, tracker.log.length - logLimit);
+    };
+
+    const interactiveIn = (node) => {
+        if (node.nodeType !== Node.ELEMENT_NODE) return [];
+        const found = node.matches(interactive) ? [node] : [];
+        return found.concat(Array.from(node.querySelectorAll(interactive)));
+    };
+
+    const closestInteractive = (node) => {
+        const el = node.nodeType === Node.ELEMENT_NODE ? node : node.parentElement;
+        return el ? el.closest(interactive) : null;
+    };
+
+    const observer = new MutationObserver((mutations) => {
+        for (const mutation of mutations) {
+            // анимации постоянно меняют style, это не мешает считать страницу загруженной
+            if (mutation.attributeName !== 'style') tracker.lastMutationAt = performance.now();
+            if (mutation.type === 'childList') {
+                for (const node of mutation.addedNodes) {
+                    const added = interactiveIn(node);
+                    added.forEach(el => record('added', el));
+                    if (!added.length) {
+                        const owner = closestInteractive(mutation.target);
+                        if (owner) record('changed', owner, 'content');
+                    }
+                }
+                for (const node of mutation.removedNodes) {
+                    interactiveIn(node).forEach(el => record('removed', el));
+                }
+            } else {
+                const owner = closestInteractive(mutation.target);
+                if (owner) record('changed', owner, mutation.attributeName || 'text');
+            }
+        }
+    });
+    observer.observe(document, {
+        childList: true,
+        subtree: true,
+        attributes: true,
+        attributeFilter: attributes,
+        characterData: true,
+    });
+
+    tracker.changesSince = (since, limit) => {
+        const oldest = tracker.log.length ? tracker.log[0].seq : tracker.seq + 1;
+        const result = {
+            document: tracker.document,
+            since,
+            seq: tracker.seq,
+            overflow: since < oldest - 1,
+            added: [],
+            removed: [],
+            changed: [],
+        };
+        const seen = new Set();
+        for (let i = tracker.log.length - 1; i >= 0; i--) {
+            const entry = tracker.log[i];
+            if (entry.seq <= since) break;
+            const key = entry.kind + entry.node.path;
+            if (seen.has(key)) continue;
+            seen.add(key);
+            const bucket = result[entry.kind];
+            if (bucket.length < limit) {
+                bucket.push(entry.detail ? {...entry.node, detail: entry.detail} : entry.node);
+            } else {
+                result.truncated = true;
+            }
+        }
+        return result;
+    };
+
+    window.__agentTracker = tracker;
+})()'''
+
+# Изменения DOM с момента снимка since в документе document
+DOM_CHANGES_JS = '''({since, document: documentId, limit}) => {
+    const tracker = window.__agentTracker;
+    if (!tracker) return {installed: false};
+    if (documentId && tracker.document !== documentId) {
+        return {document: tracker.document, seq: tracker.seq, navigated: true};
+    }
+    return tracker.changesSince(since, limit);
+}'''
+
+
+def build_tracker_script(selectors, log_limit, attributes) -> str:
+    """Подставляет параметры в скрипт трекера изменений DOM"""
+    options = json.dumps({
+        'selectors': list(selectors),
+        'logLimit': log_limit,
+        'attributes': list(attributes),
+    })
+    return TRACKER_JS.replace('__OPTIONS__', options)
+
+# Сколько миллисекунд DOM не менялся. Без трекера считаем DOM спокойным
+DOM_QUIET_JS = '''() => {
+    const tracker = window.__agentTracker;
+    return tracker ? performance.now() - tracker.lastMutationAt : null;
+}'''
+
+# Пакетная проверка селекторов: количество совпадений, видимость, положение, доступность и текст
+PROBE_JS = '''({selectors, textLimit}) => {
+''' + HELPERS_JS + '''
+    const keyAttributes = ['id', 'name', 'type', 'role', 'aria-label', 'placeholder', 'href', 'value'];
+
+    return selectors.map((selector) => {
+        let matches;
+        try {
+            matches = Array.from(document.querySelectorAll(selector));
+        } catch (e) {
+            return {selector, error: 'unsupported'};
+        }
+        const visibleMatches = matches.filter(isVisible);
+        const result = {
+            selector,
+            count: matches.length,
+            visible_count: visibleMatches.length,
+            visible: visibleMatches.length > 0,
+        };
+        const el = visibleMatches[0] || matches[0];
+        if (!el) return result;
+
+        const rect = el.getBoundingClientRect();
+        result.box = {
+            x: Math.round(rect.x),
+            y: Math.round(rect.y),
+            width: Math.round(rect.width),
+            height: Math.round(rect.height),
+        };
+        result.enabled = !el.disabled && el.getAttribute('aria-disabled') !== 'true';
+        result.tag = el.tagName.toLowerCase();
+        result.text = ownText(el, textLimit);
+        result.attributes = {};
+        for (const name of keyAttributes) {
+            const value = el.getAttribute(name);
+            if (value) result.attributes[name] = value.slice(0, textLimit);
+        }
+        return result;
+    });
+}'''
+
+# Текущее состояние трекера изменений DOM: документ и номер последнего изменения
+DOM_STATE_JS = '''() => {
+    const tracker = window.__agentTracker;
+    return tracker ? {document: tracker.document, seq: tracker.seq} : null;
+}'''
@@ -0,0 +1,162 @@
+import re
+
+from ai_browser_agent.shared.constants import (
+    DOM_SERIALIZER_ATTRIBUTE_LIMIT,
+    DOM_SERIALIZER_ATTRIBUTES,
+    DOM_SERIALIZER_CLASS_LIMIT,
+    DOM_SERIALIZER_TOKEN_BUDGET,
+    INTERACTIVE_ROLES,
+    INTERACTIVE_TAGS,
+)
+from ai_browser_agent.shared.utils import estimate_tokens, tokenize
+
+# Сгенерированные классы CSS-модулей и styled-components ничего не говорят о смысле элемента
+NOISY_CLASS_PATTERN = re.compile(r'\d{3,}|^(css|sc|jsx|svelte)-|^[a-z]{1,3}-[a-z0-9]{5,}$|__[a-z0-9]{5,}$', re.I)
+
+
+class DOMSerializer:
+    """
+    Компактная текстовая сериализация снимка DOM в пределах бюджета токенов.
+
+    Узлы ранжируются по интерактивности, видимости и совпадению текста с
+    описанием искомого элемента. В промпт попадают лучшие узлы и их предки,
+    в порядке документа, без шумных атрибутов (style, data-*, длинные классы).
+    """
+
+    def __init__(self, token_budget: int = DOM_SERIALIZER_TOKEN_BUDGET):
+        self.token_budget = token_budget
+
+    def serialize(self, structure: dict, description: str = '') -> str:
+        """
+        Args:
+            structure: Снимок от PlaywrightBrowserAdapter._analyze_dom_structure
+            description: Описание искомого элемента для ранжирования
+
+        Returns:
+            str: По строке на узел: отступ по глубине, тег с id/классами, атрибуты, текст и путь
+        """
+        if 'error' in structure:
+            return f"ошибка снимка: {structure['error']}"
+
+        nodes = self._flatten(structure)
+        target_words = set(tokenize(description))
+        for node in nodes:
+            node['score'] = self._score(node['data'], target_words)
+            node['line'] = self._format_node(node)
+
+        selected = set()
+        used_tokens = 0
+        for node in sorted(nodes, key=lambda item: item['score'], reverse=True):
+            # узел без предков потеряет контекст, поэтому добавляем цепочку целиком
+            chain = []
+            current = node
+            while current is not None and current['index'] not in selected:
+                chain.append(current)
+                current = nodes[current['parent']] if current['parent'] is not None else None
+            cost = sum(estimate_tokens(item['line']) for item in chain)
+            if used_tokens + cost > self.token_budget:
+                continue
+            used_tokens += cost
+            selected.update(item['index'] for item in chain)
+
+        lines = [node['line'] for node in nodes if node['index'] in selected]
+        omitted = len(nodes) - len(selected)
+        if omitted or structure.get('truncated'):
+            lines.append(f'... скрыто узлов: {omitted}{", снимок обрезан" if structure.get("truncated") else ""}')
+        return '\n'.join(lines)
+
+    def serialize_elements(self, elements: list, description: str = '') -> list:
+        """
+        Отбирает элементы индекса интерактивных элементов в пределах бюджета.
+
+        Args:
+            elements: Элементы от PlaywrightBrowserAdapter._build_element_index
+            description: Описание искомого элемента для ранжирования
+
+        Returns:
+            list: Элементы в исходном порядке, которые поместились в бюджет
+        """
+        target_words = set(tokenize(description))
+
+        def score(element):
+            words = set(tokenize(f"{element['name']} {element['text']} {element['role']}"))
+            return len(words & target_words) - (1 if element['disabled'] else 0)
+
+        kept = set()
+        used_tokens = 0
+        for element in sorted(elements, key=score, reverse=True):
+            cost = estimate_tokens(f"{element['name']} {element['text']} {element['role']} {element['tag']}") + 4
+            if used_tokens + cost > self.token_budget:
+                continue
+            used_tokens += cost
+            kept.add(element['id'])
+        return [element for element in elements if element['id'] in kept]
+
+    @staticmethod
+    def _flatten(structure: dict) -> list:
+        """Разворачивает дерево снимка в список в порядке документа"""
+        nodes = []
+        stack = [(structure, 0, None)]
+        while stack:
+            data, depth, parent = stack.pop()
+            index = len(nodes)
+            nodes.append({'index': index, 'data': data, 'depth': depth, 'parent': parent})
+            children = [child for group in data.get('children', {}).values() for child in group]
+            for child in reversed(children):
+                stack.append((child, depth + 1, index))
+        return nodes
+
+    @staticmethod
+    def _score(data: dict, target_words: set) -> float:
+        attributes = data.get('attributes', {})
+        tag = data.get('selector', '')
+        score = 0.0
+
+        if tag in INTERACTIVE_TAGS or attributes.get('role') in INTERACTIVE_ROLES \
+                or 'onclick' in attributes or attributes.get('contenteditable') in ('', 'true'):
+            score += 3
+        if data.get('visible'):
+            score += 2
+        else:
+            score -= 3
+        if data.get('focus'):
+            score += 1
+
+        if target_words:
+            own_words = set(tokenize(' '.join([
+                data.get('text') or '',
+                attributes.get('aria-label', ''),
+                attributes.get('placeholder', ''),
+                attributes.get('name', ''),
+                attributes.get('id', ''),
+                attributes.get('title', ''),
+                attributes.get('class', ''),
+            ])))
+            score += 2 * len(own_words & target_words)
+        return score
+
+    @staticmethod
+    def _format_node(node: dict) -> str:
+        data = node['data']
+        attributes = data.get('attributes', {})
+
+        head = data.get('selector', '?')
+        if attributes.get('id'):
+            head += f"#{attributes['id']}"
+        classes = [
+            name for name in attributes.get('class', '').split()
+            if len(name) <= 30 and not NOISY_CLASS_PATTERN.search(name)
+        ]
+        head += ''.join(f'.{name}' for name in classes[:DOM_SERIALIZER_CLASS_LIMIT])
+
+        parts = ['  ' * node['depth'] + head]
+        for name in DOM_SERIALIZER_ATTRIBUTES:
+            if name != 'id' and attributes.get(name):
+                parts.append(f'{name}="{attributes[name][:DOM_SERIALIZER_ATTRIBUTE_LIMIT]}"')
+        if data.get('text'):
+            parts.append(f"'{data['text']}'")
+        if not data.get('visible'):
+            parts.append('hidden')
+        if data.get('path'):
+            parts.append(f"@ {data['path']}")
+        return ' '.join(parts)
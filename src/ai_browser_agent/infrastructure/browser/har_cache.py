@@ -0,0 +1,190 @@
+import base64
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from playwright.async_api import BrowserContext, Route
+
+# Тело ответа в HAR хранится уже распакованным, поэтому заголовки о сжатии и длине убираем
+SKIPPED_REPLAY_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+class HarCache:
+    """
+    Запись и воспроизведение HTTP-ответов для повторяемых офлайн-прогонов.
+
+    В режиме 'record' ответы сети сохраняются в HAR-файл, в режиме 'replay'
+    запросы обслуживаются из него без сети. Промахи в режиме воспроизведения
+    идут в сеть (on_miss='network') или отклоняются (on_miss='abort').
+    """
+
+    def __init__(self, path: str, mode: str = 'replay', on_miss: str = 'network'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f'Неизвестный режим HAR-кэша: {mode}')
+        self.path = Path(path).expanduser()
+        self.mode = mode
+        self.on_miss = on_miss
+        # ключ запроса -> запись HAR
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        if mode == 'replay' or self.path.exists():
+            self.load()
+
+    async def install(self, context: BrowserContext):
+        """Подключает запись или воспроизведение ко всем страницам контекста"""
+        await context.route('**/*', self.handle)
+
+    @staticmethod
+    def _key(method: str, url: str, post_data: bytes = None) -> str:
+        """Ключ запроса; тело хэшируется как байты, поэтому двоичные тела (загрузки, protobuf) тоже годятся"""
+        key = f'{method} {url}'
+        if post_data:
+            if isinstance(post_data, str):
+                post_data = post_data.encode('utf-8')
+            key += ' ' + hashlib.sha1(post_data).hexdigest()
+        return key
+
+    @staticmethod
+    def _decode(content: dict) -> bytes:
+        """Тело из HAR: base64 только при "encoding": "base64", иначе обычный текст"""
+        text = content.get('text') or ''
+        if content.get('encoding') == 'base64':
+            return base64.b64decode(text)
+        return text.encode('utf-8')
+
+    async def handle(self, route: Route):
+        request = route.request
+        key = self._key(request.method, request.url, request.post_data_buffer)
+
+        if self.mode == 'replay':
+            entry = self.entries.get(key)
+            try:
+                response = entry['response'] if entry else None
+                replay = response and {
+                    'status': response['status'],
+                    'headers': {
+                        header['name']: header['value'] for header in response.get('headers', [])
+                        if header['name'].lower() not in SKIPPED_REPLAY_HEADERS
+                    },
+                    'body': self._decode(response.get('content', {})),
+                }
+            except (KeyError, TypeError, ValueError) as e:
+                # испорченная запись не должна подвешивать запрос
+                print(f'Некорректная запись HAR для {request.url}: {e}')
+                replay = None
+            if not replay:
+                self.misses += 1
+                if self.on_miss == 'abort':
+                    await route.abort()
+                else:
+                    await route.fallback()
+                return
+            self.hits += 1
+            await route.fulfill(**replay)
+            return
+
+        started = time.monotonic()
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            await route.fallback()
+            return
+        self.entries[key] = self._make_entry(request, response, body, time.monotonic() - started)
+        self.recorded += 1
+        await route.fulfill(response=response, body=body)
+
+    @staticmethod
+    def _make_entry(request, response, body: bytes, elapsed: float) -> dict:
+        headers = response.headers
+        entry = {
+            'startedDateTime': datetime.now(timezone.utc).isoformat(),
+            'time': round(elapsed * 1000, 1),
+            'request': {
+                'method': request.method,
+                'url': request.url,
+                'httpVersion': 'HTTP/1.1',
+                'headers': [],
+                'queryString': [],
+                'headersSize': -1,
+                'bodySize': -1,
+            },
+            'response': {
+                'status': response.status,
+                'statusText': response.status_text,
+                'httpVersion': 'HTTP/1.1',
+                'headers': [{'name': name, 'value': value} for name, value in headers.items()],
+                'content': {
+                    'size': len(body),
+                    'mimeType': headers.get('content-type', ''),
+                    'text': base64.b64encode(body).decode('ascii'),
+                    'encoding': 'base64',
+                },
+                'redirectURL': headers.get('location', ''),
+                'headersSize': -1,
+                'bodySize': len(body),
+            },
+            'cache': {},
+            'timings': {'send': 0, 'wait': round(elapsed * 1000, 1), 'receive': 0},
+        }
+        post_data = request.post_data_buffer
+        if post_data:
+            post = {'mimeType': request.headers.get('content-type', '')}
+            try:
+                post['text'] = post_data.decode('utf-8')
+            except UnicodeDecodeError:
+                post['text'] = base64.b64encode(post_data).decode('ascii')
+                post['encoding'] = 'base64'
+            entry['request']['postData'] = post
+        return entry
+
+    def load(self):
+        try:
+            har = json.loads(self.path.read_text(encoding='utf-8'))
+            entries = har['log']['entries']
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f'Не удалось прочитать HAR {self.path}: {e}')
+            return
+        skipped = 0
+        for entry in entries if isinstance(entries, list) else []:
+            try:
+                request = entry['request']
+                post = request.get('postData') or {}
+                post_data = self._decode(post) if post.get('text') else None
+                self.entries[self._key(request['method'], request['url'], post_data)] = entry
+            except (KeyError, TypeError, ValueError, AttributeError):
+                skipped += 1
+        if skipped:
+            print(f'В HAR {self.path} пропущено некорректных записей: {skipped}')
+
+    def save(self):
+        """Сохраняет записанные ответы. В режиме воспроизведения ничего не делает"""
+        if self.mode != 'record':
+            return
+        har = {
+            'log': {
+                'version': '1.2',
+                'creator': {'name': 'ai-browser-agent', 'version': '0.1.0'},
+                'entries': list(self.entries.values()),
+            }
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(har, ensure_ascii=False), encoding='utf-8')
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict: Попадания, промахи, доля попаданий и количество записанных ответов
+        """
+        total = self.hits + self.misses
+        return {
+            'mode': self.mode,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'recorded': self.recorded,
+        }
@@ -0,0 +1,82 @@
+import os
+from dataclasses import dataclass, field, replace
+
+from ai_browser_agent.shared.constants import BROWSER_VIEWPORT, CHROME_EXECUTABLE_PATHS
+
+
+@dataclass
+class LaunchProfile:
+    """
+    Параметры запуска браузера.
+
+    channel:
+        'auto' - системный Chrome, если он установлен, иначе Chromium из Playwright,
+        None - всегда Chromium из Playwright,
+        'chrome', 'msedge' и другие каналы Playwright - конкретный браузер.
+    cdp_url:
+        адрес уже запущенного браузера (например, http://localhost:9222).
+        Подключение к нему пропускает холодный старт браузера при каждом запуске агента.
+    """
+    headless: bool = False
+    channel: str = 'auto'
+    args: list = field(default_factory=list)
+    viewport: dict = field(default_factory=lambda: dict(BROWSER_VIEWPORT))
+    cdp_url: str = None
+
+    def resolve_channel(self):
+        if self.channel != 'auto':
+            return self.channel
+        if any(os.path.exists(path) for path in CHROME_EXECUTABLE_PATHS):
+            return 'chrome'
+        return None
+
+    def launch_options(self) -> dict:
+        """Аргументы для playwright.chromium.launch"""
+        options = {'headless': self.headless, 'args': list(self.args)}
+        channel = self.resolve_channel()
+        if channel:
+            options['channel'] = channel
+        return options
+
+    def context_options(self) -> dict:
+        """Аргументы для browser.new_context"""
+        return {'viewport': self.viewport}
+
+    @classmethod
+    def from_env(cls) -> 'LaunchProfile':
+        """
+        Профиль из переменных окружения:
+            BROWSER_HEADLESS=1 - запуск без окна
+            BROWSER_CHANNEL=auto|chromium|chrome|msedge
+            BROWSER_ARGS="--disable-gpu --lang=ru" - дополнительные аргументы запуска
+            BROWSER_VIEWPORT=1366x900
+            BROWSER_CDP_URL=http://localhost:9222 - подключиться к запущенному браузеру
+        """
+        base = HEADLESS if os.getenv('BROWSER_HEADLESS', '').lower() in ('1', 'true', 'yes') else HEADED
+        profile = replace(
+            base,
+            args=list(base.args),
+            viewport=dict(base.viewport),
+            cdp_url=os.getenv('BROWSER_CDP_URL') or None,
+        )
+
+        channel = os.getenv('BROWSER_CHANNEL')
+        if channel:
+            profile.channel = None if channel == 'chromium' else channel
+        if os.getenv('BROWSER_ARGS'):
+            profile.args.extend(os.getenv('BROWSER_ARGS').split())
+        if os.getenv('BROWSER_VIEWPORT'):
+            width, height = os.getenv('BROWSER_VIEWPORT').lower().split('x')
+            profile.viewport = {'width': int(width), 'height': int(height)}
+        return profile
+
+
+# Окно браузера видно пользователю, например чтобы передать ему управление
+HEADED = LaunchProfile()
+
+# Сервер без дисплея
+HEADLESS = LaunchProfile(
+    headless=True,
+    channel=None,
+    args=['--disable-gpu', '--disable-dev-shm-usage'],
+)
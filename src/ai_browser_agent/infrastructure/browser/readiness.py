@@ -0,0 +1,90 @@
+import asyncio
+
+from ai_browser_agent.infrastructure.browser.dom_scripts import DOM_QUIET_JS
+from ai_browser_agent.shared.constants import (
+    READY_DOM_QUIET,
+    READY_IGNORED_RESOURCE_TYPES,
+    READY_LONG_REQUEST,
+    READY_NETWORK_QUIET,
+    READY_POLL_INTERVAL,
+    READY_TIMEOUT,
+)
+from playwright.async_api import Page
+
+
+class PageReadiness:
+    """
+    Определение готовности страницы по событиям вместо фиксированных пауз.
+
+    Страница готова, когда нет активных сетевых запросов, DOM перестал
+    меняться и, если задан селектор, нужный элемент появился. Ожидание
+    всегда ограничено таймаутом.
+    """
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.loop = asyncio.get_event_loop()
+        # запрос -> время начала
+        self.in_flight = {}
+        self.last_network_activity = self.loop.time()
+
+        page.on('request', self._on_request_started)
+        page.on('requestfinished', self._on_request_done)
+        page.on('requestfailed', self._on_request_done)
+
+    def _on_request_started(self, request):
+        if request.resource_type in READY_IGNORED_RESOURCE_TYPES:
+            return
+        self.in_flight[request] = self.loop.time()
+        self.last_network_activity = self.loop.time()
+
+    def _on_request_done(self, request):
+        if self.in_flight.pop(request, None) is not None:
+            self.last_network_activity = self.loop.time()
+
+    def _network_quiet(self, quiet_ms: float) -> bool:
+        now = self.loop.time()
+        for request, started in list(self.in_flight.items()):
+            if (now - started) * 1000 >= READY_LONG_REQUEST:
+                del self.in_flight[request]
+        return not self.in_flight and (now - self.last_network_activity) * 1000 >= quiet_ms
+
+    async def _dom_quiet(self, quiet_ms: float) -> bool:
+        try:
+            quiet_for = await self.page.evaluate(DOM_QUIET_JS)
+        except Exception:
+            # контекст страницы пересоздается во время навигации
+            return False
+        return quiet_for is None or quiet_for >= quiet_ms
+
+    async def wait_until_ready(
+            self,
+            selector: str = None,
+            timeout: float = READY_TIMEOUT,
+            network_quiet: float = READY_NETWORK_QUIET,
+            dom_quiet: float = READY_DOM_QUIET,
+    ) -> bool:
+        """Ждет готовности страницы
+
+        Args:
+            selector (str): CSS-селектор элемента, который должен стать видимым
+            timeout (float): Верхняя граница ожидания в миллисекундах
+            network_quiet (float): Сколько миллисекунд сеть должна быть свободна
+            dom_quiet (float): Сколько миллисекунд DOM не должен меняться
+
+        Returns:
+            bool: True если страница готова, False если вышел таймаут
+        """
+        deadline = self.loop.time() + timeout / 1000
+
+        if selector:
+            try:
+                await self.page.locator(selector).first.wait_for(state='visible', timeout=timeout)
+            except Exception:
+                return False
+
+        while self.loop.time() < deadline:
+            if self._network_quiet(network_quiet) and await self._dom_quiet(dom_quiet):
+                return True
+            await asyncio.sleep(READY_POLL_INTERVAL / 1000)
+        return False
@@ -0,0 +1,116 @@
+from collections import Counter
+from urllib.parse import urlsplit
+
+from ai_browser_agent.shared.constants import (
+    REQUEST_FILTER_AVERAGE_SIZES,
+    REQUEST_FILTER_BLOCKED_TYPES,
+    REQUEST_FILTER_DEFAULT_SIZE,
+    REQUEST_FILTER_TRACKER_DOMAINS,
+)
+from playwright.async_api import BrowserContext, Route
+
+
+def _host_matches(host: str, domain: str) -> bool:
+    return host == domain or host.endswith('.' + domain)
+
+
+class RequestFilter:
+    """
+    Блокировка лишних сетевых запросов на уровне контекста браузера.
+
+    Агент не смотрит на пиксели, поэтому картинки, видео, шрифты и
+    аналитика только замедляют загрузку. Для отдельных сайтов часть
+    типов ресурсов или доменов можно разрешить через site_allowlist.
+    Пока браузером управляет человек (вход, оплата, капча), фильтр
+    приостанавливается через pause: ему картинки и медиа нужны.
+    """
+
+    def __init__(
+            self,
+            blocked_resource_types=REQUEST_FILTER_BLOCKED_TYPES,
+            blocked_domains=REQUEST_FILTER_TRACKER_DOMAINS,
+            site_allowlist: dict = None,
+    ):
+        """
+        Args:
+            blocked_resource_types: Типы ресурсов Playwright, которые блокируются (image, media, font...)
+            blocked_domains: Домены, запросы к которым блокируются вместе с поддоменами
+            site_allowlist: Сайт -> типы ресурсов и домены, которые на нем разрешены,
+                например {'samokat.ru': ['image', 'cdn.samokat.ru']}
+        """
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.blocked_domains = tuple(blocked_domains)
+        self.site_allowlist = {site: set(allowed) for site, allowed in (site_allowlist or {}).items()}
+        self.paused = False
+        self.requests = 0
+        self.blocked = Counter()
+        self.estimated_bytes_saved = 0
+
+    async def install(self, context: BrowserContext):
+        """Подключает фильтр ко всем страницам контекста"""
+        await context.route('**/*', self.handle)
+
+    def pause(self):
+        """Пропускать все запросы, например пока браузер передан человеку"""
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    async def handle(self, route: Route):
+        request = route.request
+        self.requests += 1
+        reason = None if self.paused else self._block_reason(request)
+        if reason is None:
+            # передаем запрос следующим обработчикам маршрутов, если они есть
+            await route.fallback()
+            return
+
+        self.blocked[reason] += 1
+        self.estimated_bytes_saved += REQUEST_FILTER_AVERAGE_SIZES.get(
+            request.resource_type, REQUEST_FILTER_DEFAULT_SIZE
+        )
+        await route.abort('blockedbyclient')
+
+    def _block_reason(self, request):
+        """Причина блокировки запроса или None, если запрос нужно пропустить"""
+        if request.is_navigation_request():
+            return None
+
+        host = (urlsplit(request.url).hostname or '').lower()
+        resource_type = request.resource_type
+        allowed = self._allowed_on_site(request)
+        if resource_type in allowed or any(_host_matches(host, domain) for domain in allowed):
+            return None
+
+        if any(_host_matches(host, domain) for domain in self.blocked_domains):
+            return 'tracker'
+        if resource_type in self.blocked_resource_types:
+            return resource_type
+        return None
+
+    def _allowed_on_site(self, request) -> set:
+        if not self.site_allowlist:
+            return set()
+        try:
+            site = (urlsplit(request.frame.page.url).hostname or '').lower()
+        except Exception:
+            # у запросов service worker нет страницы
+            return set()
+        allowed = set()
+        for allowed_site, items in self.site_allowlist.items():
+            if _host_matches(site, allowed_site):
+                allowed |= items
+        return allowed
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict: Всего запросов, заблокировано по причинам и оценка сэкономленных байт
+        """
+        return {
+            'requests': self.requests,
+            'blocked': sum(self.blocked.values()),
+            'blocked_by_reason': dict(self.blocked),
+            'estimated_bytes_saved': self.estimated_bytes_saved,
+        }
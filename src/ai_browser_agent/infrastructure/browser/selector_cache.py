@@ -0,0 +1,153 @@
+import json
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from ai_browser_agent.shared.constants import (
+    SELECTOR_CACHE_MAX_ENTRIES,
+    SELECTOR_CACHE_MIN_TEXT_OVERLAP,
+    SELECTOR_CACHE_PATH,
+    SELECTOR_CACHE_TTL,
+)
+from ai_browser_agent.shared.utils import tokenize
+
+# Сегменты пути, которые меняются от страницы к странице: id, uuid, хэши
+VARIABLE_SEGMENT_PATTERN = re.compile(
+    r'^(\d+|[0-9a-f]{8,}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$'
+)
+NUMBER_PATTERN = re.compile(r'\d{3,}')
+
+
+class SelectorCache:
+    """
+    Постоянный кэш найденных селекторов с LRU- и TTL-вытеснением.
+
+    Ключ - origin страницы, шаблон её URL и описание элемента, поэтому
+    селектор, найденный на одной карточке товара, подходит и для остальных.
+    Селекторы часто позиционные, поэтому вместе с ними хранится отпечаток
+    элемента (тег, роль, имя, текст): на соседней странице с тем же шаблоном
+    селектор используется, только если указывает на такой же элемент.
+    """
+
+    def __init__(
+            self,
+            path: str = SELECTOR_CACHE_PATH,
+            max_entries: int = SELECTOR_CACHE_MAX_ENTRIES,
+            ttl: float = SELECTOR_CACHE_TTL,
+    ):
+        self.path = Path(path).expanduser()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self._load()
+
+    @staticmethod
+    def url_template(url: str) -> str:
+        """Нормализует URL в шаблон: origin + путь с заменой изменяемых сегментов + имена query-параметров
+
+        Args:
+            url (str): URL страницы
+
+        Returns:
+            str: Шаблон, например "https://shop.ru/product/{id}?color"
+        """
+        parts = urlsplit(url)
+        segments = []
+        for segment in parts.path.lower().strip('/').split('/'):
+            if VARIABLE_SEGMENT_PATTERN.match(segment):
+                segments.append('{id}')
+            else:
+                segments.append(NUMBER_PATTERN.sub('{n}', segment))
+        template = f"{parts.scheme}://{parts.netloc.lower()}/{'/'.join(segments)}"
+
+        query_keys = sorted({key for key, _ in parse_qsl(parts.query, keep_blank_values=True)})
+        if query_keys:
+            template += '?' + '&'.join(query_keys)
+        return template
+
+    def key(self, url: str, description: str) -> str:
+        return f"{self.url_template(url)} | {' '.join(description.lower().split())}"
+
+    @staticmethod
+    def fingerprint(probe: dict) -> dict:
+        """Отпечаток элемента из результата probe_selectors"""
+        attributes = probe.get('attributes') or {}
+        return {
+            'tag': probe.get('tag', ''),
+            'role': attributes.get('role', ''),
+            'name': ' '.join(
+                (attributes.get('aria-label') or attributes.get('name') or attributes.get('placeholder') or '')
+                .lower().split()
+            ),
+            'text': probe.get('text') or '',
+        }
+
+    @staticmethod
+    def same_element(saved: dict, current: dict) -> bool:
+        """Тег, роль и доступное имя совпадают, текст совпадает хотя бы наполовину по словам"""
+        if any(saved.get(field, '') != current.get(field, '') for field in ('tag', 'role', 'name')):
+            return False
+        saved_words = set(tokenize(saved.get('text', '')))
+        if not saved_words:
+            return not tokenize(current.get('text', ''))
+        overlap = len(saved_words & set(tokenize(current.get('text', '')))) / len(saved_words)
+        return overlap >= SELECTOR_CACHE_MIN_TEXT_OVERLAP
+
+    def get(self, url: str, description: str):
+        """
+        Returns:
+            dict | None: Запись с полями selector и fingerprint, None если записи нет или она устарела
+        """
+        key = self.key(url, description)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry['saved_at'] > self.ttl:
+            self.invalidate(url, description)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, url: str, description: str, selector: str, fingerprint: dict):
+        key = self.key(url, description)
+        self.entries[key] = {'selector': selector, 'fingerprint': fingerprint, 'saved_at': time.time()}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._save()
+
+    def invalidate(self, url: str, description: str):
+        if self.entries.pop(self.key(url, description), None) is not None:
+            self._save()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        now = time.time()
+        # порядок в файле соответствует порядку LRU; записи без нужных полей (в том числе старого
+        # формата без отпечатка) отбрасываются здесь, а не падают при использовании
+        for key, entry in data.items():
+            if not (
+                    isinstance(entry, dict)
+                    and isinstance(entry.get('selector'), str)
+                    and isinstance(entry.get('fingerprint'), dict)
+                    and isinstance(entry.get('saved_at'), (int, float))
+            ):
+                continue
+            if now - entry['saved_at'] <= self.ttl:
+                self.entries[key] = entry
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.entries, ensure_ascii=False), encoding='utf-8')
+            tmp_path.replace(self.path)
+        except OSError as e:
+            print(f'Не удалось сохранить кэш селекторов: {e}')
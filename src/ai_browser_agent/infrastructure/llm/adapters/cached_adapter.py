@@ -0,0 +1,241 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from ai_browser_agent.app.ports.llm import LLMPort
+from ai_browser_agent.shared.constants import (
+    LLM_CACHE_DISK_MAX_BYTES,
+    LLM_CACHE_MEMORY_ENTRIES,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTLS,
+    LLM_CALL_DEFAULT,
+    LLM_CALL_TEST,
+)
+from ai_browser_agent.shared.prompt import split_prompt
+
+
+class CachedLLMAdapter(LLMPort):
+    """
+    Кэширующая обертка над любым адаптером LLM.
+
+    Ключ - хэш модели, параметров генерации и текста промпта. Ответы хранятся
+    в LRU в памяти и, если задан path, в файлах на диске с вытеснением самых
+    старых при превышении max_disk_bytes. Время жизни задается по типу запроса,
+    тип с TTL 0 и флаг bypass отправляют запрос мимо кэша. Вызывающий код,
+    который не смог разобрать ответ, удаляет его через invalidate, иначе
+    негодный ответ повторялся бы до истечения TTL.
+    """
+
+    def __init__(
+            self,
+            adapter: LLMPort,
+            path: str = LLM_CACHE_PATH,
+            memory_entries: int = LLM_CACHE_MEMORY_ENTRIES,
+            max_disk_bytes: int = LLM_CACHE_DISK_MAX_BYTES,
+            ttls: dict = None,
+            bypass: bool = False,
+    ):
+        """
+        Args:
+            adapter: Адаптер, чьи ответы кэшируются
+            path: Каталог дискового кэша, None - только память
+            memory_entries: Размер LRU в памяти
+            max_disk_bytes: Предельный объем дискового кэша
+            ttls: Время жизни ответа по типу запроса, секунды
+            bypass: Не использовать кэш вовсе, например для отладки промптов
+        """
+        self.adapter = adapter
+        self.model_name = adapter.model_name
+        self.path = Path(path).expanduser() if path else None
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttls = {**LLM_CACHE_TTLS, **(ttls or {})}
+        self.bypass = bypass
+        self.memory = OrderedDict()
+        # объем дискового кэша считается один раз, дальше только увеличивается при записи
+        self._disk_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def key(self, message: str, call_type: str = LLM_CALL_DEFAULT) -> str:
+        payload = json.dumps(
+            {
+                'adapter': type(self.adapter).__name__,
+                'model': self.adapter.model_name,
+                'sampling': getattr(self.adapter, 'sampling_params', {}),
+                'call_type': call_type,
+                'message': split_prompt(message),
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _ttl(self, call_type: str) -> float:
+        return self.ttls.get(call_type, self.ttls[LLM_CALL_DEFAULT])
+
+    async def send(self, message: str, call_type: str = LLM_CALL_DEFAULT) -> str:
+        ttl = self._ttl(call_type)
+        if self.bypass or ttl <= 0:
+            self.bypassed += 1
+            return await self.adapter.send(message, call_type=call_type)
+
+        key = self.key(message, call_type)
+        response = self.get(key, ttl)
+        if response is not None:
+            self.hits += 1
+            return response
+
+        self.misses += 1
+        response = await self.adapter.send(message, call_type=call_type)
+        self.put(key, response)
+        return response
+
+    async def stream(self, message: str, call_type: str = LLM_CALL_DEFAULT):
+        """Потоковый ответ; сохраненный ответ отдается одним куском, новый кэшируется после завершения потока"""
+        ttl = self._ttl(call_type)
+        if self.bypass or ttl <= 0:
+            self.bypassed += 1
+            async for chunk in self.adapter.stream(message, call_type=call_type):
+                yield chunk
+            return
+
+        key = self.key(message, call_type)
+        response = self.get(key, ttl)
+        if response is not None:
+            self.hits += 1
+            yield response
+            return
+
+        self.misses += 1
+        chunks = []
+        completed = False
+        try:
+            async for chunk in self.adapter.stream(message, call_type=call_type):
+                chunks.append(chunk)
+                yield chunk
+            completed = True
+        finally:
+            # прерванный поток (ошибка или потребитель перестал читать) - неполный ответ, его не сохраняем
+            if completed and chunks:
+                self.put(key, ''.join(chunks))
+
+    async def stream_with_tools(self, message: str, tools, call_type: str = LLM_CALL_DEFAULT):
+        """Вызовы инструментов не кэшируются: они управляют браузером здесь и сейчас"""
+        self.bypassed += 1
+        async for event in self.adapter.stream_with_tools(message, tools, call_type=call_type):
+            yield event
+
+    async def test(self) -> bool:
+        """Проверка адаптера; успешный результат кэшируется, чтобы не платить за нее при каждом запуске"""
+        ttl = self._ttl(LLM_CALL_TEST)
+        key = self.key('', LLM_CALL_TEST)
+        if not self.bypass and ttl > 0 and self.get(key, ttl) is not None:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        result = await self.adapter.test()
+        if result and not self.bypass and ttl > 0:
+            self.put(key, 'True')
+        return result
+
+    def invalidate(self, message: str, call_type: str = LLM_CALL_DEFAULT):
+        """Удаляет ответ на запрос из памяти и с диска"""
+        key = self.key(message, call_type)
+        self.memory.pop(key, None)
+        if self.path is not None:
+            try:
+                self._entry_path(key).unlink(missing_ok=True)
+            except OSError as e:
+                print(f'Не удалось удалить ответ LLM из кэша: {e}')
+
+    async def close(self):
+        await self.adapter.close()
+
+    def get(self, key: str, ttl: float):
+        """Возвращает ответ из памяти или с диска, None если его нет или он устарел"""
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None:
+            return None
+        if time.time() - entry['saved_at'] > ttl:
+            self.memory.pop(key, None)
+            return None
+        self.memory.move_to_end(key)
+        return entry['response']
+
+    def put(self, key: str, response: str):
+        if not isinstance(response, str):
+            return
+        entry = {'response': response, 'saved_at': time.time()}
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def _remember(self, key: str, entry: dict):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.path / key[:2] / f'{key}.json'
+
+    def _read_disk(self, key: str):
+        if self.path is None:
+            return None
+        try:
+            return json.loads(self._entry_path(key).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, entry: dict):
+        if self.path is None:
+            return
+        entry_path = self._entry_path(key)
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+            tmp_path = entry_path.with_suffix('.tmp')
+            tmp_path.write_bytes(data)
+            tmp_path.replace(entry_path)
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(path.stat().st_size for path in self.path.glob('*/*.json'))
+            else:
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+        except OSError as e:
+            print(f'Не удалось сохранить ответ LLM в кэш: {e}')
+
+    def _evict_disk(self):
+        """Удаляет самые старые файлы, пока кэш не уложится в max_disk_bytes"""
+        files = [(path.stat(), path) for path in self.path.glob('*/*.json')]
+        total = sum(stat.st_size for stat, _ in files)
+        for stat, path in sorted(files, key=lambda item: item[0].st_mtime):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+        self._disk_bytes = total
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict: Попадания, промахи, запросы мимо кэша и доля попаданий
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'hit_rate': self.hits / total if total else 0.0,
+            'memory_entries': len(self.memory),
+        }
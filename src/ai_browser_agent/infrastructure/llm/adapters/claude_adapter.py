@@ -1,32 +1,75 @@
 from ai_browser_agent.app.ports.llm import LLMPort
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 from anthropic.types import MessageParam
 
+from ai_browser_agent.infrastructure.llm.tool_format import anthropic_tools, text_event, tool_call_event
+from ai_browser_agent.shared.prompt import split_prompt
+
 
 class ClaudeLLMAdapter(LLMPort):
-    def __init__(self, model_name="claude-sonnet-4", api_key=None):
+    def __init__(self, model_name="claude-sonnet-4", api_key=None, max_retries: int = 2):
         if not api_key:
             raise Exception('Api key error value')
         self.model_name = model_name
-        self.client = Anthropic(api_key=api_key)
+        self.sampling_params = {'max_tokens': 1000}
+        # асинхронный клиент: ожидание ответа не блокирует цикл событий,
+        # а отмена задачи закрывает HTTP-запрос; max_retries=0, когда повторами управляет GovernedLLMAdapter
+        self.client = AsyncAnthropic(api_key=api_key, max_retries=max_retries)
+
+    @staticmethod
+    def _text(message) -> str:
+        """Склеивает текстовые блоки ответа, остальные блоки (tool_use, thinking) пропускаются"""
+        return ''.join(block.text for block in message.content if block.type == 'text')
+
+    @staticmethod
+    def _request(message) -> dict:
+        """
+        Неизменные инструкции промпта уходят в system с cache_control: Anthropic
+        кэширует префикс (инструменты и system), и следующие шаги платят только за данные вызова
+        """
+        static, dynamic = split_prompt(message)
+        if not static or not dynamic:
+            return {'messages': [MessageParam(role="user", content=static or dynamic)]}
+        return {
+            'system': [{'type': 'text', 'text': static, 'cache_control': {'type': 'ephemeral'}}],
+            'messages': [MessageParam(role="user", content=dynamic)],
+        }
 
-    async def send(self, message):
-        message = self.client.messages.create(
+    async def send(self, message, call_type='default'):
+        response = await self.client.messages.create(
             model=self.model_name,
-            max_tokens=1000,
-            messages=[
-                MessageParam(
-                    role="user",
-                    content=message
-                )
-            ]
+            **self.sampling_params,
+            **self._request(message)
         )
-        return message.content
+        return self._text(response)
+
+    async def stream(self, message, call_type='default'):
+        async with self.client.messages.stream(
+            model=self.model_name,
+            **self.sampling_params,
+            **self._request(message)
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+    async def stream_with_tools(self, message, tools, call_type='default'):
+        async with self.client.messages.stream(
+            model=self.model_name,
+            **self.sampling_params,
+            **self._request(message),
+            tools=tools.native('anthropic', anthropic_tools),
+        ) as stream:
+            async for event in stream:
+                if event.type == 'text':
+                    yield text_event(event.text)
+                # блок tool_use закрывается, когда его аргументы полностью получены
+                elif event.type == 'content_block_stop' and event.content_block.type == 'tool_use':
+                    yield tool_call_event(event.content_block.name, event.content_block.input)
 
     async def test(self):
-        message = self.client.messages.create(
+        response = await self.client.messages.create(
             model=self.model_name,
-            max_tokens=1000,
+            max_tokens=10,
             messages=[
                 MessageParam(
                     role="user",
@@ -34,9 +77,10 @@ class ClaudeLLMAdapter(LLMPort):
                 )
             ]
         )
-        if message.content == 'True':
+        text = self._text(response).strip()
+        if text == 'True':
             return True
-        raise Exception(message)
+        raise Exception(f"Test failed: {text}")
 
     async def close(self):
-        self.client.close()
+        await self.client.close()
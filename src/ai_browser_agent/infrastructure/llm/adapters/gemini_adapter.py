@@ -1,37 +1,98 @@
 from ai_browser_agent.app.ports.llm import LLMPort
 from google.genai import Client, types
 
+from ai_browser_agent.infrastructure.llm.tool_format import text_event, tool_call_event
+from ai_browser_agent.shared.prompt import split_prompt
+
 
 class GeminiLLMAdapter(LLMPort):
     def __init__(self, model_name="gemini-2.5-flash", api_key=None):
         if not api_key:
             raise Exception('Api key error value')
         self.model_name = model_name
+        self.sampling_params = {'thinking_budget': -1}
         self.client = Client(
             api_key=api_key
         )
+        # асинхронная часть клиента: ожидание ответа не блокирует цикл событий
+        self.aio = self.client.aio
+
+    def _config(self, thinking_budget=None, **kwargs) -> types.GenerateContentConfig:
+        if thinking_budget is None:
+            thinking_budget = self.sampling_params['thinking_budget']
+        return types.GenerateContentConfig(
+            thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
+            **kwargs
+        )
+
+    def _request(self, message, **config) -> dict:
+        """
+        Неизменные инструкции промпта идут в system_instruction: при одинаковом
+        префиксе Gemini 2.5 применяет неявное кэширование контекста
+        """
+        static, dynamic = split_prompt(message)
+        if static and dynamic:
+            config['system_instruction'] = static
+        return {'contents': dynamic or static, 'config': self._config(**config)}
+
+    @staticmethod
+    def _tools(tools: list) -> list:
+        return [
+            types.Tool(function_declarations=[
+                types.FunctionDeclaration(
+                    name=tool['name'],
+                    description=tool['description'],
+                    parameters_json_schema=tool['parameters'],
+                )
+                for tool in tools
+            ])
+        ]
+
+    async def send(self, message, call_type='default'):
+        response = await self.aio.models.generate_content(
+            model=self.model_name,
+            **self._request(message),
+        )
+        return response.text or ''
+
+    async def stream(self, message, call_type='default'):
+        chunks = await self.aio.models.generate_content_stream(
+            model=self.model_name,
+            **self._request(message),
+        )
+        async for chunk in chunks:
+            if chunk.text:
+                yield chunk.text
 
-    async def send(self, message):
-        response = self.client.models.generate_content(
+    async def stream_with_tools(self, message, tools, call_type='default'):
+        chunks = await self.aio.models.generate_content_stream(
             model=self.model_name,
-            contents=message,
-            config=types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(thinking_budget=-1)
+            **self._request(
+                message,
+                tools=tools.native('gemini', self._tools),
+                automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True),
             ),
         )
-        return response.text
+        async for chunk in chunks:
+            if not chunk.candidates or not chunk.candidates[0].content:
+                continue
+            for part in chunk.candidates[0].content.parts or []:
+                if part.text and not part.thought:
+                    yield text_event(part.text)
+                if part.function_call:
+                    yield tool_call_event(part.function_call.name, dict(part.function_call.args or {}))
 
     async def test(self):
-        response = self.client.models.generate_content(
+        response = await self.aio.models.generate_content(
             model=self.model_name,
             contents='return only one word True if you work normal',
-            config=types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(thinking_budget=0)
-            ),
+            config=self._config(thinking_budget=0),
         )
-        if response.text == 'True':
+        text = (response.text or '').strip()
+        if text == 'True':
             return True
-        raise Exception(response)
+        raise Exception(f"Test failed: {text}")
 
     async def close(self):
+        await self.aio.aclose()
         self.client.close()
@@ -0,0 +1,129 @@
+import asyncio
+
+from ai_browser_agent.app.ports.llm import LLMPort
+from ai_browser_agent.infrastructure.llm.rate_limiter import (
+    LLMGovernor,
+    get_shared_governor,
+    is_retryable,
+    retry_after,
+)
+from ai_browser_agent.shared.constants import (
+    LLM_CALL_DEFAULT,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY,
+)
+from ai_browser_agent.shared.utils import backoff_delay, estimate_tokens
+
+
+class GovernedLLMAdapter(LLMPort):
+    """
+    Обертка адаптера LLM с ограничением частоты запросов и повторами.
+
+    Перед запросом ожидается место в лимитах провайдера (запросы и токены
+    в минуту, одновременные запросы), лимиты общие для всех адаптеров
+    одного провайдера. 429, 5xx и обрывы соединения повторяются с
+    экспоненциальной задержкой и джиттером, не меньше Retry-After; после 429
+    пауза распространяется на все запросы к провайдеру.
+    """
+
+    def __init__(
+            self,
+            adapter: LLMPort,
+            provider: str = 'default',
+            governor: LLMGovernor = None,
+            max_retries: int = LLM_MAX_RETRIES,
+    ):
+        """
+        Args:
+            adapter: Адаптер провайдера
+            provider: Ключ лимитов в LLM_RATE_LIMITS, например 'groq'
+            governor: Набор лимитеров, по умолчанию общий для процесса
+            max_retries: Сколько раз повторять запрос после временной ошибки
+        """
+        self.adapter = adapter
+        self.provider = provider
+        self.model_name = adapter.model_name
+        self.limiter = (governor or get_shared_governor()).limiter(provider)
+        self.max_retries = max_retries
+
+    @property
+    def sampling_params(self) -> dict:
+        return getattr(self.adapter, 'sampling_params', {})
+
+    def _estimate(self, message, tools=None) -> int:
+        """Токены запроса с описанием инструментов плюс предельная длина ответа"""
+        params = self.sampling_params
+        completion = params.get('max_tokens') or params.get('num_predict') or 1000
+        tokens = estimate_tokens(str(message)) + completion
+        if tools is not None:
+            tokens += estimate_tokens(getattr(tools, 'description', ''))
+        return tokens
+
+    async def _backoff(self, error: Exception, attempt: int) -> bool:
+        """Ждет перед повтором; False, если ошибку повторять нельзя или попытки кончились"""
+        if attempt > self.max_retries or not is_retryable(error):
+            return False
+        wait = retry_after(error)
+        if wait:
+            self.limiter.pause(wait)
+        delay = backoff_delay(attempt, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY, minimum=wait)
+        self.limiter.retries += 1
+        print(f'{self.provider}: {type(error).__name__}, повтор {attempt} через {delay:.1f} с')
+        await asyncio.sleep(delay)
+        return True
+
+    async def send(self, message, call_type: str = LLM_CALL_DEFAULT) -> str:
+        tokens = self._estimate(message)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self.limiter.slot(tokens):
+                    return await self.adapter.send(message, call_type=call_type)
+            except Exception as e:
+                if not await self._backoff(e, attempt):
+                    raise
+
+    async def _iterate(self, open_stream, tokens: int):
+        """Поток с повтором, пока не пришел первый кусок; после него повтор продублировал бы начало ответа"""
+        attempt = 0
+        while True:
+            attempt += 1
+            received = False
+            try:
+                async with self.limiter.slot(tokens):
+                    async for chunk in open_stream():
+                        received = True
+                        yield chunk
+                return
+            except Exception as e:
+                if received or not await self._backoff(e, attempt):
+                    raise
+
+    async def stream(self, message, call_type: str = LLM_CALL_DEFAULT):
+        async for chunk in self._iterate(
+                lambda: self.adapter.stream(message, call_type=call_type), self._estimate(message)
+        ):
+            yield chunk
+
+    async def stream_with_tools(self, message, tools, call_type: str = LLM_CALL_DEFAULT):
+        async for event in self._iterate(
+                lambda: self.adapter.stream_with_tools(message, tools, call_type=call_type),
+                self._estimate(message, tools),
+        ):
+            yield event
+
+    async def test(self) -> bool:
+        async with self.limiter.slot(self._estimate('')):
+            return await self.adapter.test()
+
+    async def close(self):
+        await self.adapter.close()
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict: Запросы, ожидание в очереди (среднее и максимум, секунды), 429 и повторы по провайдеру
+        """
+        return self.limiter.get_stats()
@@ -1,27 +1,60 @@
 from ai_browser_agent.app.ports.llm import LLMPort
+from ai_browser_agent.infrastructure.llm.http_transport import PooledHttpTransport, get_shared_transport
+from ai_browser_agent.infrastructure.llm.prompt_format import chat_messages
+from ai_browser_agent.infrastructure.llm.tool_format import OpenAIToolCallAssembler, openai_tools, text_event
 from groq import AsyncGroq
 
 
 class GroqLLMAdapter(LLMPort):
-    def __init__(self, model_name="llama-3.3-70b-versatile", api_key=None):
+    def __init__(self, model_name="llama-3.3-70b-versatile", api_key=None, transport: PooledHttpTransport = None,
+                 max_retries: int = 2):
         if not api_key:
             raise Exception('API key is required')
         self.model_name = model_name
-        self.client = AsyncGroq(api_key=api_key)
+        self.sampling_params = {'max_tokens': 1000}
+        self.transport = transport or get_shared_transport()
+        # max_retries=0, когда повторами управляет GovernedLLMAdapter
+        self.client = AsyncGroq(api_key=api_key, http_client=self.transport.client(), max_retries=max_retries)
 
-    async def send(self, message):
+    async def send(self, message, call_type='default'):
         response = await self.client.chat.completions.create(
             model=self.model_name,
-            messages=[
-                {
-                    "role": "user",
-                    "content": message
-                }
-            ],
-            max_tokens=1000
+            messages=chat_messages(message),
+            **self.sampling_params
         )
         return response.choices[0].message.content
 
+    async def stream(self, message, call_type='default'):
+        response = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=chat_messages(message),
+            stream=True,
+            **self.sampling_params
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def stream_with_tools(self, message, tools, call_type='default'):
+        response = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=chat_messages(message),
+            tools=tools.native('openai', openai_tools),
+            stream=True,
+            **self.sampling_params
+        )
+        calls = OpenAIToolCallAssembler()
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                yield text_event(delta.content)
+            for event in calls.feed(delta.tool_calls):
+                yield event
+        for event in calls.finish():
+            yield event
+
     async def test(self):
         response = await self.client.chat.completions.create(
             model=self.model_name,
@@ -39,5 +72,5 @@ class GroqLLMAdapter(LLMPort):
         raise Exception(f"Test failed: {result}")
 
     async def close(self):
-        # AsyncGroq не требует явного закрытия
-        pass
\ No newline at end of file
+        # пул соединений общий, его закрывает close_shared_transport
+        await self.client.close()
\ No newline at end of file
@@ -1,54 +1,83 @@
 from ai_browser_agent.app.ports.llm import LLMPort
+from ai_browser_agent.infrastructure.llm.http_transport import PooledHttpTransport, get_shared_transport
+from ai_browser_agent.infrastructure.llm.prompt_format import chat_messages
+from ai_browser_agent.infrastructure.llm.tool_format import openai_tools, text_event, tool_call_event
+from ai_browser_agent.shared.constants import OLLAMA_KEEP_ALIVE
 import ollama
-import asyncio
 
 
 class OllamaLLMAdapter(LLMPort):
-    def __init__(self, model_name="qwen2.5:14b", host="http://localhost:11434"):
+    def __init__(self, model_name="qwen2.5:14b", host="http://localhost:11434", transport: PooledHttpTransport = None):
         self.model_name = model_name
         self.host = host
-        self.client = ollama.Client(host=host)
-
-    async def send(self, message):
-        # Ollama работает синхронно, используем run_in_executor
-        loop = asyncio.get_event_loop()
-
-        # Правильный способ - передаем функцию и все аргументы в одном словаре или отдельно
-        response = await loop.run_in_executor(
-            None,
-            lambda: self.client.chat(
-                model=self.model_name,
-                messages=[{"role": "user", "content": message}],
-                options={
-                    "num_predict": 1000,
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "num_gpu": 1,
-                    "num_thread": 8
-                }
-            )
-        )
+        self.sampling_params = {
+            "num_predict": 1000,
+            "temperature": 0.7,
+            "top_p": 0.9,
+        }
+        self.transport = transport or get_shared_transport()
+        # асинхронный клиент поверх общего пула соединений
+        self.client = ollama.AsyncClient(host=host, **self.transport.client_options())
 
+    def _options(self) -> dict:
+        # опции не меняются между запросами: иначе Ollama перезагружает модель и теряет KV-кэш префикса
+        return {
+            **self.sampling_params,
+            "num_gpu": 1,
+            "num_thread": 8
+        }
+
+    async def send(self, message, call_type='default'):
+        response = await self.client.chat(
+            model=self.model_name,
+            messages=chat_messages(message),
+            keep_alive=OLLAMA_KEEP_ALIVE,
+            options=self._options()
+        )
         return response["message"]["content"]
 
+    async def stream(self, message, call_type='default'):
+        chunks = await self.client.chat(
+            model=self.model_name,
+            messages=chat_messages(message),
+            keep_alive=OLLAMA_KEEP_ALIVE,
+            options=self._options(),
+            stream=True,
+        )
+        async for chunk in chunks:
+            if chunk["message"]["content"]:
+                yield chunk["message"]["content"]
+
+    async def stream_with_tools(self, message, tools, call_type='default'):
+        # Ollama присылает каждый вызов инструмента целиком в одном куске потока
+        chunks = await self.client.chat(
+            model=self.model_name,
+            messages=chat_messages(message),
+            keep_alive=OLLAMA_KEEP_ALIVE,
+            options=self._options(),
+            tools=tools.native('openai', openai_tools),
+            stream=True,
+        )
+        async for chunk in chunks:
+            if chunk["message"]["content"]:
+                yield text_event(chunk["message"]["content"])
+            for call in chunk["message"].get("tool_calls") or []:
+                yield tool_call_event(call["function"]["name"], call["function"]["arguments"])
+
     async def test(self):
-        loop = asyncio.get_event_loop()
-
-        response = await loop.run_in_executor(
-            None,
-            lambda: self.client.chat(
-                model=self.model_name,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": "return only one word True if you work normal"
-                    }
-                ],
-                options={
-                    "num_predict": 10,
-                    "temperature": 0
+        response = await self.client.chat(
+            model=self.model_name,
+            messages=[
+                {
+                    "role": "user",
+                    "content": "return only one word True if you work normal"
                 }
-            )
+            ],
+            options={
+                "num_predict": 10,
+                "temperature": 0
+            },
+            keep_alive=OLLAMA_KEEP_ALIVE
         )
 
         content = response["message"]["content"].strip().lower()
@@ -57,5 +86,5 @@ class OllamaLLMAdapter(LLMPort):
         raise Exception(f"Test failed: {content}")
 
     async def close(self):
-        # Ollama клиент не требует явного закрытия
+        # пул соединений общий, его закрывает close_shared_transport
         pass
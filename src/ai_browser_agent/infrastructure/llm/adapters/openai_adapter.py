@@ -1,32 +1,78 @@
 from ai_browser_agent.app.ports.llm import LLMPort
+from ai_browser_agent.infrastructure.llm.http_transport import PooledHttpTransport, get_shared_transport
+from ai_browser_agent.infrastructure.llm.prompt_format import chat_messages
+from ai_browser_agent.infrastructure.llm.tool_format import OpenAIToolCallAssembler, openai_tools, text_event
 from openai import AsyncOpenAI
 from typing import Optional
 
 
 class OpenAILLMAdapter(LLMPort):
-    def __init__(self, model_name="gpt-4o", api_key=None):
+    def __init__(self, model_name="gpt-4o", api_key=None, transport: PooledHttpTransport = None,
+                 max_retries: int = 2):
         if not api_key:
             raise ValueError('API key is required')
 
         self.model_name = model_name
-        self.client = AsyncOpenAI(api_key=api_key, base_url="https://api.zeroeval.com/v1")
+        self.sampling_params = {'max_tokens': 1000}
+        self.transport = transport or get_shared_transport()
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url="https://api.zeroeval.com/v1",
+            http_client=self.transport.client(),
+            # 0, когда повторами управляет GovernedLLMAdapter
+            max_retries=max_retries,
+        )
 
-    async def send(self, message: str) -> str:
+    async def send(self, message: str, call_type: str = 'default') -> str:
         """Отправка сообщения и получение ответа"""
         try:
             response = await self.client.chat.completions.create(
                 model=self.model_name,
-                max_tokens=1000,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": message
-                    }
-                ]
+                **self.sampling_params,
+                messages=chat_messages(message)
             )
             return response.choices[0].message.content or ""
         except Exception as e:
-            raise Exception(f"OpenAI API error: {str(e)}")
+            raise Exception(f"OpenAI API error: {str(e)}") from e
+
+    async def stream(self, message: str, call_type: str = 'default'):
+        """Отправка сообщения и получение ответа кусками по мере генерации"""
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model_name,
+                **self.sampling_params,
+                messages=chat_messages(message),
+                stream=True,
+            )
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"OpenAI API error: {str(e)}") from e
+
+    async def stream_with_tools(self, message: str, tools, call_type: str = 'default'):
+        """Потоковый ответ с вызовами инструментов"""
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model_name,
+                **self.sampling_params,
+                messages=chat_messages(message),
+                tools=tools.native('openai', openai_tools),
+                stream=True,
+            )
+            calls = OpenAIToolCallAssembler()
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    yield text_event(delta.content)
+                for event in calls.feed(delta.tool_calls):
+                    yield event
+            for event in calls.finish():
+                yield event
+        except Exception as e:
+            raise Exception(f"OpenAI API error: {str(e)}") from e
 
     async def test(self) -> bool:
         """Проверка работоспособности API"""
@@ -44,13 +90,11 @@ class OpenAILLMAdapter(LLMPort):
             result = response.choices[0].message.content or ""
             return result.strip() == 'True'
         except Exception as e:
-            raise Exception(f"OpenAI API test failed: {str(e)}")
+            raise Exception(f"OpenAI API test failed: {str(e)}") from e
 
     async def close(self):
-        """Закрытие клиента (для AsyncOpenAI обычно не требуется)"""
-        # AsyncOpenAI не имеет метода close() в текущей версии,
-        # но оставляем для совместимости с интерфейсом
-        pass
+        """Закрытие клиента; общий пул соединений при этом остается открытым"""
+        await self.client.close()
 
     async def __aenter__(self):
         """Поддержка контекстного менеджера"""
@@ -0,0 +1,308 @@
+import asyncio
+import time
+from collections import deque
+
+from ai_browser_agent.app.ports.llm import LLMPort
+from ai_browser_agent.shared.constants import (
+    LLM_CALL_DEFAULT,
+    LLM_ROUTER_COOLDOWN,
+    LLM_ROUTER_HEDGE_DELAY,
+    LLM_ROUTER_HEDGED_CALL_TYPES,
+    LLM_ROUTER_MAX_ERROR_RATE,
+    LLM_ROUTER_MIN_SAMPLES,
+    LLM_ROUTER_WINDOW,
+)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Виды задержки: полный ответ send и время до первого куска потока - разные величины,
+# смешанные в одном окне, они дают p95 потока, которое ответ send почти всегда превышает
+LATENCY_SEND = 'send'
+LATENCY_STREAM = 'stream'
+
+
+class AdapterStats:
+    """Скользящая статистика одного провайдера: задержки успешных запросов по видам и исходы последних запросов"""
+
+    def __init__(self, window: int):
+        self.latencies = {kind: deque(maxlen=window) for kind in (LATENCY_SEND, LATENCY_STREAM)}
+        self.outcomes = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0
+        self.cooldown_until = 0.0
+
+    def record_success(self, latency: float, kind: str = None):
+        """
+        Args:
+            latency: Задержка, секунды
+            kind: LATENCY_SEND или LATENCY_STREAM; None - исход учитывается, задержка нет (проверка адаптера)
+        """
+        self.calls += 1
+        if kind is not None:
+            self.latencies[kind].append(latency)
+        self.outcomes.append(True)
+        self.cooldown_until = 0.0
+
+    def record_error(self):
+        self.calls += 1
+        self.errors += 1
+        self.outcomes.append(False)
+        # две ошибки подряд - провайдер на время выводится из ротации
+        if len(self.outcomes) >= 2 and not self.outcomes[-2]:
+            self.cooldown_until = time.monotonic() + LLM_ROUTER_COOLDOWN
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def p50(self, kind: str) -> float:
+        return percentile(self.latencies[kind], 0.5)
+
+    def expected_latency(self, kind: str) -> float:
+        """
+        Ожидаемое время до успешного ответа: p50, деленное на долю успешных запросов.
+
+        Returns:
+            float: 0 для провайдера без единого исхода, чтобы он получил запросы;
+                   бесконечность, если были ошибки, но нет ни одной успешной задержки этого вида
+        """
+        if not self.outcomes:
+            return 0.0
+        if not self.latencies[kind]:
+            return float('inf') if self.errors else 0.0
+        success_rate = 1 - self.error_rate
+        return self.p50(kind) / success_rate if success_rate else float('inf')
+
+    def p95(self, kind: str) -> float:
+        return percentile(self.latencies[kind], 0.95)
+
+    @property
+    def healthy(self) -> bool:
+        if time.monotonic() < self.cooldown_until:
+            return False
+        return len(self.outcomes) < LLM_ROUTER_MIN_SAMPLES or self.error_rate <= LLM_ROUTER_MAX_ERROR_RATE
+
+
+class RouterLLMAdapter(LLMPort):
+    """
+    Маршрутизатор запросов между несколькими адаптерами LLM.
+
+    Запрос уходит самому быстрому (по p50 с поправкой на долю ошибок) здоровому провайдеру, при ошибке -
+    следующему. Задержки send и потоков считаются отдельно. Для типов запросов из hedged_call_types, если ответа нет
+    дольше p95 основного провайдера, параллельно отправляется дублирующий
+    запрос следующему, берется первый ответ, проигравший запрос отменяется.
+    Для потоковых ответов задержка - время до первого куска.
+    """
+
+    def __init__(
+            self,
+            adapters: list,
+            hedge: bool = True,
+            hedge_delay: float = None,
+            hedged_call_types: tuple = LLM_ROUTER_HEDGED_CALL_TYPES,
+            window: int = LLM_ROUTER_WINDOW,
+    ):
+        """
+        Args:
+            adapters: Адаптеры в порядке предпочтения, пока о них нет статистики
+            hedge: Отправлять дублирующие запросы
+            hedge_delay: Фиксированная задержка перед дублирующим запросом, секунды.
+                         None - p95 основного провайдера
+            hedged_call_types: Типы запросов, которые можно дублировать
+            window: Сколько последних запросов учитывать в статистике
+        """
+        if not adapters:
+            raise ValueError('Нужен хотя бы один адаптер LLM')
+        self.adapters = list(adapters)
+        self.model_name = '|'.join(adapter.model_name for adapter in self.adapters)
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedged_call_types = hedged_call_types
+        self.stats = {id(adapter): AdapterStats(window) for adapter in self.adapters}
+
+    @property
+    def sampling_params(self) -> dict:
+        return {adapter.model_name: getattr(adapter, 'sampling_params', {}) for adapter in self.adapters}
+
+    def ranked(self, kind: str = LATENCY_SEND) -> list:
+        """
+        Здоровые адаптеры от самого быстрого с учетом доли ошибок по задержке вида kind,
+        за ними остальные - как последний шанс
+        """
+        position = {id(adapter): index for index, adapter in enumerate(self.adapters)}
+
+        def order(adapter):
+            stats = self.stats[id(adapter)]
+            # нулевой приоритет только у провайдера без исходов; падавший без успехов идет последним
+            return stats.expected_latency(kind), stats.error_rate, position[id(adapter)]
+
+        healthy = [adapter for adapter in self.adapters if self.stats[id(adapter)].healthy]
+        unhealthy = [adapter for adapter in self.adapters if not self.stats[id(adapter)].healthy]
+        return sorted(healthy, key=order) + sorted(unhealthy, key=lambda adapter: self.stats[id(adapter)].error_rate)
+
+    def _delay_before_hedge(self, adapter, kind: str) -> float:
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        stats = self.stats[id(adapter)]
+        if len(stats.latencies[kind]) < LLM_ROUTER_MIN_SAMPLES:
+            return LLM_ROUTER_HEDGE_DELAY
+        return stats.p95(kind)
+
+    async def _timed(self, adapter, call, kind: str = None):
+        started = time.monotonic()
+        try:
+            result = await call(adapter)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stats[id(adapter)].record_error()
+            raise
+        self.stats[id(adapter)].record_success(time.monotonic() - started, kind)
+        return result
+
+    async def _race(self, call, call_type: str, kind: str, discard=None):
+        """
+        Выполняет call(adapter) на лучшем адаптере с дублированием и переходом на следующий при ошибке.
+
+        Args:
+            call: Функция адаптер -> корутина
+            call_type: Тип запроса
+            kind: Вид задержки для выбора провайдера и момента дублирования
+            discard: Корутина-функция для результатов проигравших запросов, завершившихся одновременно
+
+        Returns:
+            Результат первого успешного вызова
+        """
+        candidates = iter(self.ranked(kind))
+        primary = next(candidates)
+        hedges_left = 1 if self.hedge and call_type in self.hedged_call_types else 0
+        pending = {}
+        errors = []
+
+        def start(adapter):
+            pending[asyncio.create_task(self._timed(adapter, call, kind))] = adapter
+
+        start(primary)
+        next_adapter = next(candidates, None)
+        winner = None
+        try:
+            while pending:
+                timeout = None
+                if hedges_left and next_adapter is not None:
+                    timeout = self._delay_before_hedge(primary, kind)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedges_left -= 1
+                    self.stats[id(next_adapter)].hedges += 1
+                    start(next_adapter)
+                    next_adapter = next(candidates, None)
+                    continue
+
+                failed = False
+                for task in done:
+                    adapter = pending.pop(task)
+                    if task.exception() is not None:
+                        print(f'{type(adapter).__name__} {adapter.model_name}: {task.exception()}')
+                        errors.append(task.exception())
+                        failed = True
+                    elif winner is None:
+                        winner = task
+                    elif discard is not None:
+                        await discard(task.result())
+                if winner is not None:
+                    return winner.result()
+
+                # упавший запрос заменяется запросом к следующему провайдеру
+                if failed and next_adapter is not None:
+                    start(next_adapter)
+                    next_adapter = next(candidates, None)
+            raise errors[-1]
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def send(self, message, call_type: str = LLM_CALL_DEFAULT) -> str:
+        return await self._race(lambda adapter: adapter.send(message, call_type=call_type), call_type, LATENCY_SEND)
+
+    async def _iterate(self, open_stream, call_type: str):
+        """Поток лучшего провайдера; гонка идет до первого куска, дальше читается только победитель"""
+
+        async def first_chunk(adapter):
+            stream = open_stream(adapter)
+            try:
+                return stream, await anext(stream)
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        async def close(opened):
+            await opened[0].aclose()
+
+        stream, first = await self._race(first_chunk, call_type, LATENCY_STREAM, discard=close)
+        if first is None:
+            return
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def stream(self, message, call_type: str = LLM_CALL_DEFAULT):
+        async for chunk in self._iterate(lambda adapter: adapter.stream(message, call_type=call_type), call_type):
+            yield chunk
+
+    async def stream_with_tools(self, message, tools, call_type: str = LLM_CALL_DEFAULT):
+        async for event in self._iterate(
+                lambda adapter: adapter.stream_with_tools(message, tools, call_type=call_type), call_type
+        ):
+            yield event
+
+    async def test(self) -> bool:
+        """Проверяет все адаптеры; достаточно одного рабочего, неработающие уходят в конец очереди.
+        Короткие проверочные запросы не попадают в статистику задержек"""
+        results = await asyncio.gather(*(self._timed(adapter, lambda a: a.test()) for adapter in self.adapters),
+                                       return_exceptions=True)
+        for adapter, result in zip(self.adapters, results):
+            if isinstance(result, BaseException):
+                print(f'{type(adapter).__name__} {adapter.model_name} недоступен: {result}')
+        if any(result is True for result in results):
+            return True
+        raise Exception(f'Ни один адаптер LLM не прошел проверку: {results}')
+
+    async def close(self):
+        await asyncio.gather(*(adapter.close() for adapter in self.adapters), return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict: По каждому адаптеру - p50 и p95 задержки send и до первого куска потока в секундах,
+                  доля ошибок, запросы и дубли
+        """
+        return {
+            f'{type(adapter).__name__}:{adapter.model_name}': {
+                'send_p50': round(self.stats[id(adapter)].p50(LATENCY_SEND), 3),
+                'send_p95': round(self.stats[id(adapter)].p95(LATENCY_SEND), 3),
+                'stream_p50': round(self.stats[id(adapter)].p50(LATENCY_STREAM), 3),
+                'stream_p95': round(self.stats[id(adapter)].p95(LATENCY_STREAM), 3),
+                'error_rate': round(self.stats[id(adapter)].error_rate, 3),
+                'calls': self.stats[id(adapter)].calls,
+                'hedges': self.stats[id(adapter)].hedges,
+                'healthy': self.stats[id(adapter)].healthy,
+            }
+            for adapter in self.adapters
+        }
@@ -0,0 +1,110 @@
+import importlib.util
+
+import httpx
+
+from ai_browser_agent.shared.constants import (
+    LLM_HTTP2,
+    LLM_HTTP_CONNECT_TIMEOUT,
+    LLM_HTTP_KEEPALIVE_EXPIRY,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP_MAX_KEEPALIVE,
+    LLM_HTTP_READ_TIMEOUT,
+)
+
+
+class PooledHttpTransport(httpx.AsyncHTTPTransport):
+    """
+    Общий пул HTTP-соединений для адаптеров LLM (Groq, OpenAI-совместимые, Ollama).
+
+    Соединения переиспользуются между адаптерами и запросами (keep-alive,
+    HTTP/2 при установленном пакете h2), поэтому TLS-рукопожатие не
+    повторяется на каждом шаге агента. Клиенты SDK закрывают транспорт при
+    своем закрытии, поэтому aclose здесь ничего не делает - пул закрывает
+    только его владелец через close.
+    """
+
+    def __init__(
+            self,
+            max_connections: int = LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive: int = LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry: float = LLM_HTTP_KEEPALIVE_EXPIRY,
+            connect_timeout: float = LLM_HTTP_CONNECT_TIMEOUT,
+            read_timeout: float = LLM_HTTP_READ_TIMEOUT,
+            http2: bool = LLM_HTTP2,
+    ):
+        # HTTP/2 требует пакет h2, без него остаемся на HTTP/1.1 с keep-alive
+        self.http2 = http2 and importlib.util.find_spec('h2') is not None
+        super().__init__(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            http2=self.http2,
+            retries=1,
+        )
+        self.max_connections = max_connections
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.requests = 0
+        self.in_flight = 0
+        self.errors = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def client(self, **kwargs) -> httpx.AsyncClient:
+        """httpx-клиент поверх общего пула, например для http_client= в SDK"""
+        return httpx.AsyncClient(**self.client_options(), **kwargs)
+
+    def client_options(self) -> dict:
+        """Аргументы httpx.AsyncClient для SDK, которые создают клиента сами (Ollama)"""
+        return {'transport': self, 'timeout': self.timeout}
+
+    async def aclose(self):
+        pass
+
+    async def close(self):
+        """Закрывает все соединения пула"""
+        await super().aclose()
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            dict: Запросы всего и в ожидании ответа, ошибки, открытые и простаивающие соединения
+        """
+        connections = list(getattr(self._pool, 'connections', []))
+        return {
+            'http2': self.http2,
+            'requests': self.requests,
+            'in_flight': self.in_flight,
+            'errors': self.errors,
+            'connections': len(connections),
+            'idle_connections': sum(1 for connection in connections if connection.is_idle()),
+            'max_connections': self.max_connections,
+        }
+
+
+_shared_transport = None
+
+
+def get_shared_transport() -> PooledHttpTransport:
+    """Транспорт, общий для всех адаптеров процесса; создается при первом обращении"""
+    global _shared_transport
+    if _shared_transport is None:
+        _shared_transport = PooledHttpTransport()
+    return _shared_transport
+
+
+async def close_shared_transport():
+    global _shared_transport
+    if _shared_transport is not None:
+        await _shared_transport.close()
+        _shared_transport = None
@@ -0,0 +1,16 @@
+from ai_browser_agent.shared.prompt import split_prompt
+
+
+def chat_messages(message) -> list:
+    """
+    Сообщения для chat-API (OpenAI, Groq, Ollama): неизменные инструкции
+    идут отдельным системным сообщением в начале, чтобы префикс запроса
+    совпадал между вызовами и попадал в кэш провайдера.
+    """
+    static, dynamic = split_prompt(message)
+    if not static or not dynamic:
+        return [{"role": "user", "content": static or dynamic}]
+    return [
+        {"role": "system", "content": static},
+        {"role": "user", "content": dynamic},
+    ]
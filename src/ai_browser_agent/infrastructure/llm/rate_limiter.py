@@ -0,0 +1,196 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+
+from ai_browser_agent.shared.constants import LLM_RATE_LIMITS, LLM_RETRY_ERRORS, LLM_RETRY_STATUSES
+
+
+class TokenBucket:
+    """
+    Ведро токенов с равномерным пополнением: capacity единиц в минуту.
+
+    Запрос больше емкости ведра урезается до емкости, иначе он ждал бы вечно.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        amount = min(float(amount), self.capacity)
+        # очередь честная: пока первый ждет пополнения, остальные не обгоняют его
+        async with self.lock:
+            self._refill()
+            while self.available < amount:
+                await asyncio.sleep((amount - self.available) / self.rate)
+                self._refill()
+            self.available -= amount
+
+    def drain(self):
+        """Обнуляет запас, например после 429: провайдер считает лимит иначе, чем мы"""
+        self._refill()
+        self.available = 0.0
+
+
+class ProviderLimiter:
+    """Лимиты одного провайдера: запросы и токены в минуту, число одновременных запросов и общая пауза после 429"""
+
+    def __init__(self, rpm: float = None, tpm: float = None, max_in_flight: int = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_in_flight = max_in_flight
+        self.semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+        self.paused_until = 0.0
+        self.in_flight = 0
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    @asynccontextmanager
+    async def slot(self, tokens: int):
+        """
+        Ожидает очереди на запрос и держит слот, пока запрос выполняется.
+
+        Args:
+            tokens: Оценка токенов запроса вместе с ответом
+        """
+        started = time.monotonic()
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
+        try:
+            while (pause := self.paused_until - time.monotonic()) > 0:
+                await asyncio.sleep(pause)
+            if self.requests is not None:
+                await self.requests.acquire(1)
+            if self.tokens is not None:
+                await self.tokens.acquire(tokens)
+
+            waited = time.monotonic() - started
+            self.calls += 1
+            self.queue_wait_total += waited
+            self.queue_wait_max = max(self.queue_wait_max, waited)
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+        finally:
+            if self.semaphore is not None:
+                self.semaphore.release()
+
+    def pause(self, seconds: float):
+        """Приостанавливает все запросы к провайдеру, а не только повтор упавшего"""
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.drain()
+
+    def get_stats(self) -> dict:
+        return {
+            'calls': self.calls,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'throttled': self.throttled,
+            'retries': self.retries,
+            'queue_wait_avg': round(self.queue_wait_total / self.calls, 3) if self.calls else 0.0,
+            'queue_wait_max': round(self.queue_wait_max, 3),
+        }
+
+
+class LLMGovernor:
+    """Лимитеры провайдеров LLM, общие для всех адаптеров процесса"""
+
+    def __init__(self, limits: dict = None):
+        """
+        Args:
+            limits: Провайдер -> {'rpm', 'tpm', 'max_in_flight'}, поверх LLM_RATE_LIMITS
+        """
+        self.limits = {**LLM_RATE_LIMITS, **(limits or {})}
+        self.limiters = {}
+
+    def limiter(self, provider: str) -> ProviderLimiter:
+        if provider not in self.limiters:
+            self.limiters[provider] = ProviderLimiter(**self.limits.get(provider, self.limits['default']))
+        return self.limiters[provider]
+
+    def get_stats(self) -> dict:
+        return {provider: limiter.get_stats() for provider, limiter in self.limiters.items()}
+
+
+def _error_chain(error: Exception):
+    """Исключение и его причины: адаптеры оборачивают ошибки SDK через raise ... from e"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__
+
+
+def error_status(error: Exception):
+    """Код HTTP-ответа из исключения SDK (Groq, OpenAI, Anthropic, Gemini, Ollama) или его причины, если он есть"""
+    for cause in _error_chain(error):
+        for attribute in ('status_code', 'code', 'status'):
+            status = getattr(cause, attribute, None)
+            if isinstance(status, int):
+                return status
+        status = getattr(getattr(cause, 'response', None), 'status_code', None)
+        if status is not None:
+            return status
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    status = error_status(error)
+    if status is not None:
+        return status in LLM_RETRY_STATUSES
+    return any(
+        type(cause).__name__ in LLM_RETRY_ERRORS or isinstance(cause, (ConnectionError, TimeoutError))
+        for cause in _error_chain(error)
+    )
+
+
+def retry_after(error: Exception) -> float:
+    """
+    Returns:
+        float: Пауза из заголовков retry-after-ms или Retry-After (секунды или дата), 0 если их нет
+    """
+    headers = {}
+    for cause in _error_chain(error):
+        headers = getattr(getattr(cause, 'response', None), 'headers', None) or {}
+        if headers:
+            break
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        value = headers.get('retry-after')
+        if not value:
+            return 0.0
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+_shared_governor = None
+
+
+def get_shared_governor() -> LLMGovernor:
+    """Общий для процесса набор лимитеров; создается при первом обращении"""
+    global _shared_governor
+    if _shared_governor is None:
+        _shared_governor = LLMGovernor()
+    return _shared_governor
@@ -0,0 +1,90 @@
+import json
+
+
+def text_event(text: str) -> dict:
+    return {'type': 'text', 'text': text}
+
+
+def tool_call_event(name: str, arguments) -> dict:
+    """
+    Args:
+        name: Имя вызванного инструмента
+        arguments: Аргументы вызова; если модель прислала невалидный JSON - исходная строка,
+                   ее отклонит проверка действия, и модель увидит ошибку в last_actions
+    """
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments) if arguments.strip() else {}
+        except ValueError:
+            pass
+    return {'type': 'tool_call', 'name': name, 'arguments': arguments}
+
+
+def openai_tools(tools: list) -> list:
+    """Формат tools для OpenAI-совместимых API (OpenAI, Groq, Ollama)"""
+    return [
+        {
+            'type': 'function',
+            'function': {
+                'name': tool['name'],
+                'description': tool['description'],
+                'parameters': tool['parameters'],
+            },
+        }
+        for tool in tools
+    ]
+
+
+def anthropic_tools(tools: list) -> list:
+    return [
+        {
+            'name': tool['name'],
+            'description': tool['description'],
+            'input_schema': tool['parameters'],
+        }
+        for tool in tools
+    ]
+
+
+class OpenAIToolCallAssembler:
+    """
+    Собирает вызовы инструментов из потоковых дельт OpenAI-совместимого API.
+
+    Аргументы приходят кусками с индексом вызова; вызов считается законченным,
+    когда начинается следующий или заканчивается поток.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.current = None
+
+    def feed(self, deltas) -> list:
+        """
+        Args:
+            deltas: delta.tool_calls очередного куска потока
+
+        Returns:
+            list: События tool_call для закончившихся вызовов
+        """
+        completed = []
+        for delta in deltas or []:
+            if delta.index != self.current and self.current is not None:
+                completed.extend(self._pop(self.current))
+            self.current = delta.index
+            call = self.calls.setdefault(delta.index, {'name': '', 'arguments': ''})
+            if delta.function is not None:
+                call['name'] += delta.function.name or ''
+                call['arguments'] += delta.function.arguments or ''
+        return completed
+
+    def finish(self) -> list:
+        completed = []
+        for index in sorted(self.calls):
+            completed.extend(self._pop(index))
+        return completed
+
+    def _pop(self, index) -> list:
+        call = self.calls.pop(index, None)
+        if call is None:
+            return []
+        return [tool_call_event(call['name'], call['arguments'])]
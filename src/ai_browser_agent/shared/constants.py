@@ -0,0 +1,244 @@
+# Снимок DOM
+DOM_SNAPSHOT_MAX_DEPTH = 5
+DOM_SNAPSHOT_MAX_NODES = 1500
+DOM_SNAPSHOT_TEXT_LIMIT = 100
+DOM_SNAPSHOT_SKIP_TAGS = ('script', 'style', 'noscript', 'iframe', 'template', 'next-route-announcer')
+
+# Индекс интерактивных элементов
+ELEMENT_INDEX_MAX_ELEMENTS = 300
+ELEMENT_INDEX_TEXT_LIMIT = 60
+ELEMENT_INDEX_INTERACTIVE_SELECTORS = (
+    'a[href]',
+    'button',
+    'input:not([type="hidden"])',
+    'textarea',
+    'select',
+    'summary',
+    '[contenteditable=""]',
+    '[contenteditable="true"]',
+    '[role="button"]',
+    '[role="link"]',
+    '[role="textbox"]',
+    '[role="searchbox"]',
+    '[role="combobox"]',
+    '[role="checkbox"]',
+    '[role="radio"]',
+    '[role="switch"]',
+    '[role="tab"]',
+    '[role="menuitem"]',
+    '[role="option"]',
+    '[onclick]',
+)
+
+# Кэш селекторов
+SELECTOR_CACHE_PATH = '~/.cache/ai_browser_agent/selectors.json'
+SELECTOR_CACHE_MAX_ENTRIES = 2000
+SELECTOR_CACHE_TTL = 7 * 24 * 60 * 60
+# доля слов текста элемента, которая должна совпасть с сохраненной, чтобы селектор из кэша считался тем же элементом
+SELECTOR_CACHE_MIN_TEXT_OVERLAP = 0.5
+
+# Отслеживание изменений DOM
+DOM_CHANGES_LOG_LIMIT = 1000
+DOM_CHANGES_RESULT_LIMIT = 40
+DOM_SNAPSHOTS_LIMIT = 100
+DOM_CHANGES_ATTRIBUTES = (
+    'class', 'style', 'hidden', 'disabled', 'value', 'open',
+    'aria-expanded', 'aria-hidden', 'aria-selected', 'aria-checked', 'aria-disabled',
+)
+
+# Сериализация DOM для промптов
+DOM_SERIALIZER_TOKEN_BUDGET = 3000
+DOM_SERIALIZER_ATTRIBUTES = (
+    'id', 'name', 'type', 'role', 'aria-label', 'placeholder', 'title', 'alt', 'href', 'value', 'data-testid',
+)
+DOM_SERIALIZER_ATTRIBUTE_LIMIT = 60
+DOM_SERIALIZER_CLASS_LIMIT = 3
+INTERACTIVE_TAGS = ('a', 'button', 'input', 'textarea', 'select', 'summary', 'label', 'option')
+INTERACTIVE_ROLES = (
+    'button', 'link', 'textbox', 'searchbox', 'combobox', 'checkbox', 'radio',
+    'switch', 'tab', 'menuitem', 'option',
+)
+
+# Ожидание готовности страницы, миллисекунды
+READY_TIMEOUT = 10000
+READY_AFTER_ACTION_TIMEOUT = 3000
+READY_NETWORK_QUIET = 500
+READY_DOM_QUIET = 300
+READY_POLL_INTERVAL = 100
+# запросы дольше этого порога (long polling, стриминг) не мешают считать сеть свободной
+READY_LONG_REQUEST = 5000
+READY_IGNORED_RESOURCE_TYPES = ('websocket', 'eventsource')
+
+# Пул контекстов браузера
+BROWSER_POOL_MAX_SIZE = 4
+
+# Пометка в docstring методов браузера, которые не показываются LLM как действия
+NOT_FOR_AI_MARKER = 'Метод не для использования ИИ.'
+
+# Фильтрация сетевых запросов
+REQUEST_FILTER_BLOCKED_TYPES = ('image', 'media', 'font')
+REQUEST_FILTER_TRACKER_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'googlesyndication.com',
+    'mc.yandex.ru',
+    'an.yandex.ru',
+    'top-fwz1.mail.ru',
+    'connect.facebook.net',
+    'hotjar.com',
+    'criteo.com',
+    'mindbox.ru',
+)
+# средний размер заблокированного ресурса по типу, байты - для оценки сэкономленного трафика
+REQUEST_FILTER_AVERAGE_SIZES = {
+    'image': 40_000,
+    'media': 500_000,
+    'font': 30_000,
+    'script': 25_000,
+    'stylesheet': 15_000,
+}
+REQUEST_FILTER_DEFAULT_SIZE = 5_000
+
+# Запуск браузера
+BROWSER_VIEWPORT = {'width': 1366, 'height': 900}
+# где искать установленный Google Chrome, чтобы не тратить неудачный запуск channel="chrome"
+CHROME_EXECUTABLE_PATHS = (
+    '/usr/bin/google-chrome',
+    '/usr/bin/google-chrome-stable',
+    '/opt/google/chrome/chrome',
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+    r'C:\Program Files\Google\Chrome\Application\chrome.exe',
+    r'C:\Program Files (x86)\Google\Chrome\Application\chrome.exe',
+)
+
+# Лучевой поиск селектора по дереву DOM
+SELECTOR_BEAM_WIDTH = 3
+SELECTOR_BEAM_MAX_WAVES = 6
+
+# Локальный ранжировщик элементов
+ELEMENT_RANKER_SHORTLIST = 15
+# лучший кандидат выбирается без LLM, если он во столько раз лучше второго
+ELEMENT_RANKER_MARGIN = 2.0
+# и покрывает такую долю слов описания
+ELEMENT_RANKER_MIN_COVERAGE = 0.6
+# запасной локатор по ближайшему элементу индекса - только при такой оценке BM25 и выше
+SELECTOR_FALLBACK_MIN_SCORE = 1.0
+
+# Пакетная проверка селекторов
+PROBE_TEXT_LIMIT = 80
+
+# Выполнение действий в браузере, миллисекунды
+ACTION_TIMEOUT = 5000
+# роли элементов, подходящих для действия, - для запасных локаторов
+ACTION_ROLES = {
+    'click': ('button', 'link', 'menuitem', 'tab', 'option', 'checkbox', 'radio', 'switch'),
+    'type_into': ('textbox', 'searchbox', 'combobox'),
+    'press': ('textbox', 'searchbox', 'combobox', 'button', 'link'),
+}
+# верхняя граница выполнения одного действия, секунды
+ACTION_EXECUTION_TIMEOUT = 30
+ACTION_EXECUTION_TIMEOUTS = {
+    'open_url': 45,
+    'get_element_selector_by_description': 120,
+}
+
+# Типы запросов к LLM - по ним настраиваются кэширование и выбор модели
+LLM_CALL_DEFAULT = 'default'
+LLM_CALL_TEST = 'test'
+LLM_CALL_EXTRACT_TASK = 'extract_task'
+LLM_CALL_PLAN = 'plan'
+LLM_CALL_STEP_ACTIONS = 'step_actions'
+LLM_CALL_SELECTOR = 'selector'
+LLM_CALL_CONFIRMATION = 'confirmation'
+
+# Кэш ответов LLM
+LLM_CACHE_PATH = '~/.cache/ai_browser_agent/llm'
+LLM_CACHE_MEMORY_ENTRIES = 256
+LLM_CACHE_DISK_MAX_BYTES = 50 * 1024 * 1024
+# время жизни ответа по типу запроса, секунды; 0 - не кэшировать
+LLM_CACHE_TTLS = {
+    LLM_CALL_DEFAULT: 60 * 60,
+    LLM_CALL_TEST: 24 * 60 * 60,
+    LLM_CALL_EXTRACT_TASK: 7 * 24 * 60 * 60,
+    LLM_CALL_PLAN: 7 * 24 * 60 * 60,
+    # промпт содержит кусок DOM, поэтому повтор возможен только на той же странице
+    LLM_CALL_SELECTOR: 60 * 60,
+    # ответ зависит от хода выполнения, повтор того же промпта обычно означает, что прошлый ответ не помог
+    LLM_CALL_STEP_ACTIONS: 0,
+    LLM_CALL_CONFIRMATION: 0,
+}
+
+# Общий HTTP-транспорт адаптеров LLM
+LLM_HTTP_MAX_CONNECTIONS = 20
+LLM_HTTP_MAX_KEEPALIVE = 10
+# сколько держать простаивающее соединение открытым, секунды
+LLM_HTTP_KEEPALIVE_EXPIRY = 60
+LLM_HTTP_CONNECT_TIMEOUT = 5
+# ответ модели может генерироваться долго, особенно у локальной Ollama
+LLM_HTTP_READ_TIMEOUT = 120
+LLM_HTTP2 = True
+
+# Сколько Ollama держит модель и ее KV-кэш в памяти после запроса
+OLLAMA_KEEP_ALIVE = '30m'
+
+# Маршрутизация запросов между провайдерами LLM
+# сколько последних запросов учитывать в задержках и доле ошибок
+LLM_ROUTER_WINDOW = 50
+# провайдер с большей долей ошибок считается нездоровым
+LLM_ROUTER_MAX_ERROR_RATE = 0.5
+# минимум запросов, после которого статистике провайдера можно доверять
+LLM_ROUTER_MIN_SAMPLES = 5
+# после ошибки подряд провайдер пропускается на это время, секунды
+LLM_ROUTER_COOLDOWN = 30
+# дублирующий запрос отправляется, если ответа нет дольше p95 основного провайдера,
+# а пока статистики мало - через это время, секунды
+LLM_ROUTER_HEDGE_DELAY = 5.0
+LLM_ROUTER_HEDGED_CALL_TYPES = (LLM_CALL_PLAN, LLM_CALL_STEP_ACTIONS, LLM_CALL_EXTRACT_TASK)
+
+# Ограничение частоты запросов к провайдерам LLM
+# запросы и токены в минуту, одновременные запросы; None - без ограничения
+LLM_RATE_LIMITS = {
+    'default': {'rpm': 60, 'tpm': 60_000, 'max_in_flight': 4},
+    'groq': {'rpm': 30, 'tpm': 12_000, 'max_in_flight': 4},
+    # у Groq лимиты считаются по модели, маленькая модель расходует свои
+    'groq_small': {'rpm': 30, 'tpm': 6_000, 'max_in_flight': 4},
+    'openai': {'rpm': 500, 'tpm': 30_000, 'max_in_flight': 8},
+    'anthropic': {'rpm': 50, 'tpm': 30_000, 'max_in_flight': 4},
+    'gemini': {'rpm': 10, 'tpm': 250_000, 'max_in_flight': 4},
+    # локальная модель обрабатывает запросы по одному, остальные все равно ждут в ее очереди
+    'ollama': {'rpm': None, 'tpm': None, 'max_in_flight': 1},
+}
+# сколько раз повторять запрос после 429, 5xx или обрыва соединения
+LLM_MAX_RETRIES = 4
+# экспоненциальная задержка между повторами с полным джиттером, секунды
+LLM_RETRY_BASE_DELAY = 1.0
+LLM_RETRY_MAX_DELAY = 60.0
+LLM_RETRY_STATUSES = (408, 409, 429, 500, 502, 503, 504, 529)
+# ошибки SDK без кода ответа, после которых запрос можно повторить
+LLM_RETRY_ERRORS = ('APIConnectionError', 'APITimeoutError', 'ConnectError', 'ReadTimeout', 'RemoteProtocolError')
+
+# Задержка между попытками выполнить шаг плана, секунды
+STEP_RETRY_BASE_DELAY = 1.0
+STEP_RETRY_MAX_DELAY = 10.0
+
+# Уровни моделей: маленькая быстрая для классификации, большая для плана и действий
+LLM_TIER_SMALL = 'small'
+LLM_TIER_LARGE = 'large'
+# от дешевого к дорогому; неразобранный ответ уходит на следующий уровень
+LLM_TIERS = (LLM_TIER_SMALL, LLM_TIER_LARGE)
+LLM_CALL_TIERS = {
+    LLM_CALL_EXTRACT_TASK: LLM_TIER_SMALL,
+    LLM_CALL_CONFIRMATION: LLM_TIER_SMALL,
+    LLM_CALL_PLAN: LLM_TIER_LARGE,
+    LLM_CALL_STEP_ACTIONS: LLM_TIER_LARGE,
+    LLM_CALL_SELECTOR: LLM_TIER_LARGE,
+}
+GROQ_SMALL_MODEL = 'llama-3.1-8b-instant'
+
+# Локальная классификация сообщений пользователя (подтверждения, задачи)
+# ниже этой вероятности решение принимает LLM
+INTENT_CONFIDENCE = 0.85
+INTENT_TRAIN_EPOCHS = 300
+INTENT_LEARNING_RATE = 1.0
+INTENT_L2 = 0.001
@@ -0,0 +1,12 @@
+class ElementNotFoundError(Exception):
+    """
+    По селектору и запасным локаторам не нашлось ровно одного видимого элемента
+    """
+
+    def __init__(self, selector, tried=None):
+        self.selector = selector
+        self.tried = tried or []
+        message = f'Элемент не найден: {selector}'
+        if self.tried:
+            message += f". Проверены запасные варианты: {', '.join(self.tried)}"
+        super().__init__(message)
@@ -0,0 +1,131 @@
+import json
+
+
+class ActionStreamParser:
+    """
+    Инкрементальный разбор ответа LLM вида {"thought": ..., "actions": [...], ...}.
+
+    feed принимает очередной кусок текста и возвращает элементы массива
+    "actions", которые закрылись в этом куске, поэтому первое действие можно
+    выполнять, пока модель еще пишет остальные. Текст до первой "{" (например,
+    маркеры кода) пропускается.
+    """
+
+    def __init__(self, key: str = 'actions'):
+        self.key = key
+        self.buffer = ''
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_string = None
+        # после "actions": ждем начала массива
+        self.awaiting_value = False
+        # глубина вложенности внутри массива actions и начало его текущего элемента
+        self.array_depth = None
+        self.element_start = None
+        self.object_start = None
+        self.object_end = None
+        self.emitted = 0
+
+    def feed(self, chunk: str) -> list:
+        """
+        Args:
+            chunk: Очередной кусок ответа
+
+        Returns:
+            list: Закрывшиеся элементы массива actions (обычно dict)
+        """
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+        while self.position < len(buffer):
+            char = buffer[self.position]
+            index = self.position
+            self.position += 1
+
+            if self.object_end is not None:
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.array_depth is None:
+                        self.last_string = buffer[self.string_start + 1:index]
+                continue
+
+            if self.object_start is None:
+                if char == '{':
+                    self.object_start = index
+                    self.depth = 1
+                continue
+
+            if char.isspace():
+                continue
+
+            if self.awaiting_value:
+                self.awaiting_value = False
+                if char == '[':
+                    self.depth += 1
+                    self.array_depth = self.depth
+                    continue
+
+            if char == '"':
+                self.in_string = True
+                self.string_start = index
+                if self.array_depth is not None and self.depth == self.array_depth and self.element_start is None:
+                    self.element_start = index
+            elif char == ':':
+                if self.depth == 1 and self.array_depth is None and self.last_string == self.key:
+                    self.awaiting_value = True
+                self.last_string = None
+            elif char in '{[':
+                if self.array_depth is not None and self.depth == self.array_depth:
+                    self.element_start = index
+                self.depth += 1
+            elif char in '}]':
+                if self.array_depth is not None and self.depth == self.array_depth and self.element_start is not None:
+                    # массив закрылся сразу после скалярного элемента
+                    completed.extend(self._emit(buffer[self.element_start:index].strip()))
+                self.depth -= 1
+                if self.array_depth is not None:
+                    if self.depth < self.array_depth:
+                        self.array_depth = None
+                        self.element_start = None
+                    elif self.depth == self.array_depth and self.element_start is not None:
+                        completed.extend(self._emit(buffer[self.element_start:index + 1]))
+                if self.depth == 0:
+                    self.object_end = index
+            elif char == ',':
+                if self.array_depth is not None and self.depth == self.array_depth and self.element_start is not None:
+                    # скалярный элемент массива, например строка
+                    completed.extend(self._emit(buffer[self.element_start:index].strip()))
+            elif self.array_depth is not None and self.depth == self.array_depth and self.element_start is None:
+                # число, true, false или null
+                self.element_start = index
+        return completed
+
+    def _emit(self, text: str) -> list:
+        self.element_start = None
+        try:
+            element = json.loads(text)
+        except ValueError:
+            return []
+        self.emitted += 1
+        return [element]
+
+    def result(self) -> dict:
+        """
+        Полный ответ после окончания потока.
+
+        Raises:
+            ValueError: Ответ не является корректным JSON-объектом
+        """
+        if self.object_start is not None and self.object_end is not None:
+            return json.loads(self.buffer[self.object_start:self.object_end + 1])
+        return json.loads(self.buffer)
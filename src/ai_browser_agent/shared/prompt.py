@@ -0,0 +1,39 @@
+import inspect
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """
+    Промпт из двух частей: неизменных инструкций и данных конкретного вызова.
+
+    static_prefix должен быть побайтно одинаковым между вызовами (без задачи,
+    контекста, DOM), тогда провайдер может переиспользовать уже обработанный
+    префикс: cache_control у Anthropic, автоматическое кэширование префикса
+    у OpenAI, Groq и Gemini, KV-кэш загруженной модели у Ollama.
+    """
+    static_prefix: str
+    dynamic_suffix: str = ''
+
+    @classmethod
+    def from_template(cls, instructions: str, dynamic_suffix: str = '') -> 'Prompt':
+        """Обе части из многострочных строк с отступами приводятся к одному виду"""
+        return cls(inspect.cleandoc(instructions), inspect.cleandoc(dynamic_suffix))
+
+    def __str__(self):
+        if not self.dynamic_suffix:
+            return self.static_prefix
+        return f'{self.static_prefix}\n\n{self.dynamic_suffix}'
+
+
+def split_prompt(message) -> tuple:
+    """
+    Args:
+        message: Prompt или обычная строка
+
+    Returns:
+        tuple: (неизменный префикс, данные вызова); у строки префикса нет
+    """
+    if isinstance(message, Prompt):
+        return message.static_prefix, message.dynamic_suffix
+    return '', str(message)
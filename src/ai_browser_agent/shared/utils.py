@@ -0,0 +1,149 @@
+import random
+import re
+
+WORD_PATTERN = re.compile(r'[a-zа-яё0-9]+')
+CAMEL_CASE_PATTERN = re.compile(r'([a-zа-я0-9])([A-ZА-Я])')
+
+# Окончания, которые отрезаются при нормализации, от длинных к коротким
+RU_ENDINGS = (
+    'иями', 'ться', 'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ать', 'ять', 'еть', 'ить', 'ыть',
+    'ешь', 'ишь', 'ете', 'ите', 'ия', 'ие', 'ию', 'ии', 'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые',
+    'ие', 'ов', 'ев', 'ах', 'ях', 'ом', 'ем', 'ам', 'ям', 'ую', 'юю', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь',
+)
+EN_ENDINGS = ('ing', 'ed', 'es', 's')
+MIN_STEM_LENGTH = 3
+
+# Английские слова интерфейсов -> русское слово с тем же смыслом.
+# Обе формы приводятся к одной основе, поэтому "cart" совпадает с "корзину"
+BILINGUAL_SYNONYMS = {
+    'cart': 'корзина',
+    'basket': 'корзина',
+    'bag': 'корзина',
+    'search': 'поиск',
+    'find': 'поиск',
+    'searchbox': 'поиск',
+    'найти': 'поиск',
+    'login': 'вход',
+    'signin': 'вход',
+    'войти': 'вход',
+    'button': 'кнопка',
+    'btn': 'кнопка',
+    'link': 'ссылка',
+    'textbox': 'поле',
+    'input': 'поле',
+    'field': 'поле',
+    'add': 'добавить',
+    'buy': 'купить',
+    'order': 'заказ',
+    'checkout': 'оформить',
+    'catalog': 'каталог',
+    'menu': 'меню',
+    'close': 'закрыть',
+    'submit': 'отправить',
+    'send': 'отправить',
+    'next': 'далее',
+    'continue': 'продолжить',
+    'email': 'почта',
+    'mail': 'почта',
+    'phone': 'телефон',
+    'address': 'адрес',
+    'city': 'город',
+    'price': 'цена',
+    'product': 'товар',
+    'item': 'товар',
+    'quantity': 'количество',
+    'delivery': 'доставка',
+    'pay': 'оплата',
+    'payment': 'оплата',
+    'register': 'регистрация',
+    'signup': 'регистрация',
+    'password': 'пароль',
+    'profile': 'профиль',
+    'account': 'профиль',
+    'аккаунт': 'профиль',
+    'кабинет': 'профиль',
+    'favorite': 'избранное',
+    'favourite': 'избранное',
+    'filter': 'фильтр',
+    'sort': 'сортировка',
+    'checkbox': 'флажок',
+}
+
+STOP_WORDS = {
+    'на', 'в', 'во', 'с', 'со', 'и', 'или', 'для', 'по', 'к', 'ко', 'из', 'от', 'до', 'за', 'под', 'над',
+    'the', 'a', 'an', 'to', 'of', 'in', 'on', 'for', 'and', 'or', 'with', 'at', 'by',
+}
+
+
+def _strip_ending(word: str) -> str:
+    endings = EN_ENDINGS if word.isascii() else RU_ENDINGS
+    for ending in endings:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def normalize_word(word: str) -> str:
+    """
+    Приводит слово к основе, общей для русских и английских синонимов.
+
+    Args:
+        word: Слово в нижнем регистре
+
+    Returns:
+        str: Основа слова, например "корзину" -> "корзин", "cart" -> "корзин"
+    """
+    word = word.replace('ё', 'е')
+    synonym = BILINGUAL_SYNONYMS.get(word)
+    if synonym is None:
+        synonym = _CANONICAL_STEMS.get(_strip_ending(word))
+    if synonym is not None:
+        return _strip_ending(synonym)
+    return _strip_ending(word)
+
+
+_CANONICAL_STEMS = {_strip_ending(word): canonical for word, canonical in BILINGUAL_SYNONYMS.items()}
+
+
+def tokenize(text: str) -> list:
+    """
+    Разбивает текст на нормализованные слова для сравнения с описанием элемента.
+
+    camelCase, kebab-case и snake_case разбиваются на отдельные слова,
+    слова приводятся к общей русско-английской основе, служебные слова отбрасываются.
+
+    Args:
+        text: Произвольный текст (описание, текст элемента, атрибуты)
+
+    Returns:
+        list: Основы слов в порядке появления
+    """
+    if not text:
+        return []
+    text = CAMEL_CASE_PATTERN.sub(r'\1 \2', str(text)).lower().replace('ё', 'е')
+    return [
+        normalize_word(word) for word in WORD_PATTERN.findall(text)
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка количества токенов: кириллица и разметка дают примерно 3 символа на токен"""
+    return len(text) // 3 + 1
+
+
+
+def backoff_delay(attempt: int, base: float, cap: float, minimum: float = 0.0) -> float:
+    """
+    Экспоненциальная задержка перед повтором с полным джиттером.
+
+    Args:
+        attempt: Номер повтора, начиная с 1
+        base: Задержка первого повтора, секунды
+        cap: Верхняя граница задержки
+        minimum: Нижняя граница, например из заголовка Retry-After
+
+    Returns:
+        float: Случайная задержка от 0 до base * 2^(attempt-1), но не меньше minimum
+    """
+    return max(minimum, random.uniform(0, min(cap, base * 2 ** (attempt - 1))))
@@ -10,9 +10,8 @@ class AIDOMSearch:
         self.page = page
         self.ai_client = ai_client  # Клиент для работы с ИИ (OpenAI и т.д.)
         self.visited_selectors = set()
-        self.search_stack = []
-        self.max_depth = 3
-        self.max_branches = 5  # Максимальное количество ветвей для исследования
+        self.max_depth = 3  # Максимальное количество волн
+        self.max_branches = 5  # Максимальное количество ветвей, исследуемых за одну волну
 
     async def find_element_by_description(self, description: str) -> str:
         """
@@ -21,73 +20,66 @@ class AIDOMSearch:
         print(f"🔍 Поиск элемента: {description}")
 
         # Начинаем с body
-        self.search_stack = ['body']
-        self.visited_selectors = set()
+        self.visited_selectors = {'body'}
 
-        return await self._search_recursive(description)
+        return await self._search_beam(description)
 
-    async def _search_recursive(self, description: str, current_depth: int = 0) -> str:
+    async def _search_beam(self, description: str) -> str:
         """
-        Рекурсивный поиск с использованием ИИ
+        Лучевой поиск с использованием ИИ, как PlaywrightBrowserAdapter._search_dom_tree.
+        На каждой волне параллельно исследуются не больше max_branches поддеревьев,
+        первая найденная ветка отменяет остальные. Рекомендации всех веток
+        чередуются по рангу, лучшие max_branches образуют следующую волну
         """
-        if current_depth >= self.max_depth or not self.search_stack:
-            raise Exception("Элемент не найден в пределах максимальной глубины")
-
-        current_selector = self.search_stack[-1]
-
-        # Получаем структуру DOM для текущего селектора
-        dom_structure = await self.analyze_dom_structure(current_selector)
-
-        # Анализируем структуру с помощью ИИ
-        analysis_result = await self._ask_ai_to_analyze(dom_structure, description, self.search_stack)
+        frontier = [['body']]
+        for depth in range(self.max_depth):
+            wave = []
+            while frontier and len(wave) < self.max_branches:
+                wave.append(frontier.pop(0))
+            if not wave:
+                break
+            print(f"🌊 Волна {depth + 1}: {[path[-1] for path in wave]}")
+
+            branches = [asyncio.create_task(self._explore(description, path)) for path in wave]
+            ranked_paths = []
+            try:
+                for branch in asyncio.as_completed(branches):
+                    try:
+                        found_selector, next_paths = await branch
+                    except Exception as e:
+                        print(f"❌ Ветка не дала результата: {e}")
+                        continue
+                    if found_selector:
+                        print(f"✅ Найден селектор: {found_selector}")
+                        return found_selector
+                    ranked_paths.append(next_paths)
+            finally:
+                for branch in branches:
+                    branch.cancel()
+
+            # лучшие рекомендации каждой ветки идут первыми, множество посещенных общее для всех веток
+            merged = []
+            for rank in range(max((len(paths) for paths in ranked_paths), default=0)):
+                for paths in ranked_paths:
+                    if rank < len(paths) and paths[rank][-1] not in self.visited_selectors:
+                        self.visited_selectors.add(paths[rank][-1])
+                        merged.append(paths[rank])
+            frontier = merged + frontier
+
+        raise Exception("Элемент не найден в пределах максимальной глубины")
+
+    async def _explore(self, description: str, search_path: List[str]):
+        """
+        Один снимок поддерева и один запрос к ИИ.
 
-        # Если ИИ нашел точный селектор
+        Returns:
+            tuple: (найденный селектор или None, пути к рекомендованным поддеревьям по убыванию ранга)
+        """
+        dom_structure = await self.analyze_dom_structure(search_path[-1])
+        analysis_result = await self._ask_ai_to_analyze(dom_structure, description, search_path)
         if analysis_result.get('found_selector'):
-            found_selector = analysis_result['found_selector']
-            print(f"✅ Найден селектор: {found_selector}")
-            return found_selector
-
-        # Получаем рекомендации по дальнейшему поиску
-        next_selectors = analysis_result.get('next_selectors', [])
-
-        # Фильтруем уже посещенные селекторы
-        next_selectors = [sel for sel in next_selectors if sel not in self.visited_selectors]
-
-        if not next_selectors:
-            # Если нет рекомендаций, возвращаемся на уровень выше
-            if len(self.search_stack) > 1:
-                self.search_stack.pop()
-                return await self._search_recursive(description, current_depth)
-            else:
-                raise Exception("Элемент не найден")
-
-        # Исследуем рекомендованные селекторы
-        for selector in next_selectors[:self.max_branches]:
-            try:
-                print(f"🔍 Исследую: {selector}")
-                self.visited_selectors.add(selector)
-                self.search_stack.append(selector)
-
-                # Рекурсивный поиск в этой ветке
-                result = await self._search_recursive(description, current_depth + 1)
-                if result:
-                    return result
-
-                # Если не нашли, убираем из стека и продолжаем
-                self.search_stack.pop()
-
-            except Exception as e:
-                print(f"❌ Ошибка при исследовании {selector}: {e}")
-                if selector in self.search_stack:
-                    self.search_stack.pop()
-                continue
-
-        # Если ни одна ветка не дала результата, возвращаемся назад
-        if len(self.search_stack) > 1:
-            self.search_stack.pop()
-            return await self._search_recursive(description, current_depth)
-
-        raise Exception("Элемент не найден")
+            return analysis_result['found_selector'], []
+        return None, [search_path + [selector] for selector in analysis_result.get('next_selectors', [])]
 
     async def _ask_ai_to_analyze(self, dom_structure: Dict, description: str, search_stack: List[str]) -> Dict[
         str, Any]: